@@ -0,0 +1,329 @@
+"""
+Script de benchmark das rotinas de avaliação (instância do trabalho e instâncias sintéticas)
+Execute: python rodar_benchmark.py {violacao,nucleos,vizinhancas} [--tamanhos 10000x50x20 100000x100x40]
+"""
+
+import sys
+import os
+import time
+import tempfile
+import argparse
+import tracemalloc
+import numpy as np
+
+# Adiciona src ao path
+sys.path.insert(0, 'src')
+
+from src.monitoramento_ativos_base import MonitoramentoAtivosCompleto
+from src.gerador_instancias import GeradorInstancias
+from src.solucao import Solucao
+from src.nucleos import NucleosNumpy, NucleosNumba, numba_disponivel
+
+def violacao_referencia(funcoes_objetivo, x_ij, y_jk, h_ik) -> float:
+    """Implementação original de calcular_violacao (laços por ativo), usada como referência."""
+    n_ativos, m_bases = funcoes_objetivo.n_ativos, funcoes_objetivo.m_bases
+    s_equipes, eta = funcoes_objetivo.s_equipes, funcoes_objetivo.eta
+    violacao_total = 0.0
+    
+    for k in range(s_equipes):
+        soma_equipe = np.sum(y_jk[:, k])
+        ativos_equipe = np.sum(h_ik[:, k])
+        if soma_equipe > 1:
+            violacao_total += (soma_equipe - 1)**2
+        if ativos_equipe > 0 and soma_equipe != 1:
+            violacao_total += (abs(soma_equipe - 1))**2
+        if soma_equipe == 1 and ativos_equipe == 0:
+            violacao_total += 1.0
+    
+    for i in range(n_ativos):
+        soma_bases = np.sum(x_ij[i, :])
+        if soma_bases != 1:
+            violacao_total += (soma_bases - 1)**2
+    
+    for i in range(n_ativos):
+        for j in range(m_bases):
+            if x_ij[i, j] == 1:
+                if np.sum(y_jk[j, :]) == 0:
+                    violacao_total += 1.0
+    
+    for i in range(n_ativos):
+        soma_equipes = np.sum(h_ik[i, :])
+        if soma_equipes != 1:
+            violacao_total += (soma_equipes - 1)**2
+    
+    for i in range(n_ativos):
+        for k in range(s_equipes):
+            if h_ik[i, k] == 1:
+                base_ativo = np.where(x_ij[i, :] == 1)[0]
+                if len(base_ativo) > 0:
+                    base_id = base_ativo[0]
+                    if y_jk[base_id, k] != 1:
+                        violacao_total += 1.0
+    
+    for k in range(s_equipes):
+        ativos_equipe = np.sum(h_ik[:, k])
+        if ativos_equipe > 0:
+            minimo_ativos = eta * n_ativos / s_equipes
+            if ativos_equipe < minimo_ativos:
+                violacao_total += (minimo_ativos - ativos_equipe)**2
+    
+    return violacao_total
+
+def cronometrar(funcao, *args, repeticoes: int = 1) -> float:
+    """Tempo médio (s) de uma chamada."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(*args)
+    return (time.perf_counter() - inicio) / repeticoes
+
+def solucoes_teste(monitoramento, quantidade: int = 4):
+    """
+    Soluções de teste com semente fixa, montadas direto em matrizes (sem a heurística
+    construtiva, lenta em instâncias grandes): metade viável na estrutura, metade perturbada.
+    """
+    rng = np.random.default_rng(0)
+    n, m, s = monitoramento.n_ativos, monitoramento.m_bases, monitoramento.s_equipes
+    solucoes = []
+    for t in range(quantidade):
+        # Cada equipe numa base sorteada; ativo na base aberta mais próxima, numa equipe dela
+        base_equipe = rng.choice(m, size=s, replace=s > m)
+        abertas = np.zeros(m, dtype=bool)
+        abertas[base_equipe] = True
+        base_ativo = monitoramento.candidatos.base_aberta_mais_proxima(abertas)
+        equipe_ativo = np.empty(n, dtype=np.int64)
+        for j in np.flatnonzero(abertas):
+            ativos = np.flatnonzero(base_ativo == j)
+            equipe_ativo[ativos] = rng.choice(np.flatnonzero(base_equipe == j), size=len(ativos))
+        
+        x_ij = np.zeros((n, m), dtype=int)
+        y_jk = np.zeros((m, s), dtype=int)
+        h_ik = np.zeros((n, s), dtype=int)
+        x_ij[np.arange(n), base_ativo] = 1
+        y_jk[base_equipe, np.arange(s)] = 1
+        h_ik[np.arange(n), equipe_ativo] = 1
+        
+        if t % 2 == 1:
+            # Perturbações que violam restrições: bits invertidos nas três matrizes
+            for matriz in (x_ij, y_jk, h_ik):
+                posicoes = rng.random(matriz.shape) < 0.01
+                matriz[posicoes] = 1 - matriz[posicoes]
+        solucoes.append((x_ij, y_jk, h_ik))
+    return solucoes
+
+def instancias(tamanhos):
+    """Instância do trabalho seguida das instâncias sintéticas pedidas (n x m x s)."""
+    yield 'probdata', MonitoramentoAtivosCompleto('data/probdata.csv')
+    with tempfile.TemporaryDirectory() as pasta:
+        for tamanho in tamanhos:
+            n, m, s = (int(v) for v in tamanho.split('x'))
+            arquivo = os.path.join(pasta, f'sintetica_{tamanho}.csv')
+            instancia = GeradorInstancias(semente=1).gerar(arquivo, n, m, s, gravar_cache=False)
+            yield tamanho, MonitoramentoAtivosCompleto(arquivo, usar_cache=False, **instancia['opcoes_dados'])
+
+def benchmark_violacao(tamanhos):
+    print(f"{'instância':>18} | {'referência (ms)':>15} | {'vetorizada (ms)':>15} | {'aceleração':>10} | iguais")
+    for nome, monitoramento in instancias(tamanhos):
+        funcoes_objetivo = monitoramento.funcoes_objetivo
+        solucoes = solucoes_teste(monitoramento)
+        
+        iguais = all(violacao_referencia(funcoes_objetivo, *sol) == funcoes_objetivo.calcular_violacao(*sol)
+                     for sol in solucoes)
+        repeticoes = max(1, 2000 // max(1, monitoramento.n_ativos // 100))
+        t_ref = np.mean([cronometrar(violacao_referencia, funcoes_objetivo, *sol) for sol in solucoes[:2]])
+        t_vet = np.mean([cronometrar(funcoes_objetivo.calcular_violacao, *sol, repeticoes=repeticoes)
+                         for sol in solucoes])
+        print(f"{nome:>18} | {1000 * t_ref:15.3f} | {1000 * t_vet:15.3f} | {t_ref / t_vet:9.1f}x | {iguais}")
+
+def benchmark_nucleos(tamanhos):
+    if not numba_disponivel():
+        print("numba não está instalado: só os tempos dos núcleos NumPy são medidos")
+    print(f"{'instância':>18} | {'núcleo':>18} | {'numpy (ms)':>10} | {'numba (ms)':>10} | {'aceleração':>10} | iguais")
+    for nome, monitoramento in instancias(tamanhos):
+        funcoes_objetivo = monitoramento.funcoes_objetivo
+        distancias = monitoramento.distancias
+        minimo = funcoes_objetivo.eta * funcoes_objetivo.n_ativos / funcoes_objetivo.s_equipes
+        solucoes = [Solucao.de_matrizes(*sol, minimo_ativos=minimo) for sol in solucoes_teste(monitoramento)]
+        sol = solucoes[0]
+        # Lote com ~1M posições (f1, f2 e violação concatenados numa lista para a comparação)
+        b = max(1, (1 << 20) // monitoramento.n_ativos)
+        equipes = np.stack([solucoes[t % len(solucoes)].equipe_ativo for t in range(b)])
+        bases = np.stack([solucoes[t % len(solucoes)].base_equipe for t in range(b)])
+        
+        # SWAP: linhas sorteadas com ~4M pares (a varredura é quadrática no número de ativos)
+        trocaveis = sol.base_ativo >= 0
+        linhas = np.flatnonzero(trocaveis)
+        linhas = np.sort(np.random.default_rng(0).choice(
+            linhas, min(len(linhas), max(1, (1 << 22) // monitoramento.n_ativos)), replace=False))
+        propria = np.where(trocaveis, np.asarray(distancias[np.arange(monitoramento.n_ativos),
+                                                            np.maximum(sol.base_ativo, 0)], dtype=np.float64), 0.0)
+        limite = monitoramento.candidatos.limite
+        
+        chamadas = {
+            'f1': lambda nucleos: nucleos.f1(distancias, sol.equipe_ativo, sol.base_equipe),
+            'violacao_equipes': lambda nucleos: nucleos.violacao_equipes(sol.carga_equipe, sol.base_equipe, minimo),
+            f'avaliar_lote[{b}]': lambda nucleos: np.concatenate(
+                nucleos.avaliar_lote(distancias, equipes, bases, minimo)).tolist(),
+            f'melhor_troca[{len(linhas)}]': lambda nucleos: nucleos.melhor_troca(
+                distancias, sol.base_ativo, linhas, trocaveis, propria, limite)
+        }
+        backends = [NucleosNumpy()] + ([NucleosNumba()] if numba_disponivel() else [])
+        
+        for nucleo, chamada in chamadas.items():
+            # Primeira chamada fora da medição (compila o núcleo Numba)
+            resultados = [chamada(nucleos) for nucleos in backends]
+            iguais = all(r == resultados[0] for r in resultados)
+            tempos = [cronometrar(chamada, nucleos, repeticoes=20) for nucleos in backends]
+            if len(tempos) > 1:
+                print(f"{nome:>18} | {nucleo:>18} | {1000 * tempos[0]:10.3f} | {1000 * tempos[1]:10.3f} | "
+                      f"{tempos[0] / tempos[1]:9.1f}x | {iguais}")
+            else:
+                print(f"{nome:>18} | {nucleo:>18} | {1000 * tempos[0]:10.3f} | {'-':>10} | {'-':>10} | -")
+
+def vizinhos_referencia(busca_local, sol, vizinhanca: str, ativos_sample: np.ndarray):
+    """Vizinhos como eram gerados antes dos descritores de movimento: uma cópia por candidato."""
+    for movimento in movimentos(busca_local, sol, vizinhanca, ativos_sample):
+        candidato = sol.copiar()
+        busca_local._aplicar_movimento(candidato, movimento)
+        yield candidato
+
+def melhor_vizinho_referencia(busca_local, sol, vizinhos, funcao_objetivo: str):
+    """Best improvement com cópias avaliadas em lote (implementação anterior, usada como referência)."""
+    funcoes_objetivo = busca_local.funcoes_objetivo
+    melhor_sol, melhor_valor = sol, funcoes_objetivo.valor_solucao(sol, funcao_objetivo)
+    vizinhos = list(vizinhos)
+    tamanho_lote = max(1, (1 << 20) // busca_local.n_ativos)
+    for inicio in range(0, len(vizinhos), tamanho_lote):
+        lote = vizinhos[inicio:inicio + tamanho_lote]
+        f1, f2, violacao = funcoes_objetivo.avaliar_solucoes(lote)
+        valores = f1 if funcao_objetivo == 'f1' else f2
+        melhores = np.flatnonzero((violacao == 0.0) & (valores < melhor_valor))
+        if len(melhores) > 0:
+            b = melhores[np.argmin(valores[melhores])]
+            melhor_sol, melhor_valor = lote[b], float(valores[b])
+    return melhor_sol
+
+def movimentos_task_move(busca_local, sol):
+    """Vizinhança completa do TASK MOVE: cada ativo para a equipe menos carregada de cada outra base aberta."""
+    bases = np.flatnonzero(busca_local._bases_com_equipes(sol) & busca_local.candidatos.bases_ativas)
+    destinos = {}
+    for j in bases:
+        equipes_base = np.flatnonzero(sol.base_equipe == j)
+        destinos[j] = int(equipes_base[np.argmin(sol.carga_equipe[equipes_base])])
+    for i in np.flatnonzero(sol.equipe_ativo >= 0):
+        for j in bases:
+            if j != sol.base_ativo[i] and busca_local.candidatos.permitido(i, j):
+                yield ('ativo', int(i), destinos[j])
+
+def movimentos_swap(busca_local, sol, ativos_sample: np.ndarray):
+    """SWAP dos ativos sorteados: cada ativo entra na equipe do outro."""
+    # Pares (a, b), b > a, em bases diferentes com equipe, cada ativo permitido na base do outro
+    candidatos = busca_local.candidatos
+    abertas = busca_local._bases_com_equipes(sol) & candidatos.bases_ativas
+    for a in np.sort(ativos_sample).tolist():
+        base_a = sol.base_ativo[a]
+        if base_a < 0 or not abertas[base_a]:
+            continue
+        for b in range(a + 1, busca_local.n_ativos):
+            base_b = sol.base_ativo[b]
+            if base_b >= 0 and base_b != base_a and abertas[base_b] and \
+                    candidatos.permitido(a, base_b) and candidatos.permitido(b, base_a):
+                yield ('troca', a, int(sol.equipe_ativo[b]), b, int(sol.equipe_ativo[a]))
+
+def movimentos_two_opt(busca_local, sol):
+    """TWO-OPT: cada equipe com ativos para cada base vazia permitida a todos os seus ativos."""
+    bases_vazias = np.flatnonzero(~busca_local._bases_com_equipes(sol) & busca_local.candidatos.bases_ativas)
+    for k in np.flatnonzero((sol.base_equipe >= 0) & (sol.carga_equipe > 0)):
+        ativos_equipe = np.flatnonzero(sol.equipe_ativo == k)
+        for j in bases_vazias:
+            if all(busca_local.candidatos.permitido(i, j) for i in ativos_equipe):
+                yield ('equipe', int(k), int(j), ativos_equipe)
+
+def movimentos(busca_local, sol, vizinhanca: str, ativos_sample: np.ndarray):
+    """Descritores de movimento de uma vizinhança da BuscaLocal."""
+    if vizinhanca == 'shift':
+        return busca_local._movimentos_shift(sol)
+    if vizinhanca == 'task_move':
+        return movimentos_task_move(busca_local, sol)
+    if vizinhanca == 'swap':
+        return movimentos_swap(busca_local, sol, ativos_sample)
+    return movimentos_two_opt(busca_local, sol)
+
+def medir_passada(funcao):
+    """
+    (resultado, segundos, cópias de Solucao, pico de memória em KiB) de uma passada; o tempo
+    é medido numa chamada separada, sem o tracemalloc.
+    """
+    inicio = time.perf_counter()
+    funcao()
+    tempo = time.perf_counter() - inicio
+    
+    copiar = Solucao.copiar
+    copias = [0]
+    def copiar_contando(self):
+        copias[0] += 1
+        return copiar(self)
+    Solucao.copiar = copiar_contando
+    tracemalloc.start()
+    try:
+        resultado = funcao()
+        pico = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+        Solucao.copiar = copiar
+    return resultado, tempo, copias[0], pico
+
+def passada_atual(busca_local, sol, vizinhanca: str, ativos_sample: np.ndarray):
+    """Melhor vizinho pela implementação atual (TASK MOVE, SWAP e TWO-OPT pelas matrizes de deltas)."""
+    if vizinhanca == 'task_move':
+        return busca_local.task_move(sol, 'f1')[0]
+    if vizinhanca == 'two_opt':
+        return busca_local.two_opt_equipes(sol, 'f1')[0]
+    if vizinhanca == 'swap':
+        troca = busca_local._melhor_troca(sol, ativos_sample)
+        if troca is None:
+            return sol
+        _, a, b = troca
+        return busca_local._aceitar_movimento(
+            sol, ('troca', a, int(sol.equipe_ativo[b]), b, int(sol.equipe_ativo[a])), 'f1')[0]
+    return busca_local._melhor_movimento(sol, movimentos(busca_local, sol, vizinhanca, ativos_sample), 'f1')[0]
+
+def benchmark_vizinhancas(tamanhos):
+    print(f"{'instância':>18} | {'vizinhança':>10} | {'cópias ref':>10} | {'cópias':>6} | {'pico ref (KiB)':>14} | "
+          f"{'pico (KiB)':>10} | {'ref (ms)':>9} | {'atual (ms)':>10} | {'aceleração':>10} | iguais")
+    for nome, monitoramento in instancias(tamanhos):
+        busca_local = monitoramento.busca_local
+        np.random.seed(0)
+        minimo = monitoramento.eta * monitoramento.n_ativos / monitoramento.s_equipes
+        sol = Solucao.de_matrizes(*monitoramento.gerador_solucoes.gerar_solucao_inicial(),
+                                  minimo_ativos=minimo).canonizar()
+        monitoramento.funcoes_objetivo.valor_solucao(sol, 'f1')
+        ativos_sample = np.random.default_rng(0).choice(monitoramento.n_ativos, min(20, monitoramento.n_ativos),
+                                                        replace=False)
+        
+        for vizinhanca in ['shift', 'task_move', 'swap', 'two_opt']:
+            ref, t_ref, copias_ref, pico_ref = medir_passada(lambda: melhor_vizinho_referencia(
+                busca_local, sol, vizinhos_referencia(busca_local, sol, vizinhanca, ativos_sample), 'f1'))
+            atual, t_atual, copias, pico = medir_passada(lambda: passada_atual(busca_local, sol, vizinhanca, ativos_sample))
+            print(f"{nome:>18} | {vizinhanca:>10} | {copias_ref:10d} | {copias:6d} | {pico_ref:14.1f} | "
+                  f"{pico:10.1f} | {1000 * t_ref:9.2f} | {1000 * t_atual:10.2f} | {t_ref / t_atual:9.1f}x | "
+                  f"{ref.impressao == atual.impressao}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das rotinas de avaliação')
+    parser.add_argument('alvo', choices=['violacao', 'nucleos', 'vizinhancas'])
+    parser.add_argument('--tamanhos', nargs='*', default=None,
+                        help='instâncias sintéticas n_ativos x m_bases x s_equipes')
+    args = parser.parse_args()
+    # A referência das vizinhanças copia a solução por candidato: instâncias menores por padrão
+    padrao = ['2000x50x20', '10000x50x20'] if args.alvo == 'vizinhancas' else ['10000x50x20', '100000x100x40']
+    args.tamanhos = padrao if args.tamanhos is None else args.tamanhos
+    
+    if args.alvo == 'violacao':
+        benchmark_violacao(args.tamanhos)
+    elif args.alvo == 'nucleos':
+        benchmark_nucleos(args.tamanhos)
+    elif args.alvo == 'vizinhancas':
+        benchmark_vizinhancas(args.tamanhos)
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,7 @@ def main_f2_only():
     print("Carregando dados...", flush=True)
     monitoramento = MonitoramentoAtivosCompleto('data/probdata.csv')
     
-    if monitoramento.dados.empty:
+    if monitoramento.n_ativos == 0:
         print("Erro: Não foi possível carregar os dados.")
         return
     
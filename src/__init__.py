@@ -8,10 +8,18 @@ de monitoramento de ativos usando algoritmos VNS.
 
 from .monitoramento_ativos_base import MonitoramentoAtivosCompleto
 from .dados import DadosProcessor
+from .candidatos import IndiceCandidatos
+from .solucao import Solucao, SolucaoAgregada, CacheAvaliacoes
 from .solucoes_iniciais import GeradorSolucoes
 from .funcoes_objetivo import FuncoesObjetivo
+from .nucleos import NucleosNumpy, NucleosNumba, criar_nucleos
 from .busca_local import BuscaLocal
+from .busca_agregada import BuscaLocalAgregada
 from .algoritmos_vns import AlgoritmoVNS
+from .preprocessamento import PreProcessamento
+from .gerador_instancias import GeradorInstancias
+from .distancias_rede import DistanciasRede
+from .memoria_compartilhada import DadosCompartilhados, ExecutorParalelo
 from .visualizacao import Visualizador
 from .relatorios import GeradorRelatorios
 
@@ -21,10 +29,23 @@ __author__ = "Trabalho Computacional - Teoria da Decisão"
 __all__ = [
     'MonitoramentoAtivosCompleto',
     'DadosProcessor',
+    'IndiceCandidatos',
+    'Solucao',
+    'SolucaoAgregada',
+    'CacheAvaliacoes',
     'GeradorSolucoes',
     'FuncoesObjetivo',
+    'NucleosNumpy',
+    'NucleosNumba',
+    'criar_nucleos',
     'BuscaLocal',
+    'BuscaLocalAgregada',
     'AlgoritmoVNS',
+    'PreProcessamento',
+    'GeradorInstancias',
+    'DistanciasRede',
+    'DadosCompartilhados',
+    'ExecutorParalelo',
     'Visualizador',
     'GeradorRelatorios'
 ]
\ No newline at end of file
@@ -1,6 +1,16 @@
 import numpy as np
 from typing import Dict, Tuple
 
+try:
+    from .solucao import Solucao, SolucaoAgregada
+except ImportError:
+    # Para execução direta do arquivo
+    from solucao import Solucao, SolucaoAgregada
+
+# Modelos de busca: 'completo' (equipes com rótulo, Solucao) ou 'agregado' (número de equipes por
+# base, SolucaoAgregada; equipes atribuídas só no resultado)
+MODELOS = ('completo', 'agregado')
+
 class AlgoritmoVNS:
     # Classe que implementa o algoritmo VNS (Variable Neighborhood Search) para otimização
     
@@ -14,9 +24,11 @@ class AlgoritmoVNS:
         self.distancias = monitoramento.distancias
         self.funcoes_objetivo = monitoramento.funcoes_objetivo
         self.busca_local = monitoramento.busca_local
+        self.busca_agregada = monitoramento.busca_agregada
         self.gerador_solucoes = monitoramento.gerador_solucoes
     
-    def vns(self, funcao_objetivo: str = 'f1', max_iter: int = 1000, max_iter_sem_melhoria: int = 50) -> Dict:
+    def vns(self, funcao_objetivo: str = 'f1', max_iter: int = 1000, max_iter_sem_melhoria: int = 50,
+            modelo: str = 'completo') -> Dict:
         """
         GVNS (General Variable Neighborhood Search) - Algoritmo 6 dos slides.
         Usa VND para busca local e Tournament Selection para comparação.
@@ -25,22 +37,35 @@ class AlgoritmoVNS:
             funcao_objetivo: 'f1' ou 'f2'
             max_iter: Numero maximo de iteracoes
             max_iter_sem_melhoria: Criterio de parada inteligente (iteracoes sem melhoria)
-            
+            modelo: 'completo' ou 'agregado' (busca sobre base de cada ativo e número de equipes
+                por base, sem SHIFT; ver BuscaLocalAgregada)
+        
         Returns:
             Dicionario com resultados
         """
-        print(f"  Iniciando GVNS para {funcao_objetivo}...", flush=True)
+        if modelo not in MODELOS:
+            raise ValueError(f"Modelo desconhecido: {modelo} (use um de {MODELOS})")
+        print(f"  Iniciando GVNS para {funcao_objetivo} (modelo {modelo})...", flush=True)
+        busca = self.busca_local if modelo == 'completo' else self.busca_agregada
         
         # Define seed aleatoria para diversificacao
         np.random.seed(None)
         
-        # Solucao inicial
-        x_ij, y_jk, h_ik = self.gerador_solucoes.gerar_solucao_inicial()
+        # Contadores do cache de avaliações valem para esta execução
+        busca.cache_avaliacoes.limpar()
+        
+        # Solucao inicial (vetores de índices durante a busca, com as equipes na forma canônica e o
+        # mínimo de ativos por equipe para as consultas de viabilidade; matrizes só no resultado)
+        minimo_ativos = self.eta * self.n_ativos / self.s_equipes
+        solucao = Solucao.de_matrizes(*self.gerador_solucoes.gerar_solucao_inicial(),
+                                      minimo_ativos=minimo_ativos).canonizar()
+        if modelo == 'agregado':
+            solucao = SolucaoAgregada.de_solucao(solucao, self.m_bases)
         
         # Aplica VND na solucao inicial
         print(f"    Aplicando VND inicial...", flush=True)
-        x_ij, y_jk, h_ik, melhor_valor = self.busca_local.variable_neighborhood_descent(
-            x_ij, y_jk, h_ik, funcao_objetivo, verbose=True)
+        solucao, melhor_valor = busca.variable_neighborhood_descent(
+            solucao, funcao_objetivo, verbose=True)
         
         print(f"    Valor inicial (apos VND): {melhor_valor:.2f}", flush=True)
         
@@ -66,22 +91,19 @@ class AlgoritmoVNS:
                 if verbose_vnd:
                     print(f"      Shake k={k}, intensidade={intensidade_shake:.2f}", flush=True)
                 
-                x_shake, y_shake, h_shake = self.busca_local.shake_adaptativo(
-                    x_ij, y_jk, h_ik, intensidade_shake)
+                sol_shake = busca.shake_adaptativo(solucao, intensidade_shake, funcao_objetivo)
                 
                 # x'' = VND(x') - busca local usando VND
-                x_viz, y_viz, h_viz, valor_viz = self.busca_local.variable_neighborhood_descent(
-                    x_shake, y_shake, h_shake, funcao_objetivo, verbose=verbose_vnd)
+                sol_viz, valor_viz = busca.variable_neighborhood_descent(
+                    sol_shake, funcao_objetivo, verbose=verbose_vnd)
                 
                 # NeighborhoodChange: usa Tournament Selection para comparar
-                sol_atual = (x_ij, y_jk, h_ik)
-                sol_viz = (x_viz, y_viz, h_viz)
-                sol_escolhida, aceita = self.busca_local.tournament_selection(
-                    sol_atual, sol_viz, funcao_objetivo)
+                sol_escolhida, aceita = busca.tournament_selection(
+                    solucao, sol_viz, funcao_objetivo)
                 
                 if aceita:
                     # Aceita nova solucao e reinicia k
-                    x_ij, y_jk, h_ik = sol_escolhida
+                    solucao = sol_escolhida
                     melhor_valor = valor_viz
                     k = 1  # Reinicia
                     iteracoes_sem_melhoria = 0
@@ -103,57 +125,91 @@ class AlgoritmoVNS:
         
         print(f"  GVNS concluido - Melhor valor: {melhor_valor:.2f}", flush=True)
         
+        # Modelo agregado: equipes atribuídas agora, na divisão balanceada de cada base
+        if modelo == 'agregado':
+            solucao = solucao.para_solucao(self.s_equipes, minimo_ativos)
+        
         # Verifica quantas equipes estao sendo usadas
-        equipes_usadas = np.sum(np.sum(h_ik, axis=0) > 0)
+        equipes_usadas = np.count_nonzero(solucao.carga_equipe > 0)
         print(f"  Equipes utilizadas: {equipes_usadas}/{self.s_equipes}", flush=True)
         
+        cache = busca.cache_avaliacoes.estatisticas()
+        print(f"  Cache de avaliações: {cache['acertos']} acertos, {cache['falhas']} falhas "
+              f"({100 * cache['taxa_acerto']:.1f}%)", flush=True)
+        
+        # Matrizes para o Visualizador e o GeradorRelatorios
+        x_ij, y_jk, h_ik = solucao.para_matrizes(self.m_bases)
+        
         return {
             'x_ij': x_ij,
             'y_jk': y_jk,
             'h_ik': h_ik,
             'valor_objetivo': melhor_valor,
             'historico': historico,
-            'funcao_objetivo': funcao_objetivo
+            'funcao_objetivo': funcao_objetivo,
+            'modelo': modelo,
+            'cache_avaliacoes': cache
         }
     
-    def otimizacao_mono_objetivo(self, n_execucoes: int = 5) -> Dict:
+    def otimizacao_mono_objetivo(self, n_execucoes: int = 5, processos: int = 1,
+                                 modelo: str = 'completo') -> Dict:
         """
         Executa otimização mono-objetivo para f1 e f2.
         
         Args:
             n_execucoes: Número de execuções para cada função
-            
+            processos: Execuções simultâneas; acima de 1 usa ExecutorParalelo (dados do
+                problema em memória compartilhada, publicados uma vez para f1 e f2)
+            modelo: 'completo' ou 'agregado' (ver vns)
+        
         Returns:
             Resultados das otimizações
         """
         resultados = {}
+        executor = self.monitoramento.executor_paralelo(processos) if processos > 1 else None
         
-        for funcao in ['f1', 'f2']:
-            print(f"\n{'='*50}")
-            print(f"OTIMIZANDO {funcao.upper()}")
-            print(f"{'='*50}")
-            
+        try:
+            for funcao in ['f1', 'f2']:
+                resultados[funcao] = self._executar_funcao(funcao, n_execucoes, executor, modelo)
+        finally:
+            if executor is not None:
+                executor.fechar()
+        
+        return resultados
+    
+    def _executar_funcao(self, funcao: str, n_execucoes: int, executor, modelo: str = 'completo') -> Dict:
+        """Execuções do VNS para uma função objetivo, com as estatísticas."""
+        print(f"\n{'='*50}")
+        print(f"OTIMIZANDO {funcao.upper()}")
+        print(f"{'='*50}")
+        
+        if executor is not None:
+            print(f"\n{n_execucoes} execuções de {funcao.upper()} em {executor.processos} processos:")
+            execucoes = executor.vns(funcao, n_execucoes, max_iter=500, max_iter_sem_melhoria=5, modelo=modelo)
+            for execucao, resultado in enumerate(execucoes):
+                print(f"  Resultado {execucao + 1}: {resultado['valor_objetivo']:.2f}")
+        else:
             execucoes = []
             for execucao in range(n_execucoes):
                 print(f"\nExecução {execucao + 1}/{n_execucoes} de {funcao.upper()}:")
-                resultado = self.vns(funcao, max_iter=500, max_iter_sem_melhoria=5)
+                resultado = self.vns(funcao, max_iter=500, max_iter_sem_melhoria=5, modelo=modelo)
                 execucoes.append(resultado)
                 print(f"  Resultado: {resultado['valor_objetivo']:.2f}")
-            
-            # Estatísticas
-            valores = [r['valor_objetivo'] for r in execucoes]
-            resultados[funcao] = {
-                'execucoes': execucoes,
-                'min': np.min(valores),
-                'max': np.max(valores),
-                'std': np.std(valores),
-                'media': np.mean(valores)
-            }
-            
-            print(f"\nEstatísticas {funcao.upper()}:")
-            print(f"  Mínimo: {resultados[funcao]['min']:.2f}")
-            print(f"  Máximo: {resultados[funcao]['max']:.2f}")
-            print(f"  Média: {resultados[funcao]['media']:.2f}")
-            print(f"  Desvio: {resultados[funcao]['std']:.2f}")
         
-        return resultados
+        # Estatísticas
+        valores = [r['valor_objetivo'] for r in execucoes]
+        estatisticas = {
+            'execucoes': execucoes,
+            'min': np.min(valores),
+            'max': np.max(valores),
+            'std': np.std(valores),
+            'media': np.mean(valores)
+        }
+        
+        print(f"\nEstatísticas {funcao.upper()}:")
+        print(f"  Mínimo: {estatisticas['min']:.2f}")
+        print(f"  Máximo: {estatisticas['max']:.2f}")
+        print(f"  Média: {estatisticas['media']:.2f}")
+        print(f"  Desvio: {estatisticas['std']:.2f}")
+        
+        return estatisticas
@@ -0,0 +1,266 @@
+import numpy as np
+from typing import List, Tuple
+
+try:
+    from .solucao import SolucaoAgregada
+    from .busca_local import BuscaLocal, TAMANHO_LOTE_AVALIACAO
+except ImportError:
+    # Para execução direta do arquivo
+    from solucao import SolucaoAgregada
+    from busca_local import BuscaLocal, TAMANHO_LOTE_AVALIACAO
+
+class BuscaLocalAgregada(BuscaLocal):
+    # Classe com a busca local do modelo agregado por base (SolucaoAgregada): a busca decide a base
+    # de cada ativo e quantas equipes cada base tem. Sem rótulos de equipe não existe SHIFT e cada
+    # vizinhança é varrida inteira por deltas vetorizados, sem montar cópias dos vizinhos.
+    # Tournament Selection, VND e cache de avaliações vêm da BuscaLocal
+    
+    def _calcular_valores(self, solucao: SolucaoAgregada) -> Tuple[float, float, float]:
+        """(f1, f2, violação) da solução, sem cache."""
+        return (self.funcoes_objetivo.valor_agregada(solucao, 'f1'),
+                self.funcoes_objetivo.calcular_f2_agregada(solucao),
+                self.funcoes_objetivo.violacao_agregada(solucao))
+    
+    def _valor(self, solucao: SolucaoAgregada, funcao_objetivo: str) -> float:
+        """f1 ou f2 da solução."""
+        return self.funcoes_objetivo.valor_agregada(solucao, funcao_objetivo)
+    
+    def _vizinhancas(self, funcao_objetivo: str) -> Tuple[List, List[str]]:
+        """Vizinhanças do VND, em ordem, e seus nomes (CONSOLIDATE só para f2)."""
+        vizinhancas = [self.task_move, self.swap_ativos_bases, self.two_opt_equipes]
+        nomes = ['TaskMove', 'Swap', 'TwoOpt']
+        if funcao_objetivo == 'f2':
+            vizinhancas.append(self.consolidate_equipes)
+            nomes.append('Consolidate')
+        return vizinhancas, nomes
+    
+    def _bases_com_equipes(self, solucao: SolucaoAgregada) -> np.ndarray:
+        """Máscara (m_bases) das bases com pelo menos uma equipe."""
+        return solucao.equipes_base > 0
+    
+    def _viabilidade(self, solucao: SolucaoAgregada) -> Tuple[np.ndarray, int]:
+        """Bases viáveis (máscara) e número de bases inviáveis."""
+        viaveis = self.funcoes_objetivo.bases_viaveis(solucao.carga_base, solucao.equipes_base)
+        return viaveis, int(np.count_nonzero(~viaveis))
+    
+    def _aplicar(self, solucao: SolucaoAgregada, funcao_objetivo: str, movimento) -> Tuple[SolucaoAgregada, float, bool]:
+        """Aplica o movimento numa cópia e devolve (vizinho, valor, True)."""
+        vizinho = solucao.copiar()
+        movimento(vizinho)
+        return vizinho, self._valor(vizinho, funcao_objetivo), True
+    
+    def task_move(self, solucao: SolucaoAgregada, funcao_objetivo: str) -> Tuple[SolucaoAgregada, float, bool]:
+        """TASK MOVE: Move um ativo para outra base com equipe (best improvement sobre todas)."""
+        valor_atual = self._valor(solucao, funcao_objetivo)
+        # Entre soluções viáveis, mover ativos não muda o número de equipes usadas
+        if funcao_objetivo == 'f2':
+            return solucao, valor_atual, False
+        
+        bases = np.flatnonzero(self._bases_com_equipes(solucao) & self.candidatos.bases_ativas)
+        ativos = np.flatnonzero(solucao.base_ativo >= 0)
+        if len(bases) < 2 or len(ativos) == 0:
+            return solucao, valor_atual, False
+        
+        # Viabilidade de cada base hoje, ao perder e ao ganhar um ativo
+        viaveis, inviaveis = self._viabilidade(solucao)
+        perde = self.funcoes_objetivo.bases_viaveis(solucao.carga_base - 1, solucao.equipes_base)
+        ganha = self.funcoes_objetivo.bases_viaveis(solucao.carga_base + 1, solucao.equipes_base)
+        
+        melhor_delta, melhor = 0.0, None
+        tamanho_bloco = max(1, TAMANHO_LOTE_AVALIACAO // len(bases))
+        for inicio in range(0, len(ativos), tamanho_bloco):
+            bloco = ativos[inicio:inicio + tamanho_bloco]
+            origem = solucao.base_ativo[bloco]
+            distancias = np.asarray(self.distancias[bloco][:, bases], dtype=np.float64)
+            custo_atual = np.asarray(self.distancias[bloco, origem], dtype=np.float64)
+            delta = distancias - custo_atual[:, None]
+            
+            # Vizinho viável: as demais bases já viáveis e origem e destino viáveis depois do movimento
+            restantes = inviaveis - (~viaveis[origem])[:, None] - (~viaveis[bases])[None, :]
+            validos = ((restantes == 0) & perde[origem][:, None] & ganha[bases][None, :] &
+                       (bases[None, :] != origem[:, None]) &
+                       (distancias <= self.candidatos.limite[bloco][:, None]))
+            delta = np.where(validos, delta, np.inf)
+            
+            posicao = np.unravel_index(np.argmin(delta), delta.shape)
+            if delta[posicao] < melhor_delta:
+                melhor_delta = delta[posicao]
+                melhor = (int(bloco[posicao[0]]), int(bases[posicao[1]]))
+        
+        if melhor is None:
+            return solucao, valor_atual, False
+        return self._aplicar(solucao, funcao_objetivo, lambda sol: sol.mover_ativo(*melhor))
+    
+    def swap_ativos_bases(self, solucao: SolucaoAgregada, funcao_objetivo: str) -> Tuple[SolucaoAgregada, float, bool]:
+        """SWAP: Troca as bases de dois ativos (best improvement, varredura exaustiva)."""
+        valor_atual = self._valor(solucao, funcao_objetivo)
+        
+        # A troca não muda as cargas: só melhora f1, e só se a solução já é viável
+        _, inviaveis = self._viabilidade(solucao)
+        if funcao_objetivo == 'f2' or inviaveis > 0:
+            return solucao, valor_atual, False
+        
+        troca = self._melhor_troca(solucao)
+        if troca is None:
+            return solucao, valor_atual, False
+        
+        _, a, b = troca
+        j_a, j_b = int(solucao.base_ativo[a]), int(solucao.base_ativo[b])
+        
+        def trocar(sol):
+            sol.mover_ativo(a, j_b)
+            sol.mover_ativo(b, j_a)
+        
+        return self._aplicar(solucao, funcao_objetivo, trocar)
+    
+    def two_opt_equipes(self, solucao: SolucaoAgregada, funcao_objetivo: str) -> Tuple[SolucaoAgregada, float, bool]:
+        """
+        TWO-OPT: Leva uma equipe para uma base vazia com a sua parte dos ativos da base de origem
+        (todos, se era a única equipe; senão os L // c que mais ganham com a mudança).
+        """
+        valor_atual = self._valor(solucao, funcao_objetivo)
+        if funcao_objetivo == 'f2':
+            return solucao, valor_atual, False
+        
+        abertas = self._bases_com_equipes(solucao)
+        vazias = np.flatnonzero(~abertas & self.candidatos.bases_ativas)
+        if len(vazias) == 0:
+            return solucao, valor_atual, False
+        viaveis, inviaveis = self._viabilidade(solucao)
+        
+        melhor_delta, melhor = 0.0, None
+        for j in np.flatnonzero(abertas):
+            carga, equipes = int(solucao.carga_base[j]), int(solucao.equipes_base[j])
+            levados = carga if equipes == 1 else carga // equipes
+            if levados == 0:
+                continue
+            # Vizinho viável: origem e destino viáveis depois e as demais bases já viáveis
+            restantes = inviaveis - (not viaveis[j])
+            if restantes > 0 or not self.funcoes_objetivo.bases_viaveis(
+                    np.array([carga - levados, levados]), np.array([equipes - 1, 1])).all():
+                continue
+            
+            ativos = np.flatnonzero(solucao.base_ativo == j)
+            delta = (np.asarray(self.distancias[ativos][:, vazias], dtype=np.float64) -
+                     np.asarray(self.distancias[ativos, j], dtype=np.float64)[:, None])
+            if levados < carga:
+                delta = np.partition(delta, levados - 1, axis=0)[:levados]
+            ganhos = np.sum(delta, axis=0)
+            v = int(np.argmin(ganhos))
+            if ganhos[v] < melhor_delta:
+                melhor_delta = ganhos[v]
+                melhor = (j, int(vazias[v]), levados)
+        
+        if melhor is None:
+            return solucao, valor_atual, False
+        j, destino, levados = melhor
+        ativos = np.flatnonzero(solucao.base_ativo == j)
+        delta = (np.asarray(self.distancias[ativos, destino], dtype=np.float64) -
+                 np.asarray(self.distancias[ativos, j], dtype=np.float64))
+        ativos = ativos[np.argsort(delta, kind='stable')[:levados]]
+        
+        def realocar(sol):
+            sol.mover_ativos(ativos, destino)
+            sol.alterar_equipes(j, sol.equipes_base[j] - 1)
+            sol.alterar_equipes(destino, 1)
+        
+        return self._aplicar(solucao, funcao_objetivo, realocar)
+    
+    def consolidate_equipes(self, solucao: SolucaoAgregada, funcao_objetivo: str) -> Tuple[SolucaoAgregada, float, bool]:
+        """
+        CONSOLIDATE: Retira uma equipe (para f2). Numa base com várias equipes os ativos ficam
+        (f1 não muda); a única equipe de uma base fecha a base e cada ativo vai para a base aberta
+        mais próxima. Fica com a retirada viável mais barata em f1.
+        """
+        valor_atual = self._valor(solucao, funcao_objetivo)
+        if funcao_objetivo != 'f2':
+            return solucao, valor_atual, False
+        
+        abertas = self._bases_com_equipes(solucao)
+        viaveis, inviaveis = self._viabilidade(solucao)
+        
+        melhor_delta, melhor = np.inf, None
+        for j in np.flatnonzero(abertas):
+            carga, equipes = int(solucao.carga_base[j]), int(solucao.equipes_base[j])
+            restantes = inviaveis - (not viaveis[j])
+            
+            if equipes > 1:
+                # Mesma base: as equipes restantes dividem os ativos
+                if restantes == 0 and 0.0 < melhor_delta and self.funcoes_objetivo.bases_viaveis(
+                        np.array([carga]), np.array([equipes - 1]))[0]:
+                    melhor_delta, melhor = 0.0, (j, None, None)
+                continue
+            
+            outras = np.flatnonzero(abertas)
+            outras = outras[outras != j]
+            if len(outras) == 0:
+                continue
+            ativos = np.flatnonzero(solucao.base_ativo == j)
+            distancias = np.asarray(self.distancias[ativos][:, outras], dtype=np.float64)
+            destinos = outras[np.argmin(distancias, axis=1)]
+            
+            # Viabilidade das bases que recebem os ativos
+            carga_nova = solucao.carga_base.copy()
+            carga_nova[j] = 0
+            np.add.at(carga_nova, destinos, 1)
+            equipes_nova = solucao.equipes_base.copy()
+            equipes_nova[j] = 0
+            if not self.funcoes_objetivo.bases_viaveis(carga_nova, equipes_nova).all():
+                continue
+            
+            delta = float(np.sum(np.min(distancias, axis=1)) -
+                          np.sum(np.asarray(self.distancias[ativos, j], dtype=np.float64)))
+            if delta < melhor_delta:
+                melhor_delta, melhor = delta, (j, ativos, destinos)
+        
+        if melhor is None:
+            return solucao, valor_atual, False
+        j, ativos, destinos = melhor
+        
+        def retirar(sol):
+            if ativos is not None:
+                for destino in np.unique(destinos):
+                    sol.mover_ativos(ativos[destinos == destino], int(destino))
+            sol.alterar_equipes(j, sol.equipes_base[j] - 1)
+        
+        return self._aplicar(solucao, funcao_objetivo, retirar)
+    
+    def _avaliar_candidatos(self, candidatos: List[SolucaoAgregada]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vetores de f1, f2 e violação das soluções, numa única avaliação em lote das Solucao
+        exportadas (para_solucao preserva f1, f2 e a violação da divisão balanceada).
+        """
+        minimo_ativos = self.eta * self.n_ativos / self.s_equipes
+        return self.funcoes_objetivo.avaliar_solucoes([candidato.para_solucao(self.s_equipes, minimo_ativos)
+                                                       for candidato in candidatos])
+    
+    def _perturbar(self, solucao: SolucaoAgregada, intensidade: float) -> SolucaoAgregada:
+        """Uma perturbação do shake: ativos sorteados vão para bases próximas (ou aleatórias)."""
+        sol_shake = solucao.copiar()
+        
+        # Calcula numero de perturbacoes baseado na intensidade
+        n_perturbacoes = max(5, int(self.n_ativos * intensidade * 0.15))
+        n_perturbacoes = min(n_perturbacoes, self.n_ativos // 3)
+        
+        ativos_perturbar = np.random.choice(self.n_ativos, n_perturbacoes, replace=False)
+        
+        # Bases com equipes (o shake nao abre nem fecha bases)
+        bases_com_equipes = self._bases_com_equipes(sol_shake)
+        bases_validas = np.flatnonzero(bases_com_equipes)
+        
+        for i in ativos_perturbar:
+            base_atual = sol_shake.base_ativo[i]
+            outras_bases = bases_validas[bases_validas != base_atual]
+            
+            if len(outras_bases) > 0:
+                # 70% chance de escolher base proxima, 30% aleatoria (ou se a poda nao deixou base proxima)
+                bases_proximas = []
+                if np.random.random() < 0.7:
+                    bases_proximas = self.candidatos.mais_proximas(i, bases_com_equipes, 3, excluir=base_atual)
+                if len(bases_proximas) > 0:
+                    nova_base = np.random.choice(bases_proximas)
+                else:
+                    nova_base = np.random.choice(outras_bases)
+                sol_shake.mover_ativo(i, nova_base)
+        
+        return sol_shake
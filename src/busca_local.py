@@ -1,5 +1,24 @@
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+try:
+    from .solucao import Solucao, CacheAvaliacoes
+except ImportError:
+    # Para execução direta do arquivo
+    from solucao import Solucao, CacheAvaliacoes
+
+# Soluções guardadas no cache de avaliações do tournament_selection
+CAPACIDADE_CACHE_AVALIACOES = 4096
+
+# Movimentos sem equipe em comum aplicados de uma vez pelo TASK MOVE e pelo TWO-OPT (1: best improvement)
+MOVIMENTOS_TASK_MOVE = 1
+MOVIMENTOS_TWO_OPT = 1
+
+# Posições (ativos x bases) avaliadas por bloco nas varreduras vetorizadas das vizinhanças
+TAMANHO_LOTE_AVALIACAO = 1 << 20
+
+# Soluções perturbadas sorteadas por shake e avaliadas em lote; a melhor segue para o VND (1: sem lote)
+CANDIDATOS_SHAKE = 4
 
 class BuscaLocal:
     # Classe que implementa as estruturas de vizinhanca e busca local para melhorar solucoes
@@ -12,34 +31,31 @@ class BuscaLocal:
         self.s_equipes = monitoramento.s_equipes
         self.eta = monitoramento.eta
         self.distancias = monitoramento.distancias
+        self.candidatos = monitoramento.candidatos
         self.funcoes_objetivo = monitoramento.funcoes_objetivo
+        # Avaliações (f1, f2, violação) por impressão digital da solução
+        self.cache_avaliacoes = CacheAvaliacoes(CAPACIDADE_CACHE_AVALIACOES)
+        # Movimentos por passada do TASK MOVE e do TWO-OPT (ver task_move e two_opt_equipes)
+        self.movimentos_task_move = MOVIMENTOS_TASK_MOVE
+        self.movimentos_two_opt = MOVIMENTOS_TWO_OPT
+        # Perturbações sorteadas por shake (ver shake_adaptativo)
+        self.candidatos_shake = CANDIDATOS_SHAKE
     
-    def tournament_selection(self, x: Tuple, y: Tuple, funcao_objetivo: str) -> Tuple[Tuple, bool]:
+    def tournament_selection(self, x: Solucao, y: Solucao, funcao_objetivo: str) -> Tuple[Solucao, bool]:
         """
         Tournament Selection para comparar duas soluções usando constraint handling.
         
         Args:
-            x: Tupla (x_ij, y_jk, h_ik) da solução atual
-            y: Tupla (x_ij, y_jk, h_ik) da solução candidata
+            x: Solução atual
+            y: Solução candidata
             funcao_objetivo: 'f1' ou 'f2'
-            
+        
         Returns:
             Tupla com (solução escolhida, True se y foi aceita)
         """
-        x_ij, y_jk, h_ik = x
-        y_x_ij, y_y_jk, y_h_ik = y
-        
-        # Calcula valores objetivo
-        if funcao_objetivo == 'f1':
-            fx = self.funcoes_objetivo.calcular_f1(x_ij, h_ik, y_jk)
-            fy = self.funcoes_objetivo.calcular_f1(y_x_ij, y_h_ik, y_y_jk)
-        else:
-            fx = self.funcoes_objetivo.calcular_f2(h_ik, y_jk)
-            fy = self.funcoes_objetivo.calcular_f2(y_h_ik, y_y_jk)
-        
-        # Calcula violações
-        vx = self.funcoes_objetivo.calcular_violacao(x_ij, y_jk, h_ik)
-        vy = self.funcoes_objetivo.calcular_violacao(y_x_ij, y_y_jk, y_h_ik)
+        # Valores objetivo e violações (soluções já vistas saem do cache)
+        fx, vx = self._avaliar(x, funcao_objetivo)
+        fy, vy = self._avaliar(y, funcao_objetivo)
         
         # Tournament Selection
         # 1. Se ambas viáveis, escolhe a de melhor objetivo
@@ -63,300 +79,483 @@ class BuscaLocal:
         else:
             return x, False
     
-    def shift_ativo_equipe(self, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray, 
-                          funcao_objetivo: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float, bool]:
-        """SHIFT: Move um ativo para outra equipe da mesma base (best improvement)."""
-        melhor_x, melhor_y, melhor_h = x_ij.copy(), y_jk.copy(), h_ik.copy()
+    def _avaliar(self, solucao: Solucao, funcao_objetivo: str) -> Tuple[float, float]:
+        """(valor objetivo, violação) da solução, consultando o cache de avaliações."""
+        valores = self.cache_avaliacoes.buscar(solucao.impressao)
+        if valores is None:
+            valores = self._calcular_valores(solucao)
+            self.cache_avaliacoes.guardar(solucao.impressao, valores)
+        elif solucao.f1 is None:
+            solucao.f1 = valores[0]
+        
+        f1, f2, violacao = valores
+        return (f1 if funcao_objetivo == 'f1' else f2), violacao
+    
+    def _calcular_valores(self, solucao: Solucao) -> Tuple[float, float, float]:
+        """(f1, f2, violação) da solução, sem cache."""
+        return (self.funcoes_objetivo.valor_solucao(solucao, 'f1'),
+                self.funcoes_objetivo.calcular_f2_solucao(solucao),
+                self.funcoes_objetivo.violacao_solucao(solucao))
+    
+    def _valor(self, solucao: Solucao, funcao_objetivo: str) -> float:
+        """f1 ou f2 da solução."""
+        return self.funcoes_objetivo.valor_solucao(solucao, funcao_objetivo)
+    
+    def _vizinhancas(self, funcao_objetivo: str) -> Tuple[List, List[str]]:
+        """Vizinhanças do VND, em ordem, e seus nomes (CONSOLIDATE só para f2)."""
+        vizinhancas = [self.shift_ativo_equipe, self.task_move, self.swap_ativos_bases, self.two_opt_equipes]
+        nomes = ['Shift', 'TaskMove', 'Swap', 'TwoOpt']
+        if funcao_objetivo == 'f2':
+            vizinhancas.append(self.consolidate_equipes)
+            nomes.append('Consolidate')
+        return vizinhancas, nomes
+    
+    def _pode_mover(self, solucao: Solucao, viaveis: np.ndarray, inviaveis: int, k_antiga: int, k: int) -> bool:
+        """
+        True se passar um ativo da equipe k_antiga para k dá um vizinho viável, consultando só as
+        cargas (O(1)): as demais equipes já viáveis e as duas equipes viáveis depois do movimento.
+        """
+        if k_antiga < 0:
+            return inviaveis - (not viaveis[k]) == 0 and solucao.pode_ganhar(k)
+        return (inviaveis - (not viaveis[k_antiga]) - (not viaveis[k]) == 0 and
+                solucao.pode_perder(k_antiga) and solucao.pode_ganhar(k))
+    
+    def _bases_com_equipes(self, solucao: Solucao) -> np.ndarray:
+        """Máscara (m_bases) das bases com pelo menos uma equipe."""
+        abertas = np.zeros(self.m_bases, dtype=bool)
+        abertas[solucao.base_equipe[solucao.base_equipe >= 0]] = True
+        return abertas
+    
+    def _avaliar_movimento(self, solucao: Solucao, movimento: Tuple, viaveis: np.ndarray,
+                           inviaveis: int) -> Optional[Tuple[float, float]]:
+        """
+        (delta_f1, delta_f2) do movimento, ou None se o vizinho viola alguma restrição. Calculado
+        sobre a solução sem alterá-la: deltas da FuncoesObjetivo e viabilidade pelas cargas.
         
-        if funcao_objetivo == 'f1':
-            melhor_valor = self.funcoes_objetivo.calcular_f1(x_ij, h_ik, y_jk)
+        Args:
+            movimento: Descritor ('ativo', i, k), ('troca', i, k_i, j, k_j) ou ('equipe', k, j, ativos)
+            viaveis: solucao.equipes_viaveis()
+            inviaveis: Número de equipes inviáveis
+        """
+        tipo = movimento[0]
+        if tipo == 'ativo':
+            _, i, k = movimento
+            if not self._pode_mover(solucao, viaveis, inviaveis, solucao.equipe_ativo[i], k):
+                return None
+            delta_f1, delta_f2, _ = self.funcoes_objetivo.delta_mover_ativo(solucao, i, k)
+            return delta_f1, delta_f2
+        
+        if tipo == 'troca':
+            # Variação de carga de cada equipe envolvida (as equipes podem coincidir)
+            _, i, k_i, j, k_j = movimento
+            variacao = {}
+            for k, v in ((solucao.equipe_ativo[i], -1), (k_i, 1), (solucao.equipe_ativo[j], -1), (k_j, 1)):
+                variacao[int(k)] = variacao.get(int(k), 0) + v
+            if inviaveis - sum(not viaveis[k] for k in variacao) > 0:
+                return None
+            delta_f2 = 0.0
+            for k, v in variacao.items():
+                carga = int(solucao.carga_equipe[k])
+                if not solucao._equipe_viavel(carga + v, solucao.base_equipe[k] >= 0):
+                    return None
+                delta_f2 += (carga + v > 0) - (carga > 0)
+            delta_f1 = (self.funcoes_objetivo._distancia_equipe(solucao, i, k_i) +
+                        self.funcoes_objetivo._distancia_equipe(solucao, j, k_j) -
+                        self.funcoes_objetivo._distancia_equipe(solucao, i, solucao.equipe_ativo[i]) -
+                        self.funcoes_objetivo._distancia_equipe(solucao, j, solucao.equipe_ativo[j]))
+            return delta_f1, delta_f2
+        
+        if tipo == 'equipe':
+            # As cargas não mudam e a equipe continua alocada
+            _, k, j, ativos = movimento
+            if inviaveis > 0:
+                return None
+            delta_f1, delta_f2, _ = self.funcoes_objetivo.delta_realocar_equipe(solucao, k, j, ativos)
+            return delta_f1, delta_f2
+        
+        raise ValueError(f"movimento desconhecido: {tipo!r}")
+    
+    def _aplicar_movimento(self, solucao: Solucao, movimento: Tuple):
+        """Aplica o movimento descrito (ver _avaliar_movimento) na própria solução."""
+        tipo = movimento[0]
+        if tipo == 'ativo':
+            solucao.mover_ativo(movimento[1], movimento[2])
+        elif tipo == 'troca':
+            solucao.mover_ativo(movimento[1], movimento[2])
+            solucao.mover_ativo(movimento[3], movimento[4])
+        elif tipo == 'equipe':
+            solucao.realocar_equipe(movimento[1], movimento[2], movimento[3])
         else:
-            melhor_valor = self.funcoes_objetivo.calcular_f2(h_ik, y_jk)
-        
-        melhorou = False
-        
+            raise ValueError(f"movimento desconhecido: {tipo!r}")
+    
+    def _aceitar_movimento(self, solucao: Solucao, movimentos, funcao_objetivo: str) -> Tuple[Solucao, float, bool]:
+        """Única cópia da vizinhança: a solução com o(s) movimento(s) escolhido(s) (f1 recalculado)."""
+        vizinho = solucao.copiar()
+        for movimento in (movimentos if isinstance(movimentos, list) else [movimentos]):
+            self._aplicar_movimento(vizinho, movimento)
+        return vizinho, self._valor(vizinho, funcao_objetivo), True
+    
+    def _melhor_movimento(self, solucao: Solucao, movimentos, funcao_objetivo: str) -> Tuple[Solucao, float, bool]:
+        """
+        Best improvement sobre os movimentos gerados, avaliados por delta sem copiar a solução.
+        Só o primeiro movimento viável de maior ganho fica guardado; a cópia é feita no fim.
+        """
+        # Em vez de aplicar e desfazer cada movimento na própria solução, o ganho vem direto dos
+        # deltas (_avaliar_movimento): a solução não é alterada e nada precisa ser desfeito
+        valor_atual = self._valor(solucao, funcao_objetivo)
+        viaveis = solucao.equipes_viaveis()
+        inviaveis = int(np.count_nonzero(~viaveis))
+        objetivo = 0 if funcao_objetivo == 'f1' else 1
+        
+        melhor_delta, melhor = 0.0, None
+        for movimento in movimentos:
+            deltas = self._avaliar_movimento(solucao, movimento, viaveis, inviaveis)
+            if deltas is not None and deltas[objetivo] < melhor_delta:
+                melhor_delta, melhor = deltas[objetivo], movimento
+        
+        if melhor is None:
+            return solucao, valor_atual, False
+        return self._aceitar_movimento(solucao, melhor, funcao_objetivo)
+    
+    def shift_ativo_equipe(self, solucao: Solucao, funcao_objetivo: str) -> Tuple[Solucao, float, bool]:
+        """SHIFT: Move um ativo para outra equipe da mesma base (best improvement)."""
+        return self._melhor_movimento(solucao, self._movimentos_shift(solucao), funcao_objetivo)
+    
+    def _movimentos_shift(self, solucao: Solucao):
+        """Movimentos do SHIFT, um a um."""
         for i in range(self.n_ativos):
-            equipe_atual = np.where(h_ik[i, :] == 1)[0][0]
-            base_ativo = np.where(x_ij[i, :] == 1)[0][0]
+            equipe_atual = solucao.equipe_ativo[i]
+            base_ativo = solucao.base_ativo[i]
             
-            # Tenta mover para outras equipes da mesma base
-            equipes_base = np.where(y_jk[base_ativo, :] == 1)[0]
+            # Tenta mover para outras equipes da mesma base. Equipes vazias da mesma base são
+            # intercambiáveis: basta a primeira, e nenhuma se o ativo está sozinho (só renumeraria)
+            equipes_base = np.flatnonzero(solucao.base_equipe == base_ativo)
+            vazias = equipes_base[solucao.carga_equipe[equipes_base] == 0]
+            if len(vazias) > 0:
+                equipes_base = equipes_base[solucao.carga_equipe[equipes_base] > 0]
+                if equipe_atual < 0 or solucao.carga_equipe[equipe_atual] > 1:
+                    equipes_base = np.append(equipes_base, vazias[0])
             
             for k in equipes_base:
                 if k != equipe_atual:
-                    h_novo = h_ik.copy()
-                    h_novo[i, equipe_atual] = 0
-                    h_novo[i, k] = 1
-                    
-                    if self.funcoes_objetivo.verificar_restricoes(x_ij, y_jk, h_novo):
-                        if funcao_objetivo == 'f1':
-                            valor = self.funcoes_objetivo.calcular_f1(x_ij, h_novo, y_jk)
-                        else:
-                            valor = self.funcoes_objetivo.calcular_f2(h_novo, y_jk)
-                        
-                        if valor < melhor_valor:
-                            melhor_x, melhor_y, melhor_h = x_ij.copy(), y_jk.copy(), h_novo.copy()
-                            melhor_valor = valor
-                            melhorou = True
-        
-        return melhor_x, melhor_y, melhor_h, melhor_valor, melhorou
+                    yield ('ativo', i, int(k))
     
+    def task_move(self, solucao: Solucao, funcao_objetivo: str,
+                  k_movimentos: Optional[int] = None) -> Tuple[Solucao, float, bool]:
+        """
+        TASK MOVE: Move ativo para outra base com equipe, na equipe menos carregada dela. Todos os
+        pares (ativo, base aberta) são avaliados de uma vez pela matriz de deltas; aplica o melhor
+        movimento, ou os k_movimentos melhores sem equipe em comum (padrão: movimentos_task_move).
+        """
+        if k_movimentos is None:
+            k_movimentos = self.movimentos_task_move
+        valor_atual = self._valor(solucao, funcao_objetivo)
+        movimentos = self._melhores_task_move(solucao, funcao_objetivo, k_movimentos)
+        if len(movimentos) == 0:
+            return solucao, valor_atual, False
+        return self._aceitar_movimento(solucao, movimentos, funcao_objetivo)
     
-    def task_move(self, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray,
-                 funcao_objetivo: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float, bool]:
-        """TASK MOVE: Move ativo para base mais proxima com equipe (best improvement)."""
-        melhor_x, melhor_y, melhor_h = x_ij.copy(), y_jk.copy(), h_ik.copy()
-        
+    def _limite_pares(self, funcao_objetivo: str) -> np.ndarray:
+        """
+        Limite de distância por ativo dos pares do grafo reduzido. A poda de pares é calculada
+        para f1 (ver PreProcessamento.podar) e não prova nada para f2, então só vale em f1.
+        """
         if funcao_objetivo == 'f1':
-            melhor_valor = self.funcoes_objetivo.calcular_f1(x_ij, h_ik, y_jk)
-        else:
-            melhor_valor = self.funcoes_objetivo.calcular_f2(h_ik, y_jk)
-        
-        melhorou = False
-        
-        # Para cada ativo, tenta mover para as 3 bases mais proximas
-        for i in range(self.n_ativos):
-            base_atual = np.where(x_ij[i, :] == 1)[0][0]
-            
-            # Bases com equipes ordenadas por distancia
-            bases_com_equipes = np.where(np.sum(y_jk, axis=1) > 0)[0]
-            if len(bases_com_equipes) > 1:
-                distancias_bases = self.distancias[i, bases_com_equipes]
-                indices_ordenados = np.argsort(distancias_bases)
-                bases_proximas = bases_com_equipes[indices_ordenados[:min(3, len(bases_com_equipes))]]
-                
-                for j in bases_proximas:
-                    if j != base_atual:
-                        x_novo = x_ij.copy()
-                        h_novo = h_ik.copy()
-                        
-                        # Move ativo para nova base
-                        x_novo[i, base_atual] = 0
-                        x_novo[i, j] = 1
-                        
-                        # Atualiza equipe
-                        equipe_antiga = np.where(h_ik[i, :] == 1)[0][0]
-                        h_novo[i, equipe_antiga] = 0
-                        
-                        # Escolhe equipe da nova base com menos ativos
-                        equipes_nova_base = np.where(y_jk[j, :] == 1)[0]
-                        if len(equipes_nova_base) > 0:
-                            # Conta ativos por equipe
-                            ativos_por_equipe = np.sum(h_ik, axis=0)
-                            equipe_menos_carregada = equipes_nova_base[np.argmin(ativos_por_equipe[equipes_nova_base])]
-                            h_novo[i, equipe_menos_carregada] = 1
-                            
-                            if self.funcoes_objetivo.verificar_restricoes(x_novo, y_jk, h_novo):
-                                if funcao_objetivo == 'f1':
-                                    valor = self.funcoes_objetivo.calcular_f1(x_novo, h_novo, y_jk)
-                                else:
-                                    valor = self.funcoes_objetivo.calcular_f2(h_novo, y_jk)
-                                
-                                if valor < melhor_valor:
-                                    melhor_x, melhor_y, melhor_h = x_novo.copy(), y_jk.copy(), h_novo.copy()
-                                    melhor_valor = valor
-                                    melhorou = True
-        
-        return melhor_x, melhor_y, melhor_h, melhor_valor, melhorou
+            return self.candidatos.limite
+        return np.full(self.n_ativos, np.inf)
     
-    def swap_ativos_bases(self, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray,
-                         funcao_objetivo: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float, bool]:
-        """SWAP: Troca ativos entre duas bases diferentes (best improvement)."""
-        melhor_x, melhor_y, melhor_h = x_ij.copy(), y_jk.copy(), h_ik.copy()
-        
-        if funcao_objetivo == 'f1':
-            melhor_valor = self.funcoes_objetivo.calcular_f1(x_ij, h_ik, y_jk)
-        else:
-            melhor_valor = self.funcoes_objetivo.calcular_f2(h_ik, y_jk)
-        
-        melhorou = False
-        
-        # Testa trocar ativos entre bases diferentes
-        ativos_sample = np.random.choice(self.n_ativos, min(20, self.n_ativos), replace=False)
-        
-        for i in ativos_sample:
-            base_i = np.where(x_ij[i, :] == 1)[0][0]
-            equipe_i = np.where(h_ik[i, :] == 1)[0][0]
+    def _equipes_menos_carregadas(self, solucao: Solucao) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Primeira e segunda equipes menos carregadas de cada base (a de menor índice no empate),
+        -1 onde a base não tem equipes suficientes.
+        """
+        equipes = np.flatnonzero(solucao.base_equipe >= 0)
+        ordem = equipes[np.lexsort((equipes, solucao.carga_equipe[equipes], solucao.base_equipe[equipes]))]
+        bases_ordem = solucao.base_equipe[ordem]
+        inicio_base = np.concatenate(([True], bases_ordem[1:] != bases_ordem[:-1]))
+        primeira = np.full(self.m_bases, -1, dtype=np.int64)
+        primeira[bases_ordem[inicio_base]] = ordem[inicio_base]
+        
+        # A segunda vem logo depois da primeira, se for da mesma base
+        segunda = np.full(self.m_bases, -1, dtype=np.int64)
+        proxima = np.flatnonzero(inicio_base[:-1] & ~inicio_base[1:])
+        segunda[bases_ordem[proxima]] = ordem[proxima + 1]
+        return primeira, segunda
+    
+    def _melhores_task_move(self, solucao: Solucao, funcao_objetivo: str, k_movimentos: int) -> List[Tuple]:
+        """
+        Até k_movimentos movimentos ('ativo', i, k) do TASK MOVE que melhoram a solução, em ordem de
+        ganho, sem duas vezes o mesmo ativo ou a mesma equipe (os deltas continuam valendo juntos).
+        """
+        bases = np.flatnonzero(self._bases_com_equipes(solucao) & self.candidatos.bases_ativas)
+        ativos = np.flatnonzero(solucao.equipe_ativo >= 0)
+        if len(bases) < 2 or len(ativos) == 0:
+            return []
+        
+        # Equipe menos carregada de cada base aberta
+        destinos = self._equipes_menos_carregadas(solucao)[0][bases]
+        
+        # Viabilidade pelas cargas: hoje, ao perder e ao ganhar um ativo
+        viaveis = solucao.equipes_viaveis()
+        inviaveis = int(np.count_nonzero(~viaveis))
+        perde = solucao.equipes_viaveis(-1)
+        ganha = solucao.equipes_viaveis(1)
+        ganho_f2 = (solucao.carga_equipe[destinos] == 0).astype(np.float64)
+        limite = self._limite_pares(funcao_objetivo)
+        
+        # Melhor base de cada ativo, em blocos de linhas da matriz de deltas
+        candidatos = []
+        tamanho_bloco = max(1, TAMANHO_LOTE_AVALIACAO // len(bases))
+        for inicio in range(0, len(ativos), tamanho_bloco):
+            bloco = ativos[inicio:inicio + tamanho_bloco]
+            origem = solucao.base_ativo[bloco]
+            equipe_origem = solucao.equipe_ativo[bloco]
+            distancias = np.asarray(self.distancias[bloco][:, bases], dtype=np.float64)
             
-            for j in range(i+1, self.n_ativos):
-                base_j = np.where(x_ij[j, :] == 1)[0][0]
-                equipe_j = np.where(h_ik[j, :] == 1)[0][0]
-                
-                if base_i != base_j:
-                    x_novo = x_ij.copy()
-                    h_novo = h_ik.copy()
-                    
-                    # Troca as bases dos ativos
-                    x_novo[i, base_i] = 0
-                    x_novo[i, base_j] = 1
-                    x_novo[j, base_j] = 0
-                    x_novo[j, base_i] = 1
-                    
-                    # Atualiza equipes
-                    h_novo[i, equipe_i] = 0
-                    h_novo[j, equipe_j] = 0
-                    
-                    # Atribui a equipes das novas bases
-                    equipes_base_j = np.where(y_jk[base_j, :] == 1)[0]
-                    equipes_base_i = np.where(y_jk[base_i, :] == 1)[0]
-                    
-                    if len(equipes_base_j) > 0 and len(equipes_base_i) > 0:
-                        h_novo[i, equipes_base_j[0]] = 1
-                        h_novo[j, equipes_base_i[0]] = 1
-                        
-                        if self.funcoes_objetivo.verificar_restricoes(x_novo, y_jk, h_novo):
-                            if funcao_objetivo == 'f1':
-                                valor = self.funcoes_objetivo.calcular_f1(x_novo, h_novo, y_jk)
-                            else:
-                                valor = self.funcoes_objetivo.calcular_f2(h_novo, y_jk)
-                            
-                            if valor < melhor_valor:
-                                melhor_x, melhor_y, melhor_h = x_novo.copy(), y_jk.copy(), h_novo.copy()
-                                melhor_valor = valor
-                                melhorou = True
-        
-        return melhor_x, melhor_y, melhor_h, melhor_valor, melhorou
+            if funcao_objetivo == 'f1':
+                delta = distancias - np.asarray(self.distancias[bloco, origem], dtype=np.float64)[:, None]
+            else:
+                delta = ganho_f2[None, :] - (solucao.carga_equipe[equipe_origem] == 1)[:, None]
+            
+            # Vizinho viável: as demais equipes já viáveis e as duas equipes viáveis depois do movimento
+            restantes = inviaveis - (~viaveis[equipe_origem])[:, None] - (~viaveis[destinos])[None, :]
+            validos = ((restantes == 0) & perde[equipe_origem][:, None] & ganha[destinos][None, :] &
+                       (bases[None, :] != origem[:, None]) &
+                       (distancias <= limite[bloco][:, None]))
+            delta = np.where(validos, delta, np.inf)
+            
+            coluna = np.argmin(delta, axis=1)
+            melhor = delta[np.arange(len(bloco)), coluna]
+            melhoram = np.flatnonzero(melhor < 0)
+            candidatos.extend(zip(melhor[melhoram].tolist(), bloco[melhoram].tolist(),
+                                  destinos[coluna[melhoram]].tolist()))
+        
+        # Maiores ganhos primeiro (empates na ordem dos ativos), sem equipe repetida
+        candidatos.sort(key=lambda candidato: candidato[0])
+        movimentos, usadas = [], set()
+        for _, i, k in candidatos:
+            k_antiga = int(solucao.equipe_ativo[i])
+            if k_antiga in usadas or k in usadas:
+                continue
+            movimentos.append(('ativo', i, k))
+            usadas.update((k_antiga, k))
+            if len(movimentos) == k_movimentos:
+                break
+        return movimentos
     
-    def two_opt_equipes(self, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray,
-                       funcao_objetivo: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float, bool]:
-        """TWO-OPT: Move equipe inteira para base vazia se melhora (best improvement)."""
-        melhor_x, melhor_y, melhor_h = x_ij.copy(), y_jk.copy(), h_ik.copy()
-        
-        if funcao_objetivo == 'f1':
-            melhor_valor = self.funcoes_objetivo.calcular_f1(x_ij, h_ik, y_jk)
-        else:
-            melhor_valor = self.funcoes_objetivo.calcular_f2(h_ik, y_jk)
+    def swap_ativos_bases(self, solucao: Solucao, funcao_objetivo: str) -> Tuple[Solucao, float, bool]:
+        """
+        SWAP: Troca dois ativos de bases diferentes, cada um entrando na equipe do outro (best
+        improvement). As cargas não mudam, então só melhora f1 e só de uma solução viável.
+        """
+        valor_atual = self._valor(solucao, funcao_objetivo)
+        if funcao_objetivo == 'f2' or not solucao.equipes_viaveis().all():
+            return solucao, valor_atual, False
+        
+        troca = self._melhor_troca(solucao)
+        if troca is None:
+            return solucao, valor_atual, False
+        _, a, b = troca
+        k_a, k_b = int(solucao.equipe_ativo[a]), int(solucao.equipe_ativo[b])
+        return self._aceitar_movimento(solucao, ('troca', a, k_b, b, k_a), funcao_objetivo)
+    
+    def _melhor_troca(self, solucao, ativos: Optional[np.ndarray] = None) -> Optional[Tuple[float, int, int]]:
+        """
+        Melhor troca de bases entre dois ativos por varredura exaustiva da matriz de ganhos
+        d[a, base_b] + d[b, base_a] - d[a, base_a] - d[b, base_b] (núcleo melhor_troca do backend).
         
-        melhorou = False
+        Args:
+            solucao: Solução (só usa base_ativo e as bases com equipe)
+            ativos: Ativos a das linhas (padrão: todos); os pares são (a, b) com b > a
         
-        # Para cada equipe ativa, tenta mover para bases vazias
-        for k in range(self.s_equipes):
-            base_atual = np.where(y_jk[:, k] == 1)[0]
-            if len(base_atual) > 0:
-                base_atual = base_atual[0]
-                ativos_equipe = np.where(h_ik[:, k] == 1)[0]
-                
-                if len(ativos_equipe) > 0:
-                    # Tenta mover para bases vazias
-                    bases_vazias = np.where(np.sum(y_jk, axis=1) == 0)[0]
-                    
-                    for j in bases_vazias:
-                        y_novo = y_jk.copy()
-                        x_novo = x_ij.copy()
-                        
-                        # Move equipe para nova base
-                        y_novo[base_atual, k] = 0
-                        y_novo[j, k] = 1
-                        
-                        # Move todos os ativos da equipe para a nova base
-                        for ativo in ativos_equipe:
-                            x_novo[ativo, base_atual] = 0
-                            x_novo[ativo, j] = 1
-                        
-                        if self.funcoes_objetivo.verificar_restricoes(x_novo, y_novo, h_ik):
-                            if funcao_objetivo == 'f1':
-                                valor = self.funcoes_objetivo.calcular_f1(x_novo, h_ik, y_novo)
-                            else:
-                                valor = self.funcoes_objetivo.calcular_f2(h_ik, y_novo)
-                            
-                            if valor < melhor_valor:
-                                melhor_x, melhor_y, melhor_h = x_novo.copy(), y_novo.copy(), h_ik.copy()
-                                melhor_valor = valor
-                                melhorou = True
-        
-        return melhor_x, melhor_y, melhor_h, melhor_valor, melhorou
+        Returns:
+            (delta_f1, a, b) da primeira melhor troca na ordem (a, b), ou None se nenhuma melhora
+        """
+        base_ativo = solucao.base_ativo
+        abertas = self._bases_com_equipes(solucao) & self.candidatos.bases_ativas
+        limite = self.candidatos.limite
+        if ativos is None:
+            ativos = np.arange(self.n_ativos)
+        
+        # Ativos que podem trocar: alocados numa base aberta (e não podada)
+        trocaveis = np.zeros(self.n_ativos, dtype=bool)
+        alocados = np.flatnonzero(base_ativo >= 0)
+        trocaveis[alocados] = abertas[base_ativo[alocados]]
+        linhas = np.sort(np.asarray(ativos, dtype=np.int64))
+        linhas = linhas[trocaveis[linhas]]
+        if len(linhas) == 0:
+            return None
+        proprias = np.asarray(self.distancias[alocados, base_ativo[alocados]], dtype=np.float64)
+        distancia_propria = np.zeros(self.n_ativos)
+        distancia_propria[alocados] = proprias
+        
+        # Varredura dos pares pelo backend de núcleos (blocos NumPy ou laço compilado)
+        return self.funcoes_objetivo.nucleos.melhor_troca(self.distancias, base_ativo, linhas, trocaveis,
+                                                          distancia_propria, limite, TAMANHO_LOTE_AVALIACAO)
     
-    def consolidate_equipes(self, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray,
-                          funcao_objetivo: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float, bool]:
-        """CONSOLIDATE: Consolida ativos removendo equipes desnecessarias (para f2)."""
-        melhor_x, melhor_y, melhor_h = x_ij.copy(), y_jk.copy(), h_ik.copy()
-        
-        if funcao_objetivo == 'f1':
-            melhor_valor = self.funcoes_objetivo.calcular_f1(x_ij, h_ik, y_jk)
-        else:
-            melhor_valor = self.funcoes_objetivo.calcular_f2(h_ik, y_jk)
+    def two_opt_equipes(self, solucao: Solucao, funcao_objetivo: str,
+                        k_movimentos: Optional[int] = None) -> Tuple[Solucao, float, bool]:
+        """
+        TWO-OPT: Move equipe inteira para base vazia se melhora. A tabela de ganhos (equipe, base
+        vazia) sai de um produto matricial; aplica o melhor movimento, ou os k_movimentos melhores
+        sem equipe ou base em comum (padrão: movimentos_two_opt).
+        """
+        if k_movimentos is None:
+            k_movimentos = self.movimentos_two_opt
+        valor_atual = self._valor(solucao, funcao_objetivo)
+        
+        # As cargas não mudam: só melhora f1, e só se a solução já é viável
+        if funcao_objetivo == 'f2' or not solucao.equipes_viaveis().all():
+            return solucao, valor_atual, False
+        
+        movimentos = self._melhores_two_opt(solucao, k_movimentos)
+        if len(movimentos) == 0:
+            return solucao, valor_atual, False
+        return self._aceitar_movimento(solucao, movimentos, funcao_objetivo)
+    
+    def _somas_distancias_equipes(self, solucao: Solucao) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Matriz (equipes x bases) com a soma das distâncias dos ativos de cada equipe a cada base:
+        produto da indicadora de pertinência (equipes x ativos) pela matriz de distâncias, em blocos.
         
-        melhorou = False
+        Returns:
+            Tupla (somas, podados): podados[k, j] conta os ativos da equipe k cujo par com a base j
+            saiu do grafo reduzido (d > limite do ativo)
+        """
+        somas = np.zeros((self.s_equipes, self.m_bases))
+        podados = np.zeros((self.s_equipes, self.m_bases))
+        equipes = np.arange(self.s_equipes)
+        limite = self._limite_pares('f1')
+        tamanho_bloco = max(1, TAMANHO_LOTE_AVALIACAO // max(self.m_bases, self.s_equipes))
+        for inicio in range(0, self.n_ativos, tamanho_bloco):
+            fim = min(inicio + tamanho_bloco, self.n_ativos)
+            pertence = (solucao.equipe_ativo[None, inicio:fim] == equipes[:, None]).astype(np.float64)
+            distancias = np.asarray(self.distancias[inicio:fim], dtype=np.float64)
+            somas += pertence @ distancias
+            podados += pertence @ (distancias > limite[inicio:fim, None])
+        return somas, podados
+    
+    def _melhores_two_opt(self, solucao: Solucao, k_movimentos: int) -> List[Tuple]:
+        """
+        Até k_movimentos movimentos ('equipe', k, j, ativos) do TWO-OPT que melhoram f1, em ordem de
+        ganho, sem repetir equipe nem base de destino.
+        """
+        # Bases vazias (que nao foram podadas) e equipes com ativos
+        bases_vazias = np.flatnonzero(~self._bases_com_equipes(solucao) & self.candidatos.bases_ativas)
+        equipes = np.flatnonzero((solucao.base_equipe >= 0) & (solucao.carga_equipe > 0))
+        if len(bases_vazias) == 0 or len(equipes) == 0:
+            return []
+        
+        # Ganho de levar a equipe k para a base j: diferença entre duas colunas da tabela de somas
+        # (só bases permitidas pelo grafo reduzido a todos os ativos da equipe)
+        somas, podados = self._somas_distancias_equipes(solucao)
+        ganho = somas[np.ix_(equipes, bases_vazias)] - somas[equipes, solucao.base_equipe[equipes]][:, None]
+        ganho = np.where(podados[np.ix_(equipes, bases_vazias)] > 0, np.inf, ganho)
+        
+        # Maiores ganhos primeiro (empates na ordem equipe, base)
+        melhoram = np.flatnonzero(ganho.ravel() < 0)
+        melhoram = melhoram[np.argsort(ganho.ravel()[melhoram], kind='stable')]
+        movimentos, usadas, ocupadas = [], set(), set()
+        for p in melhoram.tolist():
+            linha, coluna = divmod(p, len(bases_vazias))
+            k, j = int(equipes[linha]), int(bases_vazias[coluna])
+            if k in usadas or j in ocupadas:
+                continue
+            movimentos.append(('equipe', k, j, np.flatnonzero(solucao.equipe_ativo == k)))
+            usadas.add(k)
+            ocupadas.add(j)
+            if len(movimentos) == k_movimentos:
+                break
+        return movimentos
+    
+    def consolidate_equipes(self, solucao: Solucao, funcao_objetivo: str) -> Tuple[Solucao, float, bool]:
+        """
+        CONSOLIDATE: Fecha a equipe cujo fechamento custa menos em f1 (para f2), com os ativos
+        redistribuídos pelas equipes abertas mais próximas (ver custos_fechar_equipes).
+        """
+        valor_atual = self._valor(solucao, funcao_objetivo)
         
         # Apenas para f2 - tenta remover equipes
-        if funcao_objetivo == 'f2':
-            ativos_por_equipe = np.sum(h_ik, axis=0)
-            equipes_ativas = np.where(ativos_por_equipe > 0)[0]
+        if funcao_objetivo != 'f2' or np.count_nonzero(solucao.carga_equipe > 0) < 2:
+            return solucao, valor_atual, False
+        
+        custos, destinos = self.custos_fechar_equipes(solucao)
+        k = int(np.argmin(custos))
+        if not np.isfinite(custos[k]):
+            return solucao, valor_atual, False
+        
+        # Cada ativo para a sua equipe de destino e a equipe sai da base
+        ativos = np.flatnonzero(solucao.equipe_ativo == k)
+        movimentos = [('ativo', int(i), int(destinos[i])) for i in ativos]
+        movimentos.append(('equipe', k, -1, np.zeros(0, dtype=np.int64)))
+        return self._aceitar_movimento(solucao, movimentos, funcao_objetivo)
+    
+    def custos_fechar_equipes(self, solucao: Solucao) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Custo em f1 de fechar cada equipe (f2 cai 1), todas de uma vez: cada ativo da equipe vai
+        para a base aberta mais próxima com outra equipe, na equipe menos carregada dela (sem o
+        limite de pares da poda, que só vale para f1). Como as demais equipes só ganham ativos,
+        o mínimo eta*n/s continua valendo se já valia.
+        
+        Returns:
+            Tupla (custos por equipe, np.inf se o fechamento é inviável ou não reduz f2;
+            equipe de destino de cada ativo ao fechar a sua equipe, -1 se não há)
+        """
+        custos = np.full(self.s_equipes, np.inf)
+        destinos = np.full(self.n_ativos, -1, dtype=np.int64)
+        
+        # Só fecha equipes com ativos, e as demais equipes precisam já ser viáveis
+        viaveis = solucao.equipes_viaveis()
+        inviaveis = int(np.count_nonzero(~viaveis))
+        fechaveis = ((solucao.base_equipe >= 0) & (solucao.carga_equipe > 0) &
+                     (inviaveis - ~viaveis == 0))
+        ativos = np.flatnonzero(fechaveis[np.maximum(solucao.equipe_ativo, 0)] & (solucao.equipe_ativo >= 0))
+        if len(ativos) == 0:
+            return custos, destinos
+        
+        abertas = self._bases_com_equipes(solucao) & self.candidatos.bases_ativas
+        limite = self._limite_pares('f2')
+        primeira, segunda = self._equipes_menos_carregadas(solucao)
+        equipes_base = np.bincount(solucao.base_equipe[solucao.base_equipe >= 0], minlength=self.m_bases)
+        
+        # Base aberta mais próxima de cada ativo (a própria só se tem outra equipe), em blocos
+        delta = np.full(len(ativos), np.inf)
+        tamanho_bloco = max(1, TAMANHO_LOTE_AVALIACAO // self.m_bases)
+        for inicio in range(0, len(ativos), tamanho_bloco):
+            bloco = ativos[inicio:inicio + tamanho_bloco]
+            linhas = np.arange(len(bloco))
+            origem = solucao.base_ativo[bloco]
+            equipe_origem = solucao.equipe_ativo[bloco]
+            distancias = np.asarray(self.distancias[bloco], dtype=np.float64)
             
-            if len(equipes_ativas) > 1:
-                # Escolhe equipe com menos ativos para eliminar
-                equipe_menor = equipes_ativas[np.argmin(ativos_por_equipe[equipes_ativas])]
-                base_equipe_menor = np.where(y_jk[:, equipe_menor] == 1)[0][0]
-                ativos_equipe_menor = np.where(h_ik[:, equipe_menor] == 1)[0]
-                
-                # ESTRATÉGIA 1: Tenta consolidar na mesma base (mais barato para f1)
-                outras_equipes_mesma_base = np.where(y_jk[base_equipe_menor, :] == 1)[0]
-                outras_equipes_mesma_base = outras_equipes_mesma_base[outras_equipes_mesma_base != equipe_menor]
-                
-                if len(outras_equipes_mesma_base) > 0:
-                    for equipe_destino in outras_equipes_mesma_base:
-                        h_novo = h_ik.copy()
-                        y_novo = y_jk.copy()
-                        
-                        # Move todos os ativos para equipe destino
-                        for ativo in ativos_equipe_menor:
-                            h_novo[ativo, equipe_menor] = 0
-                            h_novo[ativo, equipe_destino] = 1
-                        
-                        # Remove equipe
-                        y_novo[base_equipe_menor, equipe_menor] = 0
-                        
-                        if self.funcoes_objetivo.verificar_restricoes(x_ij, y_novo, h_novo):
-                            valor = self.funcoes_objetivo.calcular_f2(h_novo, y_novo)
-                            
-                            if valor < melhor_valor:
-                                melhor_x, melhor_y, melhor_h = x_ij.copy(), y_novo.copy(), h_novo.copy()
-                                melhor_valor = valor
-                                melhorou = True
-                                break
-                
-                # ESTRATÉGIA 2: Se não conseguiu na mesma base, tenta mover para equipe mais carregada (qualquer base)
-                if not melhorou:
-                    equipe_maior = equipes_ativas[np.argmax(ativos_por_equipe[equipes_ativas])]
-                    base_equipe_maior = np.where(y_jk[:, equipe_maior] == 1)[0][0]
-                    
-                    if equipe_maior != equipe_menor:
-                        x_novo = x_ij.copy()
-                        h_novo = h_ik.copy()
-                        y_novo = y_jk.copy()
-                        
-                        # Move todos os ativos da equipe menor para a equipe maior
-                        for ativo in ativos_equipe_menor:
-                            # Atualiza base do ativo
-                            x_novo[ativo, base_equipe_menor] = 0
-                            x_novo[ativo, base_equipe_maior] = 1
-                            
-                            # Atualiza equipe do ativo
-                            h_novo[ativo, equipe_menor] = 0
-                            h_novo[ativo, equipe_maior] = 1
-                        
-                        # Remove equipe menor
-                        y_novo[base_equipe_menor, equipe_menor] = 0
-                        
-                        if self.funcoes_objetivo.verificar_restricoes(x_novo, y_novo, h_novo):
-                            valor = self.funcoes_objetivo.calcular_f2(h_novo, y_novo)
-                            
-                            if valor < melhor_valor:
-                                melhor_x, melhor_y, melhor_h = x_novo.copy(), y_novo.copy(), h_novo.copy()
-                                melhor_valor = valor
-                                melhorou = True
-        
-        return melhor_x, melhor_y, melhor_h, melhor_valor, melhorou
+            validos = abertas[None, :] & (distancias <= limite[bloco][:, None])
+            validos[linhas, origem] &= equipes_base[origem] > 1
+            distancias_validas = np.where(validos, distancias, np.inf)
+            base_destino = np.argmin(distancias_validas, axis=1)
+            achou = np.isfinite(distancias_validas[linhas, base_destino])
+            
+            # Equipe menos carregada da base de destino, sem contar a própria equipe
+            equipe_destino = np.where(primeira[base_destino] == equipe_origem,
+                                      segunda[base_destino], primeira[base_destino])
+            destinos[bloco[achou]] = equipe_destino[achou]
+            delta[inicio:inicio + len(bloco)] = np.where(
+                achou, distancias_validas[linhas, base_destino] - distancias[linhas, origem], np.inf)
+        
+        # Custo de cada equipe: soma dos deltas dos seus ativos (inf se algum ativo não tem destino)
+        sem_destino = np.bincount(solucao.equipe_ativo[ativos], weights=np.isinf(delta),
+                                  minlength=self.s_equipes) > 0
+        soma = np.bincount(solucao.equipe_ativo[ativos], weights=np.where(np.isinf(delta), 0.0, delta),
+                           minlength=self.s_equipes)
+        custos = np.where(fechaveis & ~sem_destino, soma, np.inf)
+        return custos, destinos
     
-    def busca_local_best_improvement(self, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray,
-                                    funcao_objetivo: str = 'f1') -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    def busca_local_best_improvement(self, solucao: Solucao, funcao_objetivo: str = 'f1') -> Tuple[Solucao, float]:
         """Busca local com BEST IMPROVEMENT: testa todas as vizinhancas e escolhe a melhor."""
-        x_atual, y_atual, h_atual = x_ij.copy(), y_jk.copy(), h_ik.copy()
+        sol_atual = solucao
+        valor_atual = self._valor(sol_atual, funcao_objetivo)
         
-        if funcao_objetivo == 'f1':
-            valor_atual = self.funcoes_objetivo.calcular_f1(x_atual, h_atual, y_atual)
-        else:
-            valor_atual = self.funcoes_objetivo.calcular_f2(h_atual, y_atual)
+        # Vizinhanca 1: SHIFT, 2: TASK MOVE, 3: SWAP, 5: TWO-OPT e, para f2, CONSOLIDATE
+        vizinhancas, _ = self._vizinhancas(funcao_objetivo)
         
         melhorou_global = True
         iteracao = 0
@@ -365,114 +564,52 @@ class BuscaLocal:
         while melhorou_global and iteracao < max_iteracoes:
             melhorou_global = False
             melhor_valor_iter = valor_atual
-            melhor_sol_iter = (x_atual.copy(), y_atual.copy(), h_atual.copy())
+            melhor_sol_iter = sol_atual
             
             # BEST IMPROVEMENT: testa TODAS as vizinhancas e escolhe a melhor
-            
-            # Vizinhanca 1: SHIFT (move ativo entre equipes)
-            x_shift, y_shift, h_shift, valor_shift, melhorou_shift = self.shift_ativo_equipe(
-                x_atual, y_atual, h_atual, funcao_objetivo)
-            
-            if melhorou_shift and valor_shift < melhor_valor_iter:
-                melhor_sol_iter = (x_shift, y_shift, h_shift)
-                melhor_valor_iter = valor_shift
-                melhorou_global = True
-            
-            # Vizinhanca 2: TASK MOVE (move ativo para base mais proxima)
-            x_task, y_task, h_task, valor_task, melhorou_task = self.task_move(
-                x_atual, y_atual, h_atual, funcao_objetivo)
-            
-            if melhorou_task and valor_task < melhor_valor_iter:
-                melhor_sol_iter = (x_task, y_task, h_task)
-                melhor_valor_iter = valor_task
-                melhorou_global = True
-            
-            # Vizinhanca 3: SWAP (troca ativos entre bases)
-            x_swap, y_swap, h_swap, valor_swap, melhorou_swap = self.swap_ativos_bases(
-                x_atual, y_atual, h_atual, funcao_objetivo)
-            
-            if melhorou_swap and valor_swap < melhor_valor_iter:
-                melhor_sol_iter = (x_swap, y_swap, h_swap)
-                melhor_valor_iter = valor_swap
-                melhorou_global = True
-            
-            # Vizinhanca 5: TWO-OPT (move equipes para bases vazias)
-            x_two, y_two, h_two, valor_two, melhorou_two = self.two_opt_equipes(
-                x_atual, y_atual, h_atual, funcao_objetivo)
-            
-            if melhorou_two and valor_two < melhor_valor_iter:
-                melhor_sol_iter = (x_two, y_two, h_two)
-                melhor_valor_iter = valor_two
-                melhorou_global = True
-            
-            # Para f2: tenta consolidar equipes
-            if funcao_objetivo == 'f2':
-                x_cons, y_cons, h_cons, valor_cons, melhorou_cons = self.consolidate_equipes(
-                    x_atual, y_atual, h_atual, funcao_objetivo)
+            for vizinhanca in vizinhancas:
+                sol_viz, valor_viz, melhorou_viz = vizinhanca(sol_atual, funcao_objetivo)
                 
-                if melhorou_cons and valor_cons < melhor_valor_iter:
-                    melhor_sol_iter = (x_cons, y_cons, h_cons)
-                    melhor_valor_iter = valor_cons
+                if melhorou_viz and valor_viz < melhor_valor_iter:
+                    melhor_sol_iter = sol_viz
+                    melhor_valor_iter = valor_viz
                     melhorou_global = True
             
             # Atualiza solucao se houve melhoria
             if melhorou_global:
-                x_atual, y_atual, h_atual = melhor_sol_iter
+                sol_atual = melhor_sol_iter
                 valor_atual = melhor_valor_iter
             
             iteracao += 1
         
-        return x_atual, y_atual, h_atual, valor_atual
+        return sol_atual, valor_atual
     
-    def busca_local_simples(self, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray, 
-                           funcao_objetivo: str = 'f1') -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    def busca_local_simples(self, solucao: Solucao, funcao_objetivo: str = 'f1') -> Tuple[Solucao, float]:
         """Wrapper para manter compatibilidade - usa VND."""
-        return self.variable_neighborhood_descent(x_ij, y_jk, h_ik, funcao_objetivo)
+        return self.variable_neighborhood_descent(solucao, funcao_objetivo)
     
-    def variable_neighborhood_descent(self, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray,
-                                     funcao_objetivo: str = 'f1', verbose: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    def variable_neighborhood_descent(self, solucao: Solucao, funcao_objetivo: str = 'f1',
+                                      verbose: bool = False) -> Tuple[Solucao, float]:
         """
         Variable Neighborhood Descent (VND) - Algoritmo 7 dos slides.
         Itera pelas vizinhanças em ordem fixa, reiniciando quando encontra melhoria.
         
         Args:
-            x_ij, y_jk, h_ik: Solução inicial
+            solucao: Solução inicial
             funcao_objetivo: 'f1' ou 'f2'
             verbose: Se True, mostra progresso
-            
+        
         Returns:
             Tupla com solução localmente ótima e seu valor
         """
-        # Define ordem das vizinhanças
-        if funcao_objetivo == 'f2':
-            # Para f2, inclui consolidate_equipes
-            neighborhoods = [
-                self.shift_ativo_equipe,
-                self.task_move,
-                self.swap_ativos_bases,
-                self.two_opt_equipes,
-                self.consolidate_equipes
-            ]
-            neighborhood_names = ['Shift', 'TaskMove', 'Swap', 'TwoOpt', 'Consolidate']
-        else:
-            # Para f1, não usa consolidate_equipes
-            neighborhoods = [
-                self.shift_ativo_equipe,
-                self.task_move,
-                self.swap_ativos_bases,
-                self.two_opt_equipes
-            ]
-            neighborhood_names = ['Shift', 'TaskMove', 'Swap', 'TwoOpt']
+        # Define ordem das vizinhanças (consolidate_equipes só para f2)
+        neighborhoods, neighborhood_names = self._vizinhancas(funcao_objetivo)
         
         l_max = len(neighborhoods)
         
-        # Solução atual
-        x_atual, y_atual, h_atual = x_ij.copy(), y_jk.copy(), h_ik.copy()
-        
-        if funcao_objetivo == 'f1':
-            valor_atual = self.funcoes_objetivo.calcular_f1(x_atual, h_atual, y_atual)
-        else:
-            valor_atual = self.funcoes_objetivo.calcular_f2(h_atual, y_atual)
+        # Solução atual na forma canônica (cópia: as vizinhanças não alteram a solução recebida)
+        sol_atual = solucao.copiar().canonizar()
+        valor_atual = self._valor(sol_atual, funcao_objetivo)
         
         # Loop VND
         l = 0  # Índice da vizinhança atual
@@ -482,17 +619,14 @@ class BuscaLocal:
             iteracoes_vnd += 1
             
             # Explora vizinhança N_l
-            x_viz, y_viz, h_viz, valor_viz, melhorou = neighborhoods[l](
-                x_atual, y_atual, h_atual, funcao_objetivo)
+            sol_viz, valor_viz, melhorou = neighborhoods[l](sol_atual, funcao_objetivo)
             
             # Usa Tournament Selection para comparar
-            sol_atual = (x_atual, y_atual, h_atual)
-            sol_viz = (x_viz, y_viz, h_viz)
             sol_escolhida, aceita = self.tournament_selection(sol_atual, sol_viz, funcao_objetivo)
             
             if aceita:
                 # Encontrou melhoria, reinicia para primeira vizinhança
-                x_atual, y_atual, h_atual = sol_escolhida
+                sol_atual = sol_escolhida.canonizar()
                 valor_atual = valor_viz
                 if verbose:
                     print(f"      VND: {neighborhood_names[l]} melhorou -> {valor_viz:.2f}, reinicia", flush=True)
@@ -504,14 +638,32 @@ class BuscaLocal:
         if verbose:
             print(f"      VND concluido: {iteracoes_vnd} iteracoes, valor final: {valor_atual:.2f}", flush=True)
         
-        return x_atual, y_atual, h_atual, valor_atual
+        return sol_atual, valor_atual
     
-    def shake_adaptativo(self, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray, 
-                        intensidade: float = 0.5) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """Shake adaptativo com intensidade variavel."""
-        x_shake = x_ij.copy()
-        y_shake = y_jk.copy()
-        h_shake = h_ik.copy()
+    def shake_adaptativo(self, solucao: Solucao, intensidade: float = 0.5, funcao_objetivo: str = 'f1') -> Solucao:
+        """
+        Shake adaptativo com intensidade variavel. Sorteia candidatos_shake perturbações
+        independentes, avalia todas de uma vez (FuncoesObjetivo.avaliar_lote) e devolve a melhor
+        pelo critério do Tournament Selection: menor violação e, entre as de mesma violação,
+        menor valor objetivo (a primeira sorteada no empate).
+        """
+        candidatos = [self._perturbar(solucao, intensidade) for _ in range(self.candidatos_shake)]
+        if len(candidatos) == 1:
+            return candidatos[0]
+        
+        f1, f2, violacao = self._avaliar_candidatos(candidatos)
+        valores = f1 if funcao_objetivo == 'f1' else f2
+        melhor = int(np.lexsort((valores, violacao))[0])
+        candidatos[melhor].f1 = float(f1[melhor])
+        return candidatos[melhor]
+    
+    def _avaliar_candidatos(self, candidatos: List[Solucao]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vetores de f1, f2 e violação das soluções, numa única avaliação em lote."""
+        return self.funcoes_objetivo.avaliar_solucoes(candidatos)
+    
+    def _perturbar(self, solucao: Solucao, intensidade: float) -> Solucao:
+        """Uma perturbação do shake: ativos sorteados vão para bases próximas (ou aleatórias)."""
+        sol_shake = solucao.copiar()
         
         # Calcula numero de perturbacoes baseado na intensidade
         n_perturbacoes = max(5, int(self.n_ativos * intensidade * 0.15))
@@ -519,36 +671,30 @@ class BuscaLocal:
         
         ativos_perturbar = np.random.choice(self.n_ativos, n_perturbacoes, replace=False)
         
+        # Bases com equipes (o shake nao abre nem fecha bases)
+        bases_com_equipes = self._bases_com_equipes(sol_shake)
+        
         for i in ativos_perturbar:
-            base_atual = np.where(x_shake[i, :] == 1)[0][0]
+            base_atual = sol_shake.base_ativo[i]
             
             # Escolhe nova base baseada na distancia
-            bases_validas = np.where(np.sum(y_shake, axis=1) > 0)[0]
+            bases_validas = np.flatnonzero(bases_com_equipes)
             bases_validas = bases_validas[bases_validas != base_atual]
             
             if len(bases_validas) > 0:
-                # 70% chance de escolher base proxima, 30% aleatoria
+                # 70% chance de escolher base proxima, 30% aleatoria (ou se a poda nao deixou base proxima)
+                bases_proximas = []
                 if np.random.random() < 0.7:
-                    distancias_validas = self.distancias[i, bases_validas]
-                    indices_ordenados = np.argsort(distancias_validas)
-                    bases_proximas = bases_validas[indices_ordenados[:min(3, len(bases_validas))]]
+                    bases_proximas = self.candidatos.mais_proximas(i, bases_com_equipes, 3, excluir=base_atual)
+                if len(bases_proximas) > 0:
                     nova_base = np.random.choice(bases_proximas)
                 else:
                     nova_base = np.random.choice(bases_validas)
                 
-                # Move ativo
-                x_shake[i, base_atual] = 0
-                x_shake[i, nova_base] = 1
-                
-                # Atualiza equipe
-                equipe_antiga = np.where(h_shake[i, :] == 1)[0][0]
-                h_shake[i, equipe_antiga] = 0
-                
-                equipes_nova_base = np.where(y_shake[nova_base, :] == 1)[0]
+                # Move ativo para a equipe menos carregada da nova base
+                equipes_nova_base = np.flatnonzero(sol_shake.base_equipe == nova_base)
                 if len(equipes_nova_base) > 0:
-                    # Escolhe equipe menos carregada
-                    ativos_por_equipe = np.sum(h_shake, axis=0)
-                    equipe_escolhida = equipes_nova_base[np.argmin(ativos_por_equipe[equipes_nova_base])]
-                    h_shake[i, equipe_escolhida] = 1
+                    cargas = sol_shake.carga_equipe[equipes_nova_base]
+                    sol_shake.mover_ativo(i, equipes_nova_base[np.argmin(cargas)])
         
-        return x_shake, y_shake, h_shake
+        return sol_shake
@@ -0,0 +1,126 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from typing import Optional
+
+class IndiceCandidatos:
+    # Índice pré-calculado com as bases de cada ativo ordenadas por distância (k mais próximas)
+    
+    def __init__(self, distancias: np.ndarray, k: int = 20, bases_ordenadas: Optional[np.ndarray] = None,
+                 tamanho_bloco: int = 4096, distancias_ordenadas: Optional[np.ndarray] = None):
+        """
+        Monta o índice de candidatos a partir da matriz de distâncias.
+        
+        Args:
+            distancias: Matriz n_ativos x m_bases
+            k: Número de bases guardadas por ativo (truncado em m_bases)
+            bases_ordenadas: Índice já calculado (ex.: lido do cache), evita reordenar
+            tamanho_bloco: Linhas ordenadas por vez (limita a memória temporária)
+            distancias_ordenadas: Distâncias já na ordem de bases_ordenadas (ex.: memória compartilhada)
+        """
+        self.distancias = distancias
+        self.n_ativos, self.m_bases = distancias.shape
+        self.k = min(k, self.m_bases)
+        
+        if bases_ordenadas is None:
+            bases_ordenadas = self._ordenar(tamanho_bloco)
+        self.bases_ordenadas = bases_ordenadas
+        
+        # Distâncias correspondentes, já na ordem do índice
+        if distancias_ordenadas is None:
+            linhas = np.arange(self.n_ativos)[:, None]
+            distancias_ordenadas = np.asarray(distancias[linhas, self.bases_ordenadas])
+        self.distancias_ordenadas = distancias_ordenadas
+        
+        # Grafo reduzido (ver PreProcessamento): par (i, j) permitido se a base j está ativa
+        # e d[i, j] <= limite[i]; sem poda tudo é permitido
+        self.limite = np.full(self.n_ativos, np.inf)
+        self.bases_ativas = np.ones(self.m_bases, dtype=bool)
+    
+    def _ordenar(self, tamanho_bloco: int) -> np.ndarray:
+        """Ordena as k bases mais próximas de cada ativo, em blocos de linhas."""
+        bases_ordenadas = np.empty((self.n_ativos, self.k), dtype=np.int32)
+        
+        for inicio in range(0, self.n_ativos, tamanho_bloco):
+            bloco = np.asarray(self.distancias[inicio:inicio + tamanho_bloco])
+            if self.k < self.m_bases:
+                # Seleciona as k menores e ordena só elas
+                parcial = np.argpartition(bloco, self.k - 1, axis=1)[:, :self.k]
+                ordem = np.argsort(np.take_along_axis(bloco, parcial, axis=1), axis=1, kind='stable')
+                bases_ordenadas[inicio:inicio + len(bloco)] = np.take_along_axis(parcial, ordem, axis=1)
+            else:
+                bases_ordenadas[inicio:inicio + len(bloco)] = np.argsort(bloco, axis=1, kind='stable')
+        
+        return bases_ordenadas
+    
+    def matriz_esparsa(self) -> csr_matrix:
+        """Distâncias só dos k pares de cada ativo, como matriz esparsa n_ativos x m_bases."""
+        indptr = np.arange(0, self.n_ativos * self.k + 1, self.k)
+        return csr_matrix((np.asarray(self.distancias_ordenadas).ravel(), self.bases_ordenadas.ravel(), indptr),
+                          shape=(self.n_ativos, self.m_bases))
+    
+    def aplicar_poda(self, limite: np.ndarray, bases_ativas: np.ndarray):
+        """Restringe as consultas ao grafo reduzido calculado no pré-processamento."""
+        self.limite = np.asarray(limite, dtype=float)
+        self.bases_ativas = np.asarray(bases_ativas, dtype=bool)
+    
+    def permitido(self, i: int, j: int) -> bool:
+        """True se o par (ativo i, base j) pertence ao grafo reduzido."""
+        return bool(self.bases_ativas[j]) and self.distancias[i, j] <= self.limite[i]
+    
+    def mais_proximas(self, i: int, abertas: np.ndarray, quantidade: int = 1, excluir: int = -1) -> np.ndarray:
+        """
+        Bases abertas mais próximas do ativo i, em ordem crescente de distância
+        (somente pares do grafo reduzido).
+        
+        Args:
+            i: Índice do ativo
+            abertas: Vetor booleano (m_bases) com as bases que têm equipe
+            quantidade: Número máximo de bases retornadas
+            excluir: Base a ignorar (ex.: a base atual do ativo), -1 para nenhuma
+        
+        Returns:
+            Até `quantidade` índices de bases
+        """
+        candidatas = self.bases_ordenadas[i]
+        validas = abertas[candidatas] & self.bases_ativas[candidatas] & \
+            (self.distancias_ordenadas[i] <= self.limite[i])
+        if excluir >= 0:
+            validas = validas & (candidatas != excluir)
+        escolhidas = candidatas[validas][:quantidade]
+        
+        if len(escolhidas) < quantidade and self.k < self.m_bases and \
+                self.distancias_ordenadas[i, -1] <= self.limite[i]:
+            # Lista truncada não tem abertas suficientes: recorre à linha completa
+            bases = np.flatnonzero(abertas & self.bases_ativas)
+            if excluir >= 0:
+                bases = bases[bases != excluir]
+            distancias_bases = np.asarray(self.distancias[i, bases])
+            bases = bases[distancias_bases <= self.limite[i]]
+            ordem = np.argsort(distancias_bases[distancias_bases <= self.limite[i]], kind='stable')
+            escolhidas = bases[ordem[:quantidade]]
+        
+        return escolhidas
+    
+    def base_aberta_mais_proxima(self, abertas: np.ndarray) -> np.ndarray:
+        """
+        Base aberta mais próxima de cada ativo (vetorizado).
+        
+        Args:
+            abertas: Vetor booleano (m_bases) com as bases que têm equipe
+        
+        Returns:
+            Vetor (n_ativos) com o índice da base, -1 se nenhuma base estiver aberta
+        """
+        validas = abertas[self.bases_ordenadas]
+        posicao = np.argmax(validas, axis=1)
+        encontrou = validas[np.arange(self.n_ativos), posicao]
+        bases = np.where(encontrou, self.bases_ordenadas[np.arange(self.n_ativos), posicao], -1)
+        
+        faltando = np.flatnonzero(~encontrou)
+        if len(faltando) > 0 and np.any(abertas):
+            # Ativos cujas k bases estão todas fechadas: busca na linha completa
+            bases_abertas = np.flatnonzero(abertas)
+            sub = np.asarray(self.distancias[faltando][:, bases_abertas])
+            bases[faltando] = bases_abertas[np.argmin(sub, axis=1)]
+        
+        return bases
@@ -1,89 +1,651 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, Tuple
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from scipy.spatial import cKDTree
+from typing import Dict, Optional, Tuple
+
+try:
+    from .candidatos import IndiceCandidatos
+except ImportError:
+    # Para execução direta do arquivo
+    from candidatos import IndiceCandidatos
+
+# Versão do formato do cache binário; incrementar sempre que o processamento mudar
+VERSAO_CACHE = 2
+
+# Colunas do CSV (sem cabeçalho, separador ';' e decimal ',')
+COLUNAS_CSV = ['lat_base', 'lon_base', 'lat_ativo', 'lon_ativo', 'distancia']
+COLUNAS_COORDENADAS = ['lat_ativo', 'lon_ativo']
+
+# Formatos do arquivo de dados: 'longo' (base;ativo;distância, como o probdata.csv)
+# ou 'coordenadas' (só lat;lon de cada ativo, distâncias calculadas)
+FORMATOS = ('longo', 'coordenadas')
+
+# Opções de armazenamento da matriz de distâncias
+TIPOS_DISTANCIAS = ('float64', 'float32')
+ARMAZENAMENTOS = ('auto', 'memoria', 'disco', 'sob_demanda')
+
+# No formato 'coordenadas', acima deste número de bases o modo 'auto' não monta a matriz
+# completa: distâncias sob demanda e candidatos pela KD-tree
+LIMITE_BASES_DENSAS = 2048
+
+# Coordenadas das bases (conforme especificação)
+BASES_COORDS = {
+    1: (-20.42356922351763, -43.85662128864406),   # Mina de Segredo
+    2: (-20.41984991094628, -43.87807289747346),   # Mina de Fábrica
+    3: (-20.21903360119097, -43.86799823383877),   # Mina do Pico
+    4: (-20.15430320989316, -43.87736509890982),   # Mina Abóboras
+    5: (-20.17524384792724, -43.87763341755356),   # Mina Vargem Grande
+    6: (-20.1176047615157, -43.92474303044277),    # Mina Capitão do Mato
+    7: (-20.0552230890194, -43.95878782530629),    # Mina de Mar Azul
+    8: (-20.0266764103878, -43.9572986914806),     # Mina da Mutuca
+    9: (-20.05089955414092, -43.97170154845308),   # Mina Capão Xavier
+    10: (-20.09607975875567, -44.0951510922237),   # Mina de Jangada
+    11: (-19.96289872248546, -43.90611994799001),  # Mina de Águas Claras
+    12: (-19.86222243086092, -43.79440046882095),  # Mina Córrego do Meio
+    13: (-20.12490857385939, -44.12537961904606),  # Mina de Córrego do Feijão
+    14: (-20.08768706286346, -43.94249431874169)   # Mina Tamanduá
+}
+
+# Raio médio da Terra (km), usado na distância de haversine
+RAIO_TERRA_KM = 6371.0
+
+def haversine(lat_a: np.ndarray, lon_a: np.ndarray, lat_b: np.ndarray, lon_b: np.ndarray) -> np.ndarray:
+    """Distância de haversine (km) entre pontos em graus, par a par (com broadcasting)."""
+    lat_a, lon_a, lat_b, lon_b = map(np.radians, (lat_a, lon_a, lat_b, lon_b))
+    a = np.sin((lat_b - lat_a) / 2)**2 + np.cos(lat_a) * np.cos(lat_b) * np.sin((lon_b - lon_a) / 2)**2
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(a))
+
+def distancias_haversine(ativos_coords: np.ndarray, bases_coords: np.ndarray) -> np.ndarray:
+    """
+    Matriz de distâncias de haversine (km) entre ativos e bases.
+    
+    Args:
+        ativos_coords: Array (n, 2) com (lat, lon) em graus
+        bases_coords: Array (m, 2) com (lat, lon) em graus
+    
+    Returns:
+        Matriz n x m de distâncias em km
+    """
+    return haversine(ativos_coords[:, 0][:, None], ativos_coords[:, 1][:, None],
+                     bases_coords[:, 0][None, :], bases_coords[:, 1][None, :])
+
+def hash_conteudo(arquivo: str, dir_indice: Optional[str] = None) -> str:
+    """
+    Hash (blake2b) do conteúdo de um arquivo. Fica guardado em <dir_indice>/<nome>_conteudo.json
+    com o tamanho e o mtime do arquivo: a partida a quente só relê o arquivo inteiro quando algum
+    dos dois mudou.
+    
+    Args:
+        arquivo: Caminho do arquivo
+        dir_indice: Pasta do índice (None: sempre relê o arquivo)
+    
+    Returns:
+        Hash em hexadecimal
+    """
+    estado = os.stat(arquivo)
+    caminho = os.path.abspath(arquivo)
+    caminho_indice = None
+    if dir_indice is not None:
+        nome = os.path.splitext(os.path.basename(arquivo))[0]
+        caminho_indice = os.path.join(dir_indice, f'{nome}_conteudo.json')
+        try:
+            with open(caminho_indice, 'r', encoding='utf-8') as f:
+                indice = json.load(f)
+            if (indice.get('arquivo') == caminho and indice.get('tamanho') == estado.st_size and
+                    indice.get('mtime_ns') == estado.st_mtime_ns):
+                return indice['hash']
+        except (OSError, ValueError, KeyError):
+            pass
+    
+    h = hashlib.blake2b(digest_size=16)
+    with open(arquivo, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    
+    indice = {'arquivo': caminho, 'tamanho': estado.st_size, 'mtime_ns': estado.st_mtime_ns,
+              'hash': h.hexdigest()}
+    if caminho_indice is not None:
+        temporario = f'{caminho_indice}.tmp{os.getpid()}'
+        try:
+            os.makedirs(dir_indice, exist_ok=True)
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(indice, f, indent=2)
+            os.replace(temporario, caminho_indice)
+        except OSError:
+            # Sem o índice o hash só é recalculado na próxima partida
+            if os.path.exists(temporario):
+                os.remove(temporario)
+    return indice['hash']
+
+class MatrizHaversine:
+    # Matriz ativo x base de distâncias de haversine calculadas sob demanda (não fica em memória)
+    
+    def __init__(self, ativos_coords: np.ndarray, bases_coords: np.ndarray, dtype: str = 'float64'):
+        self.ativos_coords = np.asarray(ativos_coords, dtype=float)
+        self.bases_coords = np.asarray(bases_coords, dtype=float)
+        self.shape = (len(self.ativos_coords), len(self.bases_coords))
+        self.ndim = 2
+        self.dtype = np.dtype(dtype)
+        
+        # Índices de linha e coluna em broadcast (passo zero, sem memória): qualquer indexação
+        # do numpy aplicada a eles dá exatamente os pares (ativo, base) pedidos
+        self._linhas = np.broadcast_to(np.arange(self.shape[0])[:, None], self.shape)
+        self._colunas = np.broadcast_to(np.arange(self.shape[1])[None, :], self.shape)
+    
+    def __len__(self) -> int:
+        return self.shape[0]
+    
+    def __getitem__(self, chave):
+        i = self._linhas[chave]
+        j = self._colunas[chave]
+        valores = haversine(self.ativos_coords[i, 0], self.ativos_coords[i, 1],
+                            self.bases_coords[j, 0], self.bases_coords[j, 1])
+        return valores.astype(self.dtype)
+    
+    def __array__(self, dtype=None, copy=None):
+        # Materializa a matriz inteira (evitar em instâncias grandes)
+        return np.asarray(self[:, :], dtype=dtype)
+    
+    def min(self, axis=None, tamanho_bloco: int = 4096):
+        """Mínimo sem materializar a matriz (blocos de linhas)."""
+        minimos = np.concatenate([self[inicio:inicio + tamanho_bloco].min(axis=1)
+                                  for inicio in range(0, self.shape[0], tamanho_bloco)] or
+                                 [np.zeros(0, dtype=self.dtype)])
+        if axis in (1, -1):
+            return minimos
+        if axis is None:
+            return minimos.min()
+        return np.min(np.asarray(self), axis=axis)
 
 class DadosProcessor:
     # Classe que carrega e processa os dados do arquivo CSV
     
-    def __init__(self, arquivo_dados: str):
+    def __init__(self, arquivo_dados: str, tolerancia_bases: float = 1e-3, tolerancia_ativos: float = 1e-6,
+                 usar_cache: bool = True, dir_cache: Optional[str] = None, tamanho_bloco: int = 100_000,
+                 tipo_distancias: str = 'float64', armazenamento: str = 'auto', k_candidatos: int = 20,
+                 bases_coords: Optional[Dict[int, Tuple[float, float]]] = None, s_equipes: int = 8,
+                 eta: float = 0.2, matriz: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                 provedor_distancias=None, formato: str = 'longo'):
         # Carrega os dados do arquivo CSV e calcula as distâncias entre ativos e bases
+        # tolerancia_bases: distância máxima (graus) para casar a base do CSV com bases_coords
+        # tolerancia_ativos: grade (graus) usada para identificar ativos distintos
+        # usar_cache: reaproveita a matriz já processada (dir_cache, padrão <pasta do CSV>/cache)
+        # tamanho_bloco: linhas do CSV lidas por vez ao montar a matriz
+        # tipo_distancias: 'float64' ou 'float32' (metade da memória)
+        # armazenamento: 'memoria' (matriz na RAM), 'disco' (np.memmap somente leitura),
+        #                'sob_demanda' (só formato 'coordenadas': haversine calculada a cada acesso)
+        #                ou 'auto' (memmap quando vem do cache, RAM quando acabou de ser calculada;
+        #                sob demanda no formato 'coordenadas' com mais de LIMITE_BASES_DENSAS bases)
+        # k_candidatos: bases mais próximas guardadas por ativo no índice de candidatos
+        # bases_coords, s_equipes, eta: parâmetros da instância (padrão: especificação do trabalho)
+        # matriz: (distancias, ativos_coords) já conhecidas para este CSV (ex.: instância
+        #         sintética); dispensa a leitura do arquivo e grava o cache
+        # provedor_distancias: calcula os pares sem distância no CSV (ex.: DistanciasRede);
+        #                      objeto com calcular(ativos_coords, bases_coords) e chave().
+        #                      Padrão: distância de haversine
+        # formato: 'longo' (base;ativo;distância) ou 'coordenadas' (lat;lon dos ativos, uma
+        #          linha por ativo; as distâncias vêm do provedor ou da haversine)
+        if formato not in FORMATOS:
+            raise ValueError(f"formato deve ser um de {FORMATOS}, recebido {formato!r}")
+        if tipo_distancias not in TIPOS_DISTANCIAS:
+            raise ValueError(f"tipo_distancias deve ser um de {TIPOS_DISTANCIAS}, recebido {tipo_distancias!r}")
+        if armazenamento not in ARMAZENAMENTOS:
+            raise ValueError(f"armazenamento deve ser um de {ARMAZENAMENTOS}, recebido {armazenamento!r}")
+        if armazenamento == 'sob_demanda' and (formato != 'coordenadas' or provedor_distancias is not None):
+            raise ValueError("armazenamento 'sob_demanda' só vale no formato 'coordenadas' com haversine")
+        
         self.arquivo_dados = arquivo_dados
-        self.dados = self._carregar_dados(arquivo_dados)
-        self.n_ativos = len(self.dados) if not self.dados.empty else 0
-        self.m_bases = 14  # Número de bases conforme especificação
-        self.s_equipes = 8  # Máximo de equipes
-        self.eta = 0.2  # Percentual mínimo de ativos por equipe
-        
-        # Coordenadas das bases (conforme especificação)
-        self.bases_coords = {
-            1: (-20.42356922351763, -43.85662128864406),   # Mina de Segredo
-            2: (-20.41984991094628, -43.87807289747346),   # Mina de Fábrica
-            3: (-20.21903360119097, -43.86799823383877),   # Mina do Pico
-            4: (-20.15430320989316, -43.87736509890982),   # Mina Abóboras
-            5: (-20.17524384792724, -43.87763341755356),   # Mina Vargem Grande
-            6: (-20.1176047615157, -43.92474303044277),    # Mina Capitão do Mato
-            7: (-20.0552230890194, -43.95878782530629),    # Mina de Mar Azul
-            8: (-20.0266764103878, -43.9572986914806),     # Mina da Mutuca
-            9: (-20.05089955414092, -43.97170154845308),   # Mina Capão Xavier
-            10: (-20.09607975875567, -44.0951510922237),   # Mina de Jangada
-            11: (-19.96289872248546, -43.90611994799001),  # Mina de Águas Claras
-            12: (-19.86222243086092, -43.79440046882095),  # Mina Córrego do Meio
-            13: (-20.12490857385939, -44.12537961904606),  # Mina de Córrego do Feijão
-            14: (-20.08768706286346, -43.94249431874169)   # Mina Tamanduá
-        }
+        self.tolerancia_bases = tolerancia_bases
+        self.tolerancia_ativos = tolerancia_ativos
+        self.usar_cache = usar_cache
+        self.tamanho_bloco = tamanho_bloco
+        self.tipo_distancias = tipo_distancias
+        self.armazenamento = armazenamento
+        self.k_candidatos = k_candidatos
+        self.provedor_distancias = provedor_distancias
+        self.formato = formato
+        self.dir_cache = dir_cache if dir_cache is not None else os.path.join(
+            os.path.dirname(os.path.abspath(arquivo_dados)), 'cache')
+        self._dados = None
+        self.n_ativos = 0
+        self.s_equipes = s_equipes  # Máximo de equipes
+        self.eta = eta  # Percentual mínimo de ativos por equipe
+        
+        # Coordenadas das bases (conforme especificação, ou da instância informada)
+        self.bases_coords = dict(bases_coords) if bases_coords is not None else dict(BASES_COORDS)
+        self.m_bases = len(self.bases_coords)  # Número de bases
+        
+        if self.armazenamento == 'auto' and self.formato == 'coordenadas' and \
+                self.provedor_distancias is None and self.m_bases > LIMITE_BASES_DENSAS:
+            self.armazenamento = 'sob_demanda'
+        
+        # Sob demanda não há matriz para guardar em cache
+        self.caminho_cache = self._caminho_cache() if self.usar_cache and \
+            self.armazenamento != 'sob_demanda' else None
+        if self.armazenamento == 'sob_demanda':
+            self.ativos_coords = self._ler_coordenadas(self.arquivo_dados)
+            self.n_ativos = len(self.ativos_coords)
+            self.distancias = MatrizHaversine(self.ativos_coords, np.array(list(self.bases_coords.values())),
+                                              self.tipo_distancias)
+            self.diagnostico_distancias = {
+                'pares_faltantes': np.zeros((0, 2), dtype=np.int64),
+                'pares_duplicados': np.zeros((0, 2), dtype=np.int64),
+                'linhas_sem_base': 0
+            }
+        
+        elif matriz is not None:
+            # Matriz já conhecida: só registra no cache
+            distancias, ativos_coords = matriz
+            self.distancias = np.ascontiguousarray(distancias, dtype=self.tipo_distancias)
+            self.ativos_coords = np.asarray(ativos_coords, dtype=float)
+            self.n_ativos = len(self.ativos_coords)
+            self.diagnostico_distancias = {
+                'pares_faltantes': np.zeros((0, 2), dtype=np.int64),
+                'pares_duplicados': np.zeros((0, 2), dtype=np.int64),
+                'linhas_sem_base': 0
+            }
+            if self.caminho_cache is not None and self.n_ativos > 0:
+                self._salvar_cache(self.caminho_cache)
+            
+            if self.armazenamento == 'disco' and self.n_ativos > 0:
+                self.distancias = self._mapear_em_disco(self.distancias)
         
-        # Calcula distâncias entre ativos e bases
-        self.distancias = self._calcular_distancias()
+        # Partida a quente: carrega a matriz do cache binário sem passar pelo pandas
+        elif self.caminho_cache is None or not self._carregar_cache(self.caminho_cache):
+            # Calcula distâncias entre ativos e bases (leitura em blocos, sem a tabela inteira)
+            if self.formato == 'coordenadas':
+                self.distancias = self._calcular_distancias_coordenadas()
+            else:
+                self.distancias = self._calcular_distancias()
+            
+            if self.caminho_cache is not None and self.n_ativos > 0:
+                self._salvar_cache(self.caminho_cache)
+            
+            if self.armazenamento == 'disco' and self.n_ativos > 0:
+                self.distancias = self._mapear_em_disco(self.distancias)
+        
+        # Índice das bases mais próximas de cada ativo, compartilhado pela construção e vizinhanças
+        self.candidatos = self._construir_candidatos()
+    
+    @property
+    def dados(self) -> pd.DataFrame:
+        """Tabela longa do CSV (lida sob demanda quando a matriz veio do cache)."""
+        if self._dados is None:
+            self._dados = self._carregar_dados(self.arquivo_dados)
+        return self._dados
     
     def _carregar_dados(self, arquivo: str) -> pd.DataFrame:
         """Carrega os dados do arquivo CSV."""
+        if self.formato == 'coordenadas':
+            return pd.DataFrame(self.ativos_coords, columns=COLUNAS_COORDENADAS)
         try:
-            dados = pd.read_csv(arquivo, sep=';', header=None, decimal=',')
-            dados.columns = ['lat_base', 'lon_base', 'lat_ativo', 'lon_ativo', 'distancia']
-            
-            # Converte para float
-            for col in dados.columns:
-                dados[col] = pd.to_numeric(dados[col], errors='coerce')
-            
-            dados = dados.dropna()
-            return dados
-            
+            blocos = list(self._ler_blocos(arquivo))
+            if not blocos:
+                return pd.DataFrame()
+            return pd.DataFrame(np.concatenate(blocos), columns=COLUNAS_CSV)
+        
         except Exception as e:
             print(f"Erro ao carregar dados: {e}")
             return pd.DataFrame()
     
+    def _ler_blocos(self, arquivo: str, colunas=COLUNAS_CSV, obrigatorias=COLUNAS_CSV[:4], usecols=None):
+        """Lê o CSV em blocos de self.tamanho_bloco linhas, já convertidos para float."""
+        leitor = pd.read_csv(arquivo, sep=';', header=None, decimal=',', names=colunas,
+                             usecols=usecols, chunksize=self.tamanho_bloco)
+        for bloco in leitor:
+            # Colunas com alguma célula inválida chegam como texto, ainda com vírgula decimal
+            for col in bloco.columns:
+                if not pd.api.types.is_numeric_dtype(bloco[col]):
+                    bloco[col] = bloco[col].astype(str).str.replace(',', '.', regex=False)
+            
+            # Converte para float e descarta linhas inválidas, só dentro do bloco; linhas sem
+            # distância são mantidas (o par é calculado pelo provedor de distâncias)
+            bloco = bloco.apply(pd.to_numeric, errors='coerce').dropna(subset=obrigatorias)
+            if len(bloco) > 0:
+                yield bloco.to_numpy(dtype=float)
+    
     def _calcular_distancias(self) -> np.ndarray:
-        """Calcula matriz de distâncias entre ativos e bases."""
-        # O arquivo tem 125 ativos únicos e 14 bases únicas
-        # Precisamos criar uma matriz 125x14 com as distâncias corretas
-        
-        # Primeiro, identifica os ativos únicos
-        ativos_unicos = self.dados[['lat_ativo', 'lon_ativo']].drop_duplicates().reset_index(drop=True)
-        n_ativos_unicos = len(ativos_unicos)
-        
-        # Cria matriz de distâncias
-        distancias = np.zeros((n_ativos_unicos, self.m_bases))
-        
-        # Mapeia cada ativo único para suas distâncias com cada base
-        for i, ativo in ativos_unicos.iterrows():
-            for j, (base_id, (lat_base, lon_base)) in enumerate(self.bases_coords.items(), 1):
-                # Encontra a linha no CSV que corresponde a este ativo e esta base
-                linha = self.dados[
-                    (abs(self.dados['lat_ativo'] - ativo['lat_ativo']) < 0.001) &
-                    (abs(self.dados['lon_ativo'] - ativo['lon_ativo']) < 0.001) &
-                    (abs(self.dados['lat_base'] - lat_base) < 0.001) &
-                    (abs(self.dados['lon_base'] - lon_base) < 0.001)
-                ]
+        """
+        Monta a matriz de distâncias ativo x base lendo o CSV em blocos.
+        
+        Cada linha é mapeada uma vez para a chave (id do ativo, id da base) e as
+        distâncias são espalhadas diretamente na matriz final, bloco a bloco; a
+        tabela longa nunca fica inteira em memória. Pares ausentes (ou sem distância)
+        são calculados pelo provedor de distâncias; ausentes e repetidos são
+        reportados em self.diagnostico_distancias.
+        """
+        bases_ref = np.array(list(self.bases_coords.values()))
+        
+        # Estimativa inicial de ativos pelo tamanho do arquivo (~60 bytes por linha)
+        try:
+            capacidade = max(16, os.path.getsize(self.arquivo_dados) // (60 * self.m_bases))
+        except OSError:
+            capacidade = 16
+        
+        distancias = np.zeros((capacidade, self.m_bases), dtype=self.tipo_distancias)
+        preenchido = np.zeros((capacidade, self.m_bases), dtype=bool)
+        ativos_coords = np.zeros((capacidade, 2))
+        indice_ativos = pd.Index([], dtype=np.int64)
+        n_ativos_unicos = 0
+        chaves_duplicadas = []
+        linhas_sem_base = 0
+        
+        try:
+            for bloco in self._ler_blocos(self.arquivo_dados):
+                lat_base, lon_base, lat_ativo, lon_ativo, distancia = bloco.T
+                
+                # Bases: cada coordenada distinta do bloco é casada com a base mais próxima
+                codigos_base, _ = pd.factorize(self._chaves_grade(lat_base, lon_base, self.tolerancia_ativos))
+                _, primeira_linha = np.unique(codigos_base, return_index=True)
+                bases_bloco = np.column_stack([lat_base[primeira_linha], lon_base[primeira_linha]])
+                dif = np.abs(bases_bloco[:, None, :] - bases_ref[None, :, :]).max(axis=2)
+                base_mais_proxima = np.argmin(dif, axis=1)
+                casou = dif[np.arange(len(bases_bloco)), base_mais_proxima] < self.tolerancia_bases
+                idx_base = np.where(casou, base_mais_proxima, -1)[codigos_base]
+                
+                # Linhas cuja base não é conhecida não entram na matriz
+                validas = idx_base >= 0
+                linhas_sem_base += int(np.sum(~validas))
+                lat_ativo, lon_ativo = lat_ativo[validas], lon_ativo[validas]
+                idx_base, distancia = idx_base[validas], distancia[validas]
                 
-                if len(linha) > 0:
-                    distancias[i, j-1] = linha['distancia'].iloc[0]
-                else:
-                    # Se não encontrou, calcula distância euclidiana
-                    dist = np.sqrt((ativo['lat_ativo'] - lat_base)**2 + 
-                                 (ativo['lon_ativo'] - lon_base)**2)
-                    distancias[i, j-1] = dist
+                # Ativos: chave da grade -> id, novos ativos recebem ids na ordem de aparição
+                chaves_ativo = self._chaves_grade(lat_ativo, lon_ativo, self.tolerancia_ativos)
+                idx_ativo = indice_ativos.get_indexer(chaves_ativo)
+                novos = idx_ativo < 0
+                if np.any(novos):
+                    codigos, chaves_novas = pd.factorize(chaves_ativo[novos])
+                    _, primeira_linha = np.unique(codigos, return_index=True)
+                    idx_ativo[novos] = n_ativos_unicos + codigos
+                    
+                    n_total = n_ativos_unicos + len(chaves_novas)
+                    if n_total > capacidade:
+                        # Cresce as matrizes no próprio buffer (sem manter duas cópias vivas)
+                        capacidade = max(n_total, 2 * capacidade)
+                        distancias.resize((capacidade, self.m_bases), refcheck=False)
+                        preenchido.resize((capacidade, self.m_bases), refcheck=False)
+                        ativos_coords.resize((capacidade, 2), refcheck=False)
+                    
+                    ativos_coords[n_ativos_unicos:n_total, 0] = lat_ativo[novos][primeira_linha]
+                    ativos_coords[n_ativos_unicos:n_total, 1] = lon_ativo[novos][primeira_linha]
+                    indice_ativos = indice_ativos.append(pd.Index(chaves_novas))
+                    n_ativos_unicos = n_total
+                
+                # Chave linear (ativo, base); vale a primeira ocorrência de cada par no arquivo
+                tem_distancia = ~np.isnan(distancia)
+                chaves = (idx_ativo * self.m_bases + idx_base)[tem_distancia]
+                distancia = distancia[tem_distancia]
+                chaves_unicas, primeira_linha, contagem = np.unique(chaves, return_index=True, return_counts=True)
+                ja_preenchido = preenchido.flat[chaves_unicas]
+                chaves_duplicadas.append(chaves_unicas[(contagem > 1) | ja_preenchido])
+                
+                novas = chaves_unicas[~ja_preenchido]
+                distancias.flat[novas] = distancia[primeira_linha[~ja_preenchido]]
+                preenchido.flat[novas] = True
+        
+        except Exception as e:
+            print(f"Erro ao carregar dados: {e}")
+            n_ativos_unicos = 0
+            chaves_duplicadas = []
+        
+        # Descarta a capacidade excedente
+        distancias.resize((n_ativos_unicos, self.m_bases), refcheck=False)
+        preenchido.resize((n_ativos_unicos, self.m_bases), refcheck=False)
+        ativos_coords.resize((n_ativos_unicos, 2), refcheck=False)
+        
+        # Diagnóstico de pares ausentes e duplicados
+        pares_faltantes = np.argwhere(~preenchido)
+        chaves_duplicadas = np.unique(np.concatenate(chaves_duplicadas)) if chaves_duplicadas else np.zeros(0, dtype=np.int64)
+        pares_duplicados = np.column_stack(np.divmod(chaves_duplicadas, self.m_bases))
+        
+        if len(pares_faltantes) > 0:
+            # Pares ausentes são calculados pelo provedor, só para os ativos afetados
+            ativos_faltantes, linha = np.unique(pares_faltantes[:, 0], return_inverse=True)
+            if self.provedor_distancias is not None:
+                calculadas = self.provedor_distancias.calcular(ativos_coords[ativos_faltantes], bases_ref)
+                origem = 'pelo provedor de distâncias'
+            else:
+                calculadas = distancias_haversine(ativos_coords[ativos_faltantes], bases_ref)
+                origem = 'pela distância de haversine'
+            distancias[pares_faltantes[:, 0], pares_faltantes[:, 1]] = calculadas[linha, pares_faltantes[:, 1]]
+            print(f"Aviso: {len(pares_faltantes)} pares (ativo, base) ausentes no CSV; "
+                  f"calculados {origem}")
+        if len(pares_duplicados) > 0:
+            print(f"Aviso: {len(pares_duplicados)} pares (ativo, base) duplicados no CSV; "
+                  f"mantida a primeira ocorrência")
+        if linhas_sem_base > 0:
+            print(f"Aviso: {linhas_sem_base} linhas do CSV não correspondem a nenhuma base conhecida")
+        
+        self.diagnostico_distancias = {
+            'pares_faltantes': pares_faltantes,
+            'pares_duplicados': pares_duplicados,
+            'linhas_sem_base': linhas_sem_base
+        }
         
         # Atualiza o número de ativos para o correto
         self.n_ativos = n_ativos_unicos
+        self.ativos_coords = ativos_coords
+        
+        return distancias
+    
+    def _ler_coordenadas(self, arquivo: str) -> np.ndarray:
+        """Coordenadas dos ativos no formato 'coordenadas' (repetidas na grade são descartadas)."""
+        try:
+            blocos = list(self._ler_blocos(arquivo, COLUNAS_COORDENADAS, COLUNAS_COORDENADAS, usecols=[0, 1]))
+        except Exception as e:
+            print(f"Erro ao carregar dados: {e}")
+            blocos = []
+        if not blocos:
+            return np.zeros((0, 2))
+        
+        coords = np.concatenate(blocos)
+        _, primeira = np.unique(self._chaves_grade(coords[:, 0], coords[:, 1], self.tolerancia_ativos),
+                                return_index=True)
+        if len(primeira) < len(coords):
+            print(f"Aviso: {len(coords) - len(primeira)} ativos repetidos no arquivo; mantida a primeira ocorrência")
+        return coords[np.sort(primeira)]
+    
+    def _calcular_distancias_coordenadas(self) -> np.ndarray:
+        """
+        Monta a matriz a partir só das coordenadas dos ativos (formato 'coordenadas').
+        
+        As distâncias (haversine ou do provedor) são calculadas por broadcasting em blocos
+        de ativos, com cerca de self.tamanho_bloco pares por bloco, direto na matriz final.
+        """
+        self.ativos_coords = self._ler_coordenadas(self.arquivo_dados)
+        self.n_ativos = len(self.ativos_coords)
+        bases_ref = np.array(list(self.bases_coords.values()))
+        calcular = self.provedor_distancias.calcular if self.provedor_distancias is not None \
+            else distancias_haversine
+        
+        distancias = np.empty((self.n_ativos, self.m_bases), dtype=self.tipo_distancias)
+        linhas_bloco = max(1, self.tamanho_bloco // max(1, self.m_bases))
+        for inicio in range(0, self.n_ativos, linhas_bloco):
+            distancias[inicio:inicio + linhas_bloco] = calcular(self.ativos_coords[inicio:inicio + linhas_bloco],
+                                                                bases_ref)
         
+        self.diagnostico_distancias = {
+            'pares_faltantes': np.zeros((0, 2), dtype=np.int64),
+            'pares_duplicados': np.zeros((0, 2), dtype=np.int64),
+            'linhas_sem_base': 0
+        }
         return distancias
+    
+    def _ordenar_por_kdtree(self, k: int, tamanho_bloco: int = 65536) -> np.ndarray:
+        """
+        k bases mais próximas de cada ativo sem percorrer a matriz completa.
+        
+        Busca na KD-tree das bases em coordenadas projetadas (equiretangular) com folga
+        de 2k vizinhos, reordenados pela distância de haversine exata.
+        """
+        bases_ref = np.array(list(self.bases_coords.values()))
+        cos_lat = np.cos(np.radians(np.mean(bases_ref[:, 0])))
+        arvore = cKDTree(np.column_stack([bases_ref[:, 0], bases_ref[:, 1] * cos_lat]))
+        folga = min(self.m_bases, 2 * k)
+        
+        bases_ordenadas = np.empty((self.n_ativos, k), dtype=np.int32)
+        for inicio in range(0, self.n_ativos, tamanho_bloco):
+            coords = self.ativos_coords[inicio:inicio + tamanho_bloco]
+            _, vizinhos = arvore.query(np.column_stack([coords[:, 0], coords[:, 1] * cos_lat]), k=folga)
+            vizinhos = np.asarray(vizinhos).reshape(len(coords), folga)
+            d = haversine(coords[:, 0:1], coords[:, 1:2], bases_ref[vizinhos, 0], bases_ref[vizinhos, 1])
+            ordem = np.argsort(d, axis=1, kind='stable')[:, :k]
+            bases_ordenadas[inicio:inicio + len(coords)] = np.take_along_axis(vizinhos, ordem, axis=1)
+        
+        return bases_ordenadas
+    
+    @staticmethod
+    def _chaves_grade(lat: np.ndarray, lon: np.ndarray, tolerancia: float) -> np.ndarray:
+        """
+        Chave inteira de cada ponto numa grade de passo `tolerancia` (graus).
+        
+        Latitude e longitude arredondadas são empacotadas num único int64, o que
+        vale enquanto |coordenada / tolerancia| < 2**31 (tolerancia >= 1e-7).
+        """
+        chave_lat = np.rint(lat / tolerancia).astype(np.int64)
+        chave_lon = np.rint(lon / tolerancia).astype(np.int64)
+        return chave_lat * (1 << 32) + chave_lon
+    
+    def _hash_conteudo(self) -> str:
+        """Hash do conteúdo do CSV (ver hash_conteudo), com o índice guardado na pasta do cache."""
+        return hash_conteudo(self.arquivo_dados, self.dir_cache)
+    
+    def _chave_cache(self) -> str:
+        """Hash do conteúdo do CSV combinado com os parâmetros de processamento."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self._hash_conteudo().encode('utf-8'))
+        
+        parametros = {
+            'versao': VERSAO_CACHE,
+            'm_bases': self.m_bases,
+            'tipo_distancias': self.tipo_distancias,
+            'tolerancia_bases': self.tolerancia_bases,
+            'tolerancia_ativos': self.tolerancia_ativos,
+            'bases_coords': [list(coord) for coord in self.bases_coords.values()],
+            'formato': self.formato,
+            'provedor_distancias': self.provedor_distancias.chave() if self.provedor_distancias is not None
+                                   else 'haversine'
+        }
+        h.update(json.dumps(parametros, sort_keys=True).encode('utf-8'))
+        return h.hexdigest()
+    
+    def _caminho_cache(self) -> Optional[str]:
+        """Diretório do cache desta instância, ou None se o CSV não puder ser lido."""
+        try:
+            chave = self._chave_cache()
+        except OSError:
+            return None
+        nome = os.path.splitext(os.path.basename(self.arquivo_dados))[0]
+        return os.path.join(self.dir_cache, f'{nome}_v{VERSAO_CACHE}_{chave}')
+    
+    def _carregar_cache(self, caminho: str) -> bool:
+        """Carrega a matriz e as coordenadas do cache (memory-map). Retorna False se não existir."""
+        try:
+            with open(os.path.join(caminho, 'meta.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('versao') != VERSAO_CACHE:
+                return False
+            
+            modo = None if self.armazenamento == 'memoria' else 'r'
+            distancias = np.load(os.path.join(caminho, 'distancias.npy'), mmap_mode=modo)
+            ativos_coords = np.load(os.path.join(caminho, 'ativos_coords.npy'))
+            pares_faltantes = np.load(os.path.join(caminho, 'pares_faltantes.npy'))
+            pares_duplicados = np.load(os.path.join(caminho, 'pares_duplicados.npy'))
+        except (OSError, ValueError):
+            return False
+        
+        self.distancias = distancias
+        self.ativos_coords = ativos_coords
+        self.n_ativos = int(meta['n_ativos'])
+        self.diagnostico_distancias = {
+            'pares_faltantes': pares_faltantes,
+            'pares_duplicados': pares_duplicados,
+            'linhas_sem_base': int(meta['linhas_sem_base'])
+        }
+        return True
+    
+    def _salvar_cache(self, caminho: str):
+        """Grava a matriz processada no cache (escrita atômica via diretório temporário)."""
+        temporario = f'{caminho}.tmp{os.getpid()}'
+        try:
+            os.makedirs(temporario, exist_ok=True)
+            np.save(os.path.join(temporario, 'distancias.npy'), self.distancias)
+            np.save(os.path.join(temporario, 'ativos_coords.npy'), self.ativos_coords)
+            np.save(os.path.join(temporario, 'bases_coords.npy'), np.array(list(self.bases_coords.values())))
+            np.save(os.path.join(temporario, 'pares_faltantes.npy'), self.diagnostico_distancias['pares_faltantes'])
+            np.save(os.path.join(temporario, 'pares_duplicados.npy'), self.diagnostico_distancias['pares_duplicados'])
+            
+            meta = {
+                'versao': VERSAO_CACHE,
+                'arquivo_dados': os.path.basename(self.arquivo_dados),
+                'n_ativos': self.n_ativos,
+                'm_bases': self.m_bases,
+                'tipo_distancias': self.tipo_distancias,
+                'linhas_sem_base': self.diagnostico_distancias['linhas_sem_base']
+            }
+            with open(os.path.join(temporario, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+            
+            os.replace(temporario, caminho)
+        except OSError as e:
+            # Cache é só otimização: falha ao gravar não impede a execução
+            shutil.rmtree(temporario, ignore_errors=True)
+            if not os.path.isdir(caminho):  # outro processo pode ter gravado o mesmo cache
+                print(f"Aviso: não foi possível gravar o cache de distâncias: {e}")
+    
+    def _mapear_em_disco(self, distancias: np.ndarray) -> np.ndarray:
+        """Troca a matriz em RAM por um np.memmap somente leitura do arquivo .npy correspondente."""
+        if self.caminho_cache is not None and os.path.isdir(self.caminho_cache):
+            return np.load(os.path.join(self.caminho_cache, 'distancias.npy'), mmap_mode='r')
+        
+        # Sem cache: grava num arquivo temporário que some quando o processo terminar
+        os.makedirs(self.dir_cache, exist_ok=True)
+        descritor, caminho = tempfile.mkstemp(suffix='.npy', dir=self.dir_cache)
+        with os.fdopen(descritor, 'wb') as f:
+            np.save(f, distancias)
+        mapa = np.load(caminho, mmap_mode='r')
+        try:
+            os.remove(caminho)  # o mapeamento continua válido (POSIX); no Windows o arquivo fica
+        except OSError:
+            pass
+        return mapa
+    
+    def _construir_candidatos(self) -> IndiceCandidatos:
+        """Índice das k bases mais próximas de cada ativo (reaproveitado do cache quando existe)."""
+        k = min(self.k_candidatos, self.m_bases)
+        arquivo = None
+        if self.caminho_cache is not None and os.path.isdir(self.caminho_cache):
+            arquivo = os.path.join(self.caminho_cache, f'candidatos_k{k}.npy')
+        
+        if arquivo is not None and os.path.isfile(arquivo):
+            try:
+                modo = None if self.armazenamento == 'memoria' else 'r'
+                bases_ordenadas = np.load(arquivo, mmap_mode=modo)
+                if bases_ordenadas.shape == (self.n_ativos, k):
+                    return IndiceCandidatos(self.distancias, k, bases_ordenadas=bases_ordenadas)
+            except (OSError, ValueError):
+                pass
+        
+        if isinstance(self.distancias, MatrizHaversine):
+            # Sem matriz em memória: candidatos pela KD-tree das bases
+            return IndiceCandidatos(self.distancias, k, bases_ordenadas=self._ordenar_por_kdtree(k))
+        
+        candidatos = IndiceCandidatos(self.distancias, k)
+        
+        if arquivo is not None and self.n_ativos > 0:
+            temporario = f'{arquivo}.tmp{os.getpid()}'
+            try:
+                with open(temporario, 'wb') as f:
+                    np.save(f, candidatos.bases_ordenadas)
+                os.replace(temporario, arquivo)
+            except OSError:
+                # Cache é só otimização
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+        
+        return candidatos
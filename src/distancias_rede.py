@@ -0,0 +1,254 @@
+import numpy as np
+import pandas as pd
+import networkx as nx
+import hashlib
+import json
+import os
+from scipy.spatial import cKDTree
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .dados import DadosProcessor, haversine, hash_conteudo
+except ImportError:
+    # Para execução direta do arquivo
+    from dados import DadosProcessor, haversine, hash_conteudo
+
+# Versão do formato das árvores gravadas em disco
+VERSAO_ARVORES = 1
+
+class DistanciasRede:
+    # Classe que calcula distâncias ativo -> base pela malha viária (caminhos mínimos num grafo local)
+    
+    def __init__(self, arquivo_grafo: str, atributo_peso: str = 'comprimento', escala_peso: float = 1.0,
+                 usar_cache: bool = True, dir_cache: Optional[str] = None):
+        """
+        Carrega o grafo viário e prepara a localização dos pontos nos nós.
+        
+        Formatos aceitos:
+            .graphml: nós com atributos 'lat'/'lon' (ou 'y'/'x', como exporta o OSMnx) e
+                arestas com o atributo `atributo_peso`
+            outros (CSV): uma aresta por linha, 'lat_u;lon_u;lat_v;lon_v[;comprimento]' com
+                decimal ',' como o probdata.csv
+        
+        Arestas sem comprimento (atributo ausente, célula vazia ou não numérica) recebem a
+        distância de haversine entre os extremos.
+        
+        Args:
+            arquivo_grafo: Caminho do arquivo do grafo
+            atributo_peso: Atributo das arestas com o comprimento (GraphML)
+            escala_peso: Fator para converter o peso em km (ex.: 0.001 para metros)
+            usar_cache: Grava e reaproveita as árvores de caminhos mínimos de cada base
+            dir_cache: Pasta do cache (padrão: <pasta do grafo>/cache)
+        """
+        self.arquivo_grafo = arquivo_grafo
+        self.atributo_peso = atributo_peso
+        self.escala_peso = escala_peso
+        
+        self.grafo, self.nos_coords = self._carregar_grafo(arquivo_grafo)
+        self.n_nos = len(self.nos_coords)
+        
+        # KD-tree dos nós em coordenadas projetadas (equiretangular na latitude média)
+        self._cos_lat = np.cos(np.radians(np.mean(self.nos_coords[:, 0]))) if self.n_nos > 0 else 1.0
+        self._arvore_nos = cKDTree(self._projetar(self.nos_coords))
+        
+        pasta = dir_cache if dir_cache is not None else os.path.join(
+            os.path.dirname(os.path.abspath(arquivo_grafo)), 'cache')
+        self._chave = self._calcular_chave(pasta if usar_cache else None)
+        self.caminho_cache = None
+        if usar_cache:
+            nome = os.path.splitext(os.path.basename(arquivo_grafo))[0]
+            self.caminho_cache = os.path.join(pasta, f'{nome}_rede_v{VERSAO_ARVORES}_{self._chave}')
+        
+        # Árvores já calculadas nesta execução: nó raiz -> (distâncias, predecessores)
+        self._arvores: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+    
+    def chave(self) -> str:
+        """Identificador do provedor (entra na chave do cache do DadosProcessor)."""
+        return f'rede:{self._chave}'
+    
+    def calcular(self, ativos_coords: np.ndarray, bases_coords: np.ndarray) -> np.ndarray:
+        """
+        Matriz de distâncias (km) pela malha viária entre ativos e bases.
+        
+        Cada ponto é ligado ao nó mais próximo do grafo (trecho de acesso em linha reta).
+        Para cada base é usada a árvore de caminhos mínimos a partir do seu nó, calculada
+        uma vez e gravada em disco: novos ativos custam apenas consultas nas árvores.
+        Pares sem caminho no grafo recebem a distância de haversine.
+        
+        Args:
+            ativos_coords: Array (n, 2) com (lat, lon) em graus
+            bases_coords: Array (m, 2) com (lat, lon) em graus
+        
+        Returns:
+            Matriz n x m de distâncias em km
+        """
+        ativos_coords = np.asarray(ativos_coords, dtype=float).reshape(-1, 2)
+        bases_coords = np.asarray(bases_coords, dtype=float).reshape(-1, 2)
+        
+        no_ativo, acesso_ativo = self.localizar(ativos_coords)
+        no_base, acesso_base = self.localizar(bases_coords)
+        
+        distancias = np.empty((len(ativos_coords), len(bases_coords)))
+        for j, raiz in enumerate(no_base):
+            distancias_arvore, _ = self.arvore(int(raiz))
+            distancias[:, j] = acesso_ativo + distancias_arvore[no_ativo] + acesso_base[j]
+        
+        sem_caminho = ~np.isfinite(distancias)
+        if np.any(sem_caminho):
+            i, j = np.nonzero(sem_caminho)
+            distancias[i, j] = haversine(ativos_coords[i, 0], ativos_coords[i, 1],
+                                         bases_coords[j, 0], bases_coords[j, 1])
+            print(f"Aviso: {len(i)} pares (ativo, base) sem caminho no grafo viário; "
+                  f"usando distância de haversine para eles")
+        
+        return distancias
+    
+    def localizar(self, coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nó do grafo mais próximo de cada ponto.
+        
+        Returns:
+            (índice do nó, distância de acesso em km) para cada ponto
+        """
+        coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+        _, nos = self._arvore_nos.query(self._projetar(coords))
+        nos = np.asarray(nos, dtype=np.int64)
+        acesso = haversine(coords[:, 0], coords[:, 1], self.nos_coords[nos, 0], self.nos_coords[nos, 1])
+        return nos, acesso
+    
+    def arvore(self, raiz: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Árvore de caminhos mínimos até o nó `raiz` (lida do cache ou calculada com Dijkstra).
+        
+        Returns:
+            (distância de cada nó até a raiz em km, inf se inalcançável;
+             próximo nó no caminho até a raiz, -1 na raiz e nos inalcançáveis)
+        """
+        if raiz in self._arvores:
+            return self._arvores[raiz]
+        
+        arquivo = os.path.join(self.caminho_cache, f'arvore_{raiz}.npz') if self.caminho_cache else None
+        if arquivo is not None and os.path.isfile(arquivo):
+            try:
+                with np.load(arquivo) as dados:
+                    arvore = (dados['distancias'], dados['predecessores'])
+                if len(arvore[0]) == self.n_nos:
+                    self._arvores[raiz] = arvore
+                    return arvore
+            except (OSError, ValueError, KeyError):
+                pass
+        
+        # Em grafo direcionado a árvore é calculada no grafo reverso (caminhos ativo -> base)
+        grafo = self.grafo.reverse(copy=False) if self.grafo.is_directed() else self.grafo
+        predecessores_no, distancias_no = nx.dijkstra_predecessor_and_distance(grafo, raiz, weight='peso')
+        
+        distancias = np.full(self.n_nos, np.inf)
+        predecessores = np.full(self.n_nos, -1, dtype=np.int64)
+        nos = np.fromiter(distancias_no.keys(), dtype=np.int64, count=len(distancias_no))
+        distancias[nos] = np.fromiter(distancias_no.values(), dtype=float, count=len(distancias_no))
+        for no, anteriores in predecessores_no.items():
+            if anteriores:
+                predecessores[no] = anteriores[0]
+        
+        arvore = (distancias, predecessores)
+        self._arvores[raiz] = arvore
+        
+        if arquivo is not None:
+            temporario = f'{arquivo}.tmp{os.getpid()}.npz'
+            try:
+                os.makedirs(self.caminho_cache, exist_ok=True)
+                np.savez(temporario, distancias=distancias, predecessores=predecessores)
+                os.replace(temporario, arquivo)
+            except OSError:
+                # Cache é só otimização
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+        
+        return arvore
+    
+    def caminho(self, ponto: Tuple[float, float], base: Tuple[float, float]) -> List[Tuple[float, float]]:
+        """Coordenadas dos nós do caminho mínimo de um ponto até uma base (para visualização)."""
+        no_ponto, _ = self.localizar(np.array([ponto]))
+        no_base, _ = self.localizar(np.array([base]))
+        _, predecessores = self.arvore(int(no_base[0]))
+        
+        no = int(no_ponto[0])
+        if no != no_base[0] and predecessores[no] < 0:
+            return []
+        caminho = [tuple(ponto)]
+        while no >= 0:
+            caminho.append(tuple(self.nos_coords[no]))
+            no = int(predecessores[no])
+        caminho.append(tuple(base))
+        return caminho
+    
+    def _projetar(self, coords: np.ndarray) -> np.ndarray:
+        """Projeção equiretangular (graus de latitude) usada na busca do nó mais próximo."""
+        return np.column_stack([coords[:, 0], coords[:, 1] * self._cos_lat])
+    
+    def _carregar_grafo(self, arquivo: str) -> Tuple[nx.Graph, np.ndarray]:
+        """Lê o grafo e o renumera com nós 0..N-1 e peso 'peso' em km."""
+        if arquivo.lower().endswith('.graphml'):
+            original = nx.read_graphml(arquivo)
+            nos = list(original.nodes)
+            indice = {no: k for k, no in enumerate(nos)}
+            coords = np.empty((len(nos), 2))
+            for k, no in enumerate(nos):
+                atributos = original.nodes[no]
+                lat = atributos.get('lat', atributos.get('y'))
+                lon = atributos.get('lon', atributos.get('x'))
+                if lat is None or lon is None:
+                    raise ValueError(f"nó {no!r} do grafo sem coordenadas ('lat'/'lon' ou 'y'/'x')")
+                coords[k] = (float(lat), float(lon))
+            
+            grafo = nx.DiGraph() if original.is_directed() else nx.Graph()
+            grafo.add_nodes_from(range(len(nos)))
+            for u, v, atributos in original.edges(data=True):
+                a, b = indice[u], indice[v]
+                peso = pd.to_numeric(atributos.get(self.atributo_peso), errors='coerce')
+                if np.isnan(peso):
+                    peso = float(haversine(*coords[a], *coords[b]))
+                else:
+                    peso = float(peso) * self.escala_peso
+                # Arestas paralelas (multigrafo): vale a mais curta
+                if not grafo.has_edge(a, b) or grafo[a][b]['peso'] > peso:
+                    grafo.add_edge(a, b, peso=peso)
+            return grafo, coords
+        
+        # Lista de arestas com coordenadas dos extremos
+        tabela = pd.read_csv(arquivo, sep=';', header=None, decimal=',')
+        tabela = tabela.apply(pd.to_numeric, errors='coerce').dropna(subset=[0, 1, 2, 3])
+        valores = tabela.to_numpy(dtype=float)
+        extremos = np.vstack([valores[:, 0:2], valores[:, 2:4]])
+        
+        # Nós identificados pela grade de 1e-6 graus, como os ativos no DadosProcessor
+        codigos, chaves = pd.factorize(DadosProcessor._chaves_grade(extremos[:, 0], extremos[:, 1], 1e-6))
+        _, primeira = np.unique(codigos, return_index=True)
+        coords = extremos[primeira]
+        u, v = codigos[:len(valores)], codigos[len(valores):]
+        
+        # Comprimento vazio (ou ausente) na linha: a aresta recebe a distância de haversine
+        pesos = haversine(coords[u, 0], coords[u, 1], coords[v, 0], coords[v, 1])
+        if valores.shape[1] > 4:
+            tem_peso = ~np.isnan(valores[:, 4])
+            pesos[tem_peso] = valores[tem_peso, 4] * self.escala_peso
+        
+        grafo = nx.Graph()
+        grafo.add_nodes_from(range(len(coords)))
+        for a, b, peso in zip(u.tolist(), v.tolist(), pesos.tolist()):
+            if not grafo.has_edge(a, b) or grafo[a][b]['peso'] > peso:
+                grafo.add_edge(a, b, peso=peso)
+        return grafo, coords
+    
+    def _calcular_chave(self, dir_indice: Optional[str]) -> str:
+        """
+        Hash do arquivo do grafo e dos parâmetros de leitura. O hash do arquivo vem do índice
+        de tamanho e mtime em dir_indice (ver hash_conteudo): grafos grandes só são relidos
+        quando mudam.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(hash_conteudo(self.arquivo_grafo, dir_indice).encode('utf-8'))
+        parametros = {'versao': VERSAO_ARVORES, 'atributo_peso': self.atributo_peso,
+                      'escala_peso': self.escala_peso}
+        h.update(json.dumps(parametros, sort_keys=True).encode('utf-8'))
+        return h.hexdigest()
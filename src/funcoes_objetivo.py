@@ -1,5 +1,11 @@
 import numpy as np
-from typing import Tuple
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .nucleos import NucleosNumpy, criar_nucleos, comparar_nucleos
+except ImportError:
+    # Para execução direta do arquivo
+    from nucleos import NucleosNumpy, criar_nucleos, comparar_nucleos
 
 class FuncoesObjetivo:
     # Classe que calcula as funções objetivo f1 e f2 e verifica se as restrições estão sendo respeitadas
@@ -12,6 +18,33 @@ class FuncoesObjetivo:
         self.s_equipes = monitoramento.s_equipes
         self.eta = monitoramento.eta
         self.distancias = monitoramento.distancias
+        # Núcleos de avaliação (NumPy, ou Numba se instalado; ver usar_nucleos)
+        self.usar_nucleos()
+    
+    def usar_nucleos(self, nome: Optional[str] = None, verificar: bool = False):
+        """
+        Escolhe o backend dos núcleos de avaliação ('auto', 'numpy' ou 'numba'; padrão: variável
+        de ambiente MONITORAMENTO_NUCLEOS ou 'auto').
+        
+        Args:
+            nome: Backend pedido
+            verificar: Compara o backend com o NumPy nos dados do problema e volta para o
+                NumPy se algum núcleo der resultado diferente (fora do caminho padrão: a
+                comparação custa mais que o resto da inicialização em instâncias grandes)
+        
+        Returns:
+            O backend em uso
+        """
+        nucleos = criar_nucleos(nome)
+        if verificar and type(nucleos) is not NucleosNumpy:
+            iguais = comparar_nucleos(nucleos, NucleosNumpy(), self.distancias, self.s_equipes,
+                                      self.eta * self.n_ativos / self.s_equipes)
+            if not all(iguais.values()):
+                diferentes = [nucleo for nucleo, igual in iguais.items() if not igual]
+                print(f"Aviso: núcleos {nucleos.nome} diferem do NumPy em {diferentes}; usando NumPy")
+                nucleos = NucleosNumpy()
+        self.nucleos = nucleos
+        return nucleos
     
     def calcular_f1(self, x_ij: np.ndarray, h_ik: np.ndarray, y_jk: np.ndarray) -> float:
         # f1 = soma de todas as distâncias dos ativos até suas respectivas equipes de manutenção
@@ -21,18 +54,20 @@ class FuncoesObjetivo:
         
         # Calcula distância total considerando que cada ativo deve estar próximo de sua equipe
         # A distância é calculada entre o ativo e a base onde sua equipe está alocada
-        distancia_total = 0.0
         
-        for i in range(self.n_ativos):
-            for k in range(self.s_equipes):
-                if h_ik[i, k] == 1:  # Se ativo i está na equipe k
-                    # Encontra a base onde a equipe k está alocada
-                    for j in range(self.m_bases):
-                        if y_jk[j, k] == 1:  # Se equipe k está na base j
-                            distancia_total += self.distancias[i, j]
-                            break
+        # Base de cada equipe: primeira base j com y_jk[j, k] == 1 (equipes sem base não contam)
+        equipe_na_base = (y_jk == 1)
+        base_equipe = np.argmax(equipe_na_base, axis=0)
+        equipe_alocada = np.any(equipe_na_base, axis=0)
         
-        return distancia_total
+        # Pares (ativo, equipe) em ordem de ativo e depois de equipe, como no laço original
+        ativos, equipes = np.nonzero((h_ik == 1) & equipe_alocada[None, :])
+        if len(ativos) == 0:
+            return 0.0
+        
+        valores = np.asarray(self.distancias[ativos, base_equipe[equipes]], dtype=np.float64)
+        # Soma sequencial (cumsum), igual bit a bit à acumulação ativo por ativo
+        return float(np.cumsum(valores)[-1])
     
     def calcular_f2(self, h_ik: np.ndarray, y_jk: np.ndarray = None) -> float:
         # f2 = número de equipes que estão sendo usadas (S)
@@ -50,68 +85,218 @@ class FuncoesObjetivo:
         Calcula a medida quantitativa de violação das restrições.
         Retorna 0 se a solução é viável, caso contrário retorna a soma das violações ao quadrado.
         """
-        violacao_total = 0.0
+        parcelas = [p[p != 0] for p in self._parcelas_violacao(x_ij, y_jk, h_ik)]
+        todas = np.concatenate(parcelas).astype(np.float64)
+        if len(todas) == 0:
+            return 0.0
+        # Soma sequencial (cumsum) na ordem das restrições, igual à acumulação restrição a restrição
+        return float(np.cumsum(todas)[-1])
+    
+    def calcular_violacao_detalhada(self, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray) -> Dict[str, float]:
+        """
+        Violação separada por restrição ('restricao_1' a 'restricao_6') e o total
+        (o mesmo valor de calcular_violacao).
+        """
+        detalhes = {}
+        for r, parcela in enumerate(self._parcelas_violacao(x_ij, y_jk, h_ik), start=1):
+            parcela = parcela[parcela != 0].astype(np.float64)
+            detalhes[f'restricao_{r}'] = float(np.cumsum(parcela)[-1]) if len(parcela) > 0 else 0.0
+        detalhes['total'] = self.calcular_violacao(x_ij, y_jk, h_ik)
+        return detalhes
+    
+    def _parcelas_violacao(self, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray) -> List[np.ndarray]:
+        """
+        Parcelas de violação de cada uma das seis restrições, vetorizadas, na mesma ordem
+        em que eram acumuladas (equipe a equipe, ativo a ativo).
+        """
+        soma_equipe = np.sum(y_jk, axis=0)      # bases de cada equipe
+        ativos_equipe = np.sum(h_ik, axis=0)    # ativos de cada equipe
         
         # Restrição 1: cada equipe tem que estar em exatamente uma base (se estiver sendo usada)
-        for k in range(self.s_equipes):
-            soma_equipe = np.sum(y_jk[:, k])
-            ativos_equipe = np.sum(h_ik[:, k])
-            
-            # Equipe não pode estar em mais de uma base
-            if soma_equipe > 1:
-                violacao_total += (soma_equipe - 1)**2
-            
-            # Se tem ativos, tem que estar em exatamente uma base
-            if ativos_equipe > 0 and soma_equipe != 1:
-                violacao_total += (abs(soma_equipe - 1))**2
-            
-            # Se está numa base, tem que ter ativos
-            if soma_equipe == 1 and ativos_equipe == 0:
-                violacao_total += 1.0
+        # Por equipe: mais de uma base; tem ativos mas não exatamente uma base; base sem ativos
+        r1 = np.column_stack([
+            np.where(soma_equipe > 1, (soma_equipe - 1)**2, 0),
+            np.where((ativos_equipe > 0) & (soma_equipe != 1), np.abs(soma_equipe - 1)**2, 0),
+            np.where((soma_equipe == 1) & (ativos_equipe == 0), 1.0, 0.0)
+        ]).ravel()
         
         # Restrição 2: cada ativo tem que estar em exatamente uma base
-        for i in range(self.n_ativos):
-            soma_bases = np.sum(x_ij[i, :])
-            if soma_bases != 1:
-                violacao_total += (soma_bases - 1)**2
+        soma_bases = np.sum(x_ij, axis=1)
+        r2 = np.where(soma_bases != 1, (soma_bases - 1)**2, 0)
         
         # Restrição 3: ativo só pode estar numa base se a base tiver pelo menos uma equipe
-        for i in range(self.n_ativos):
-            for j in range(self.m_bases):
-                if x_ij[i, j] == 1:  # se ativo i está na base j
-                    if np.sum(y_jk[j, :]) == 0:  # base j não tem nenhuma equipe
-                        violacao_total += 1.0
+        base_sem_equipe = np.sum(y_jk, axis=1) == 0
+        r3 = np.ones(np.count_nonzero((x_ij == 1) & base_sem_equipe[None, :]))
         
         # Restrição 4: cada ativo tem que estar em exatamente uma equipe
-        for i in range(self.n_ativos):
-            soma_equipes = np.sum(h_ik[i, :])
-            if soma_equipes != 1:
-                violacao_total += (soma_equipes - 1)**2
+        soma_equipes = np.sum(h_ik, axis=1)
+        r4 = np.where(soma_equipes != 1, (soma_equipes - 1)**2, 0)
         
         # Restrição 5: ativo só pode estar numa equipe se a equipe estiver na base do ativo
-        for i in range(self.n_ativos):
-            for k in range(self.s_equipes):
-                if h_ik[i, k] == 1:  # se ativo i está na equipe k
-                    # Encontra a base onde o ativo i está alocado
-                    base_ativo = np.where(x_ij[i, :] == 1)[0]
-                    if len(base_ativo) > 0:
-                        base_id = base_ativo[0]
-                        # Verifica se a equipe k está na mesma base onde o ativo i está alocado
-                        if y_jk[base_id, k] != 1:  # equipe k não está na base do ativo
-                            violacao_total += 1.0
+        ativo_na_base = (x_ij == 1)
+        base_ativo = np.argmax(ativo_na_base, axis=1)   # primeira base do ativo
+        tem_base = np.any(ativo_na_base, axis=1)
+        fora_da_base = (h_ik == 1) & tem_base[:, None] & (y_jk[base_ativo, :] != 1)
+        r5 = np.ones(np.count_nonzero(fora_da_base))
         
         # Restrição 6: cada equipe tem que ter pelo menos eta*n/s ativos (se estiver sendo usada)
-        for k in range(self.s_equipes):
-            ativos_equipe = np.sum(h_ik[:, k])
-            if ativos_equipe > 0:  # só verifica se a equipe tem ativos
-                minimo_ativos = self.eta * self.n_ativos / self.s_equipes
-                if ativos_equipe < minimo_ativos:
-                    violacao_total += (minimo_ativos - ativos_equipe)**2
+        minimo_ativos = self.eta * self.n_ativos / self.s_equipes
+        r6 = np.where((ativos_equipe > 0) & (ativos_equipe < minimo_ativos),
+                      (minimo_ativos - ativos_equipe)**2, 0.0)
         
-        return violacao_total
+        return [r1, r2, r3, r4, r5, r6]
     
     def verificar_restricoes(self, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray) -> bool:
         """
         Verifica se a solução respeita todas as restrições (retorna True/False).
         """
         return self.calcular_violacao(x_ij, y_jk, h_ik) == 0.0
+    
+    # Avaliação incremental sobre uma Solucao (vetores de índices) mantida pelo chamador.
+    # Cada delta retorna (delta_f1, delta_f2, delta_violacao) do movimento, sem aplicá-lo;
+    # depois de aceito, o movimento é aplicado com o método correspondente da Solucao.
+    
+    def calcular_f1_solucao(self, solucao) -> float:
+        """f1 de uma Solucao (mesmo valor de calcular_f1 nas matrizes equivalentes)."""
+        return self.nucleos.f1(self.distancias, solucao.equipe_ativo, solucao.base_equipe)
+    
+    def calcular_f2_solucao(self, solucao) -> float:
+        """f2 de uma Solucao: equipes com pelo menos um ativo."""
+        return float(np.count_nonzero(solucao.carga_equipe > 0))
+    
+    def valor_solucao(self, solucao, funcao_objetivo: str) -> float:
+        """f1 ou f2 de uma Solucao; f1 fica guardado na própria Solucao até ela mudar."""
+        if funcao_objetivo == 'f1':
+            if solucao.f1 is None:
+                solucao.f1 = self.calcular_f1_solucao(solucao)
+            return solucao.f1
+        return self.calcular_f2_solucao(solucao)
+    
+    def verificar_restricoes_solucao(self, solucao) -> bool:
+        """Verifica se a Solucao é viável."""
+        return self.violacao_solucao(solucao) == 0.0
+    
+    def violacao_solucao(self, solucao) -> float:
+        """
+        Violação de uma Solucao. Nos vetores de índices cada ativo tem uma base e uma equipe
+        e fica na base da equipe (restrições 2 a 5 valem por construção); restam a restrição 1
+        (equipe alocada sem ativos, ou com ativos sem base) e a 6 (mínimo de ativos por equipe).
+        """
+        return self.nucleos.violacao_equipes(solucao.carga_equipe, solucao.base_equipe,
+                                             self.eta * self.n_ativos / self.s_equipes)
+    
+    def _violacao_equipe(self, carga: int, alocada: bool) -> float:
+        """Parcela de violação de uma equipe com `carga` ativos (alocada = tem base)."""
+        violacao = 0.0
+        if alocada and carga == 0:
+            violacao += 1.0
+        if not alocada and carga > 0:
+            violacao += 1.0
+        minimo_ativos = self.eta * self.n_ativos / self.s_equipes
+        if 0 < carga < minimo_ativos:
+            violacao += (minimo_ativos - carga)**2
+        return violacao
+    
+    def avaliar_lote(self, equipe_ativo: np.ndarray, base_equipe: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Avalia B soluções empilhadas de uma vez (mesmos valores de calcular_f1_solucao,
+        calcular_f2_solucao e violacao_solucao para cada linha).
+        
+        Args:
+            equipe_ativo: Array (B, n_ativos) com a equipe de cada ativo, -1 se nenhuma
+            base_equipe: Array (B, s_equipes) com a base de cada equipe, -1 se não alocada
+                (a base de cada ativo é a da sua equipe)
+        
+        Returns:
+            Vetores (B) de f1, f2 e violação
+        """
+        return self.nucleos.avaliar_lote(self.distancias, np.asarray(equipe_ativo), np.asarray(base_equipe),
+                                         self.eta * self.n_ativos / self.s_equipes)
+    
+    def avaliar_solucoes(self, solucoes: List) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """avaliar_lote para uma lista de Solucao."""
+        return self.avaliar_lote(np.stack([sol.equipe_ativo for sol in solucoes]),
+                                 np.stack([sol.base_equipe for sol in solucoes]))
+    
+    def _distancia_equipe(self, solucao, i: int, k: int) -> float:
+        """Distância do ativo i à base da equipe k (0 se a equipe não tem base)."""
+        if k < 0 or solucao.base_equipe[k] < 0:
+            return 0.0
+        return float(self.distancias[i, solucao.base_equipe[k]])
+    
+    def _soma_distancias(self, ativos: np.ndarray, j: int) -> float:
+        """Soma das distâncias dos ativos à base j (0 se j < 0)."""
+        if j < 0 or len(ativos) == 0:
+            return 0.0
+        return float(np.sum(np.asarray(self.distancias[ativos, j], dtype=np.float64)))
+    
+    def delta_mover_ativo(self, solucao, i: int, k: int) -> Tuple[float, float, float]:
+        """Delta de passar o ativo i para a equipe k (SHIFT na mesma base ou troca de base). O(1)."""
+        k_antiga = int(solucao.equipe_ativo[i])
+        if k == k_antiga:
+            return 0.0, 0.0, 0.0
+        
+        delta_f1 = self._distancia_equipe(solucao, i, k) - self._distancia_equipe(solucao, i, k_antiga)
+        delta_f2 = 0.0
+        delta_violacao = 0.0
+        
+        if k_antiga >= 0:
+            carga = int(solucao.carga_equipe[k_antiga])
+            alocada = solucao.base_equipe[k_antiga] >= 0
+            delta_violacao += self._violacao_equipe(carga - 1, alocada) - self._violacao_equipe(carga, alocada)
+            delta_f2 -= carga == 1
+        
+        carga = int(solucao.carga_equipe[k])
+        alocada = solucao.base_equipe[k] >= 0
+        delta_violacao += self._violacao_equipe(carga + 1, alocada) - self._violacao_equipe(carga, alocada)
+        delta_f2 += carga == 0
+        
+        return delta_f1, delta_f2, delta_violacao
+    
+    def delta_realocar_equipe(self, solucao, k: int, j: int,
+                              ativos: Optional[np.ndarray] = None) -> Tuple[float, float, float]:
+        """Delta de levar a equipe k, com seus ativos, para a base j. O(ativos da equipe)."""
+        if ativos is None:
+            ativos = np.flatnonzero(solucao.equipe_ativo == k)
+        base_atual = int(solucao.base_equipe[k])
+        delta_f1 = self._soma_distancias(ativos, j) - self._soma_distancias(ativos, base_atual)
+        
+        carga = int(solucao.carga_equipe[k])
+        delta_violacao = self._violacao_equipe(carga, j >= 0) - self._violacao_equipe(carga, base_atual >= 0)
+        return delta_f1, 0.0, delta_violacao
+    
+    # Modelo agregado por base (SolucaoAgregada): f1 só depende da base de cada ativo e as
+    # equipes de uma base recebem a divisão balanceada dos seus ativos (SolucaoAgregada.equipes)
+    
+    def calcular_f1_agregada(self, solucao) -> float:
+        """f1 de uma SolucaoAgregada (mesmo valor da Solucao exportada por para_solucao)."""
+        # Cada base com equipe faz o papel de uma "equipe" do núcleo de f1
+        bases = np.where(solucao.equipes_base > 0, np.arange(self.m_bases), -1)
+        return self.nucleos.f1(self.distancias, solucao.base_ativo, bases)
+    
+    def calcular_f2_agregada(self, solucao) -> float:
+        """f2 de uma SolucaoAgregada: equipes com pelo menos um ativo na divisão balanceada."""
+        return float(np.sum(np.minimum(solucao.equipes_base, solucao.carga_base)))
+    
+    def violacao_agregada(self, solucao) -> float:
+        """Violação de uma SolucaoAgregada (restrições 1 e 6 nas equipes da divisão balanceada)."""
+        base_equipe, carga_equipe = solucao.equipes(self.s_equipes)
+        return self.nucleos.violacao_equipes(carga_equipe, base_equipe,
+                                             self.eta * self.n_ativos / self.s_equipes)
+    
+    def valor_agregada(self, solucao, funcao_objetivo: str) -> float:
+        """f1 ou f2 de uma SolucaoAgregada; f1 fica guardado na própria solução até ela mudar."""
+        if funcao_objetivo == 'f1':
+            if solucao.f1 is None:
+                solucao.f1 = self.calcular_f1_agregada(solucao)
+            return solucao.f1
+        return self.calcular_f2_agregada(solucao)
+    
+    def bases_viaveis(self, carga_base: np.ndarray, equipes_base: np.ndarray) -> np.ndarray:
+        """
+        Bases sem violação no modelo agregado (vetorizado): sem ativos nem equipes, ou com
+        equipes e a menor equipe da divisão balanceada com pelo menos max(1, eta*n/s) ativos.
+        """
+        minimo_ativos = max(1.0, self.eta * self.n_ativos / self.s_equipes)
+        menor_equipe = carga_base // np.maximum(equipes_base, 1)
+        return np.where(equipes_base > 0, menor_equipe >= minimo_ativos, carga_base == 0)
@@ -0,0 +1,187 @@
+import numpy as np
+import json
+import os
+from typing import Dict, Optional
+
+try:
+    from .dados import DadosProcessor, BASES_COORDS, distancias_haversine
+except ImportError:
+    # Para execução direta do arquivo
+    from dados import DadosProcessor, BASES_COORDS, distancias_haversine
+
+# Casas decimais gravadas no CSV (as mesmas usadas na matriz do cache)
+CASAS_DECIMAIS = 8
+
+class GeradorInstancias:
+    # Classe que gera instâncias sintéticas no formato do probdata.csv para testes de escala
+    
+    def __init__(self, semente: int = 0):
+        # Gerador aleatório próprio: a mesma semente sempre produz a mesma instância
+        self.semente = semente
+        self.rng = np.random.default_rng(semente)
+        
+        # Região das bases da especificação, com 10% de margem
+        coords = np.array(list(BASES_COORDS.values()))
+        margem = 0.1 * (coords.max(axis=0) - coords.min(axis=0))
+        self.coord_min = coords.min(axis=0) - margem
+        self.coord_max = coords.max(axis=0) + margem
+    
+    def gerar(self, arquivo: str, n_ativos: int, m_bases: int = 14, s_equipes: int = 8, eta: float = 0.2,
+              geografia: str = 'agrupada', n_grupos: Optional[int] = None, dispersao: float = 0.03,
+              gravar_cache: bool = True, **opcoes_dados) -> Dict:
+        """
+        Gera uma instância sintética e grava o CSV longo (base;ativo;distância).
+        
+        Args:
+            arquivo: Caminho do CSV de saída
+            n_ativos: Número de ativos
+            m_bases: Número de bases (as primeiras vêm da especificação, o resto é sorteado na região)
+            s_equipes: Número máximo de equipes
+            eta: Percentual mínimo de ativos por equipe
+            geografia: 'uniforme' ou 'agrupada' (ativos em torno de centros sorteados)
+            n_grupos: Número de agrupamentos (padrão: m_bases)
+            dispersao: Desvio padrão dos agrupamentos, em fração do tamanho da região
+            gravar_cache: Se True, grava também o cache binário da matriz de distâncias
+            **opcoes_dados: Repassadas ao DadosProcessor ao gravar o cache (tipo_distancias, ...)
+        
+        Returns:
+            Dicionário com o arquivo, os parâmetros da instância (opcoes_dados) e a matriz gerada
+        """
+        if geografia not in ('uniforme', 'agrupada'):
+            raise ValueError(f"geografia deve ser 'uniforme' ou 'agrupada', recebido {geografia!r}")
+        
+        bases = self._gerar_bases(m_bases)
+        if geografia == 'uniforme':
+            ativos = self._sortear_na_regiao(n_ativos)
+        else:
+            ativos = self._gerar_ativos_agrupados(n_ativos, bases, n_grupos or m_bases, dispersao)
+        ativos = self._remover_coincidentes(ativos, geografia, bases, n_grupos or m_bases, dispersao)
+        
+        distancias = self._arredondar(distancias_haversine(ativos, bases))
+        bases_coords = {j + 1: (float(lat), float(lon)) for j, (lat, lon) in enumerate(bases)}
+        
+        self._gravar_csv(arquivo, ativos, bases, distancias)
+        
+        # Parâmetros da instância ficam ao lado do CSV, para recriar o problema depois
+        parametros = {
+            'semente': self.semente,
+            'n_ativos': n_ativos,
+            'm_bases': m_bases,
+            's_equipes': s_equipes,
+            'eta': eta,
+            'geografia': geografia,
+            'bases_coords': {str(j): list(coord) for j, coord in bases_coords.items()}
+        }
+        with open(self.arquivo_parametros(arquivo), 'w', encoding='utf-8') as f:
+            json.dump(parametros, f, indent=2)
+        
+        opcoes_instancia = {'bases_coords': bases_coords, 's_equipes': s_equipes, 'eta': eta}
+        if gravar_cache:
+            DadosProcessor(arquivo, matriz=(distancias, ativos), **opcoes_instancia, **opcoes_dados)
+        
+        return {
+            'arquivo': arquivo,
+            'opcoes_dados': opcoes_instancia,
+            'distancias': distancias,
+            'ativos_coords': ativos,
+            'bases_coords': bases_coords
+        }
+    
+    @staticmethod
+    def arquivo_parametros(arquivo: str) -> str:
+        """Caminho do JSON com os parâmetros da instância gerada para `arquivo`."""
+        return os.path.splitext(arquivo)[0] + '.json'
+    
+    @staticmethod
+    def carregar_opcoes(arquivo: str) -> Dict:
+        """
+        Lê os parâmetros de uma instância gerada, no formato aceito pelo DadosProcessor.
+        
+        Uso: MonitoramentoAtivosCompleto(arquivo, **GeradorInstancias.carregar_opcoes(arquivo))
+        """
+        with open(GeradorInstancias.arquivo_parametros(arquivo), 'r', encoding='utf-8') as f:
+            parametros = json.load(f)
+        return {
+            'bases_coords': {int(j): tuple(coord) for j, coord in parametros['bases_coords'].items()},
+            's_equipes': parametros['s_equipes'],
+            'eta': parametros['eta']
+        }
+    
+    def _gerar_bases(self, m_bases: int) -> np.ndarray:
+        """Bases da especificação seguidas de bases sorteadas uniformemente na região."""
+        especificacao = np.array(list(BASES_COORDS.values()))[:m_bases]
+        extras = self._sortear_na_regiao(m_bases - len(especificacao))
+        return self._arredondar(np.vstack([especificacao, extras]))
+    
+    def _sortear_na_regiao(self, quantidade: int) -> np.ndarray:
+        """Pontos uniformes na região das bases."""
+        return self._arredondar(self.rng.uniform(self.coord_min, self.coord_max, size=(quantidade, 2)))
+    
+    def _gerar_ativos_agrupados(self, quantidade: int, bases: np.ndarray, n_grupos: int,
+                                dispersao: float) -> np.ndarray:
+        """Ativos em agrupamentos gaussianos centrados em bases sorteadas."""
+        centros = bases[self.rng.choice(len(bases), size=n_grupos, replace=n_grupos > len(bases))]
+        grupo = self.rng.integers(n_grupos, size=quantidade)
+        desvio = dispersao * (self.coord_max - self.coord_min)
+        ativos = centros[grupo] + self.rng.normal(size=(quantidade, 2)) * desvio
+        return self._arredondar(np.clip(ativos, self.coord_min, self.coord_max))
+    
+    def _remover_coincidentes(self, ativos: np.ndarray, geografia: str, bases: np.ndarray,
+                              n_grupos: int, dispersao: float) -> np.ndarray:
+        """Sorteia de novo ativos que cairiam na mesma célula da grade do DadosProcessor."""
+        while True:
+            chaves = DadosProcessor._chaves_grade(ativos[:, 0], ativos[:, 1], 1e-6)
+            _, primeira = np.unique(chaves, return_index=True)
+            repetidos = np.setdiff1d(np.arange(len(ativos)), primeira)
+            if len(repetidos) == 0:
+                return ativos
+            if geografia == 'uniforme':
+                ativos[repetidos] = self._sortear_na_regiao(len(repetidos))
+            else:
+                ativos[repetidos] = self._gerar_ativos_agrupados(len(repetidos), bases, n_grupos, dispersao)
+    
+    @staticmethod
+    def _arredondar(valores: np.ndarray) -> np.ndarray:
+        """Arredonda para as casas gravadas no CSV (o valor lido do arquivo é o mesmo)."""
+        escala = 10.0 ** CASAS_DECIMAIS
+        return np.rint(valores * escala) / escala
+    
+    def _gravar_csv(self, arquivo: str, ativos: np.ndarray, bases: np.ndarray, distancias: np.ndarray):
+        """Grava o CSV no formato do probdata.csv, uma base por vez (todas as linhas de cada base)."""
+        pasta = os.path.dirname(os.path.abspath(arquivo))
+        os.makedirs(pasta, exist_ok=True)
+        
+        # As coordenadas dos ativos são formatadas uma única vez e reaproveitadas em todas as bases
+        casas = CASAS_DECIMAIS
+        ativos_txt = [f'{lat:.{casas}f};{lon:.{casas}f}' for lat, lon in ativos.tolist()]
+        
+        with open(arquivo, 'w', encoding='utf-8', newline='') as f:
+            for j, (lat_base, lon_base) in enumerate(bases.tolist()):
+                prefixo = f'{lat_base:.{casas}f};{lon_base:.{casas}f};'
+                linhas = [f'{prefixo}{ativo};{d:.{casas}f}\n'
+                          for ativo, d in zip(ativos_txt, distancias[:, j].tolist())]
+                # Decimal com vírgula, como no arquivo original
+                f.write(''.join(linhas).replace('.', ','))
+
+def main():
+    """Gera uma instância sintética pela linha de comando."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Gera instância sintética no formato do probdata.csv')
+    parser.add_argument('arquivo', help='CSV de saída')
+    parser.add_argument('--ativos', type=int, required=True)
+    parser.add_argument('--bases', type=int, default=14)
+    parser.add_argument('--equipes', type=int, default=8)
+    parser.add_argument('--eta', type=float, default=0.2)
+    parser.add_argument('--geografia', choices=['uniforme', 'agrupada'], default='agrupada')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--sem-cache', action='store_true')
+    args = parser.parse_args()
+    
+    gerador = GeradorInstancias(args.semente)
+    gerador.gerar(args.arquivo, args.ativos, args.bases, args.equipes, args.eta,
+                  geografia=args.geografia, gravar_cache=not args.sem_cache)
+    print(f"Instância gravada em {args.arquivo} ({args.ativos * args.bases} linhas)")
+
+if __name__ == "__main__":
+    main()
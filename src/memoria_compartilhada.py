@@ -0,0 +1,208 @@
+import numpy as np
+import atexit
+import os
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+try:
+    from .dados import MatrizHaversine
+    from .candidatos import IndiceCandidatos
+    from .solucoes_iniciais import GeradorSolucoes
+    from .funcoes_objetivo import FuncoesObjetivo
+    from .busca_local import BuscaLocal
+    from .busca_agregada import BuscaLocalAgregada
+    from .algoritmos_vns import AlgoritmoVNS
+except ImportError:
+    # Para execução direta do arquivo
+    from dados import MatrizHaversine
+    from candidatos import IndiceCandidatos
+    from solucoes_iniciais import GeradorSolucoes
+    from funcoes_objetivo import FuncoesObjetivo
+    from busca_local import BuscaLocal
+    from busca_agregada import BuscaLocalAgregada
+    from algoritmos_vns import AlgoritmoVNS
+
+# Alinhamento (bytes) de cada array dentro do bloco compartilhado
+ALINHAMENTO = 64
+
+class DadosCompartilhados:
+    # Classe que publica os dados imutáveis do problema num bloco de memória compartilhada
+    
+    def __init__(self, monitoramento):
+        """
+        Copia matriz de distâncias, coordenadas e índice de candidatos (com a poda aplicada)
+        para um único bloco de memória compartilhada.
+        
+        O bloco é removido em liberar(), ao sair do bloco `with` ou no fim do processo
+        (atexit). Se o processo morrer sem isso, o resource_tracker do multiprocessing
+        remove o bloco quando o processo dono termina.
+        
+        Args:
+            monitoramento: Instância de MonitoramentoAtivosCompleto
+        """
+        candidatos = monitoramento.candidatos
+        arrays = {
+            'ativos_coords': np.asarray(monitoramento.ativos_coords, dtype=float),
+            'bases_coords': np.array(list(monitoramento.bases_coords.values()), dtype=float),
+            'bases_ordenadas': np.asarray(candidatos.bases_ordenadas),
+            'distancias_ordenadas': np.asarray(candidatos.distancias_ordenadas),
+            'limite': np.asarray(candidatos.limite),
+            'bases_ativas': np.asarray(candidatos.bases_ativas)
+        }
+        # Distâncias sob demanda são recalculadas no trabalhador a partir das coordenadas
+        sob_demanda = isinstance(monitoramento.distancias, MatrizHaversine)
+        if not sob_demanda:
+            arrays['distancias'] = monitoramento.distancias
+        
+        # Layout: (nome, dtype, shape, deslocamento) de cada array no bloco
+        campos = []
+        tamanho = 0
+        for nome, array in arrays.items():
+            tamanho = -(-tamanho // ALINHAMENTO) * ALINHAMENTO
+            campos.append((nome, np.dtype(array.dtype).str, tuple(array.shape), tamanho))
+            tamanho += array.nbytes
+        
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, tamanho))
+        for (nome, tipo, forma, deslocamento) in campos:
+            destino = np.ndarray(forma, dtype=tipo, buffer=self._shm.buf, offset=deslocamento)
+            # Cópia em blocos de linhas (a matriz pode ser um memmap maior que a RAM livre)
+            origem = arrays[nome]
+            passo = max(1, (1 << 26) // max(1, origem.itemsize * int(np.prod(forma[1:], dtype=np.int64))))
+            for inicio in range(0, len(destino), passo):
+                destino[inicio:inicio + passo] = origem[inicio:inicio + passo]
+            del destino
+        
+        # Descritor pequeno e serializável: é o que os trabalhadores recebem
+        self.descritor = {
+            'nome': self._shm.name,
+            'campos': campos,
+            'n_ativos': monitoramento.n_ativos,
+            'm_bases': monitoramento.m_bases,
+            's_equipes': monitoramento.s_equipes,
+            'eta': monitoramento.eta,
+            'bases_coords': dict(monitoramento.bases_coords),
+            'k': candidatos.k,
+            'sob_demanda': sob_demanda,
+            'tipo_distancias': str(np.dtype(monitoramento.distancias.dtype)),
+            'nucleos': monitoramento.funcoes_objetivo.nucleos.nome
+        }
+        
+        self._pid_dono = os.getpid()
+        atexit.register(self.liberar)
+    
+    def liberar(self):
+        """Fecha e remove o bloco compartilhado (idempotente; só o processo dono remove)."""
+        if self._shm is None or os.getpid() != self._pid_dono:
+            return
+        shm, self._shm = self._shm, None
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+        atexit.unregister(self.liberar)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *excecao):
+        self.liberar()
+
+class ProblemaCompartilhado:
+    # Classe com a visão somente leitura do problema num processo trabalhador (sem pandas nem gráficos)
+    
+    def __init__(self, descritor: Dict):
+        """
+        Anexa ao bloco publicado por DadosCompartilhados, sem copiar os arrays, e monta
+        os módulos usados pelo VNS (GeradorSolucoes, FuncoesObjetivo, BuscaLocal,
+        BuscaLocalAgregada, AlgoritmoVNS).
+        
+        Args:
+            descritor: DadosCompartilhados.descritor
+        """
+        # Trabalhadores do multiprocessing usam o mesmo resource_tracker do processo dono:
+        # o registro feito ao anexar é o mesmo já existente e só o dono remove o bloco
+        self._shm = shared_memory.SharedMemory(name=descritor['nome'])
+        arrays = {}
+        for (nome, tipo, forma, deslocamento) in descritor['campos']:
+            array = np.ndarray(forma, dtype=tipo, buffer=self._shm.buf, offset=deslocamento)
+            array.flags.writeable = False
+            arrays[nome] = array
+        
+        self.n_ativos = descritor['n_ativos']
+        self.m_bases = descritor['m_bases']
+        self.s_equipes = descritor['s_equipes']
+        self.eta = descritor['eta']
+        self.bases_coords = descritor['bases_coords']
+        self.ativos_coords = arrays['ativos_coords']
+        
+        if descritor['sob_demanda']:
+            self.distancias = MatrizHaversine(arrays['ativos_coords'], arrays['bases_coords'],
+                                              descritor['tipo_distancias'])
+        else:
+            self.distancias = arrays['distancias']
+        
+        self.candidatos = IndiceCandidatos(self.distancias, descritor['k'],
+                                           bases_ordenadas=arrays['bases_ordenadas'],
+                                           distancias_ordenadas=arrays['distancias_ordenadas'])
+        self.candidatos.aplicar_poda(arrays['limite'], arrays['bases_ativas'])
+        
+        self.gerador_solucoes = GeradorSolucoes(self)
+        self.funcoes_objetivo = FuncoesObjetivo(self)
+        # Mesmo backend de núcleos do processo dono (já verificado lá)
+        self.funcoes_objetivo.usar_nucleos(descritor['nucleos'], verificar=False)
+        self.busca_local = BuscaLocal(self)
+        self.busca_agregada = BuscaLocalAgregada(self)
+        self.algoritmo_vns = AlgoritmoVNS(self)
+
+# Problema do processo trabalhador (anexado uma vez pelo inicializador do Pool)
+_problema_trabalhador: Optional[ProblemaCompartilhado] = None
+
+def _iniciar_trabalhador(descritor: Dict):
+    global _problema_trabalhador
+    _problema_trabalhador = ProblemaCompartilhado(descritor)
+
+def _executar_vns(parametros) -> Dict:
+    funcao_objetivo, max_iter, max_iter_sem_melhoria, modelo = parametros
+    return _problema_trabalhador.algoritmo_vns.vns(funcao_objetivo, max_iter, max_iter_sem_melhoria, modelo)
+
+class ExecutorParalelo:
+    # Classe que executa várias rodadas do VNS em processos que compartilham os dados do problema
+    
+    def __init__(self, monitoramento, processos: Optional[int] = None):
+        """
+        Publica os dados uma única vez e cria o pool de trabalhadores.
+        
+        Args:
+            monitoramento: Instância de MonitoramentoAtivosCompleto
+            processos: Número de processos (padrão: todos os núcleos)
+        """
+        self.processos = processos or os.cpu_count() or 1
+        self.dados = DadosCompartilhados(monitoramento)
+        try:
+            self.pool = multiprocessing.Pool(self.processos, initializer=_iniciar_trabalhador,
+                                             initargs=(self.dados.descritor,))
+        except Exception:
+            self.dados.liberar()
+            raise
+    
+    def vns(self, funcao_objetivo: str, n_execucoes: int, max_iter: int = 1000,
+            max_iter_sem_melhoria: int = 50, modelo: str = 'completo') -> List[Dict]:
+        """Executa n_execucoes independentes do VNS em paralelo (cada uma com semente própria)."""
+        parametros = [(funcao_objetivo, max_iter, max_iter_sem_melhoria, modelo)] * n_execucoes
+        return self.pool.map(_executar_vns, parametros, chunksize=1)
+    
+    def fechar(self):
+        """Encerra os trabalhadores e remove o bloco compartilhado."""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        self.dados.liberar()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *excecao):
+        self.fechar()
@@ -17,7 +17,10 @@ try:
     from .solucoes_iniciais import GeradorSolucoes
     from .funcoes_objetivo import FuncoesObjetivo
     from .busca_local import BuscaLocal
+    from .busca_agregada import BuscaLocalAgregada
     from .algoritmos_vns import AlgoritmoVNS
+    from .preprocessamento import PreProcessamento
+    from .memoria_compartilhada import ExecutorParalelo
     from .visualizacao import Visualizador
     from .relatorios import GeradorRelatorios
 except ImportError:
@@ -26,44 +29,68 @@ except ImportError:
     from solucoes_iniciais import GeradorSolucoes
     from funcoes_objetivo import FuncoesObjetivo
     from busca_local import BuscaLocal
+    from busca_agregada import BuscaLocalAgregada
     from algoritmos_vns import AlgoritmoVNS
+    from preprocessamento import PreProcessamento
+    from memoria_compartilhada import ExecutorParalelo
     from visualizacao import Visualizador
     from relatorios import GeradorRelatorios
 
 class MonitoramentoAtivosCompleto:
     # Classe principal que coordena todo o problema de monitoramento de ativos
     
-    def __init__(self, arquivo_dados: str):
+    def __init__(self, arquivo_dados: str, **opcoes_dados):
         # Inicializa o problema carregando os dados e criando todas as classes necessárias
+        # opcoes_dados: repassadas ao DadosProcessor (cache, tipo_distancias, armazenamento, ...)
         # Inicializa processador de dados
-        self.dados_processor = DadosProcessor(arquivo_dados)
-        self.dados = self.dados_processor.dados
+        self.dados_processor = DadosProcessor(arquivo_dados, **opcoes_dados)
         self.n_ativos = self.dados_processor.n_ativos
         self.m_bases = self.dados_processor.m_bases
         self.s_equipes = self.dados_processor.s_equipes
         self.eta = self.dados_processor.eta
         self.bases_coords = self.dados_processor.bases_coords
+        self.ativos_coords = self.dados_processor.ativos_coords
         self.distancias = self.dados_processor.distancias
+        self.candidatos = self.dados_processor.candidatos
         
         # Inicializa módulos especializados
         self.gerador_solucoes = GeradorSolucoes(self)
         self.funcoes_objetivo = FuncoesObjetivo(self)
         self.busca_local = BuscaLocal(self)
+        self.busca_agregada = BuscaLocalAgregada(self)
         self.algoritmo_vns = AlgoritmoVNS(self)
+        self.preprocessamento = PreProcessamento(self)
         self.visualizador = Visualizador(self)
         self.gerador_relatorios = GeradorRelatorios(self)
     
-    def otimizacao_mono_objetivo(self, n_execucoes: int = 5) -> Dict:
+    @property
+    def dados(self) -> pd.DataFrame:
+        """Tabela longa do CSV (lida sob demanda quando a matriz veio do cache)."""
+        return self.dados_processor.dados
+    
+    def otimizacao_mono_objetivo(self, n_execucoes: int = 5, processos: int = 1,
+                                 modelo: str = 'completo') -> Dict:
         """
         Executa otimização mono-objetivo para f1 e f2.
         
         Args:
             n_execucoes: Número de execuções para cada função
-            
+            processos: Execuções simultâneas (acima de 1, em processos separados)
+            modelo: 'completo' ou 'agregado' (busca sobre o número de equipes por base)
+        
         Returns:
             Resultados das otimizações
         """
-        return self.algoritmo_vns.otimizacao_mono_objetivo(n_execucoes)
+        return self.algoritmo_vns.otimizacao_mono_objetivo(n_execucoes, processos, modelo)
+    
+    def executor_paralelo(self, processos: int = None) -> ExecutorParalelo:
+        """Pool de processos com os dados do problema em memória compartilhada (ver ExecutorParalelo)."""
+        return ExecutorParalelo(self, processos)
+    
+    def podar_instancia(self, modo: str = 'seguro', r: int = 3,
+                        limite_superior: float = None) -> Dict:
+        """Remove pares (ativo, base) e bases irrelevantes antes da busca (ver PreProcessamento)."""
+        return self.preprocessamento.podar(modo, r, limite_superior)
     
     def plotar_curvas_convergencia(self, resultados: Dict):
         """Plota curvas de convergência detalhadas."""
@@ -95,7 +122,7 @@ def main():
         'data/probdata.csv'
     )
     
-    if monitoramento.dados.empty:
+    if monitoramento.n_ativos == 0:
         print("Erro: Não foi possível carregar os dados.")
         return
     
@@ -0,0 +1,315 @@
+import numpy as np
+import os
+from typing import Dict, Optional, Tuple
+
+try:
+    import numba
+except ImportError:
+    # Numba é opcional: sem ele só os núcleos NumPy ficam disponíveis
+    numba = None
+
+# Backends aceitos; 'auto' usa Numba quando está instalado
+BACKENDS = ('auto', 'numpy', 'numba')
+
+# Variável de ambiente com o backend padrão (permite ativar o Numba sem mudar código)
+VARIAVEL_BACKEND = 'MONITORAMENTO_NUCLEOS'
+
+class NucleosNumpy:
+    # Classe com os núcleos de avaliação em NumPy puro (referência dos outros backends)
+    
+    nome = 'numpy'
+    
+    def f1(self, distancias, equipe_ativo: np.ndarray, base_equipe: np.ndarray) -> float:
+        """Soma das distâncias de cada ativo à base da sua equipe, na ordem dos ativos."""
+        bases = np.where(equipe_ativo >= 0, base_equipe[equipe_ativo], -1)
+        ativos = np.flatnonzero(bases >= 0)
+        if len(ativos) == 0:
+            return 0.0
+        valores = np.asarray(distancias[ativos, bases[ativos]], dtype=np.float64)
+        # Soma sequencial (cumsum), igual bit a bit à acumulação ativo por ativo
+        return float(np.cumsum(valores)[-1])
+    
+    def violacao_equipes(self, carga: np.ndarray, base_equipe: np.ndarray, minimo_ativos: float) -> float:
+        """Soma, equipe a equipe, das violações das restrições 1 e 6 (ver FuncoesObjetivo._violacao_equipe)."""
+        if len(carga) == 0:
+            return 0.0
+        parcelas = self._parcelas_equipes(carga, base_equipe, minimo_ativos)
+        return float(np.cumsum(parcelas)[-1])
+    
+    def avaliar_lote(self, distancias, equipe_ativo: np.ndarray, base_equipe: np.ndarray,
+                     minimo_ativos: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """f1, f2 e violação de B soluções empilhadas (ver FuncoesObjetivo.avaliar_lote)."""
+        n_lote, n_ativos = equipe_ativo.shape
+        s_equipes = base_equipe.shape[1]
+        
+        # f1: distância de cada ativo à base da sua equipe; soma sequencial por linha
+        tem_equipe = equipe_ativo >= 0
+        bases = np.take_along_axis(base_equipe, np.where(tem_equipe, equipe_ativo, 0), axis=1)
+        com_base = tem_equipe & (bases >= 0)
+        ativos = np.broadcast_to(np.arange(n_ativos), equipe_ativo.shape)
+        valores = np.asarray(distancias[ativos, np.where(com_base, bases, 0)], dtype=np.float64)
+        valores = np.where(com_base, valores, 0.0)
+        f1 = np.cumsum(valores, axis=1)[:, -1] if n_ativos > 0 else np.zeros(n_lote)
+        
+        # Carga de cada equipe em cada solução
+        linhas = np.broadcast_to(np.arange(n_lote)[:, None], equipe_ativo.shape)
+        carga = np.bincount((linhas * s_equipes + equipe_ativo)[tem_equipe],
+                            minlength=n_lote * s_equipes).reshape(n_lote, s_equipes)
+        f2 = np.count_nonzero(carga > 0, axis=1).astype(np.float64)
+        
+        parcelas = self._parcelas_equipes(carga, base_equipe, minimo_ativos)
+        violacao = np.cumsum(parcelas, axis=1)[:, -1] if s_equipes > 0 else np.zeros(n_lote)
+        
+        return f1, f2, violacao
+    
+    def melhor_troca(self, distancias, base_ativo: np.ndarray, linhas: np.ndarray, trocaveis: np.ndarray,
+                     distancia_propria: np.ndarray, limite: np.ndarray,
+                     tamanho_bloco: int = 1 << 20) -> Optional[Tuple[float, int, int]]:
+        """
+        Melhor troca de bases entre dois ativos (SWAP): varredura da matriz de ganhos
+        d[a, base_b] + d[b, base_a] - d[a, base_a] - d[b, base_b] em blocos de linhas.
+        
+        Args:
+            base_ativo: Base de cada ativo
+            linhas: Ativos a das linhas, trocáveis e em ordem crescente; os pares são (a, b) com b > a
+            trocaveis: Máscara (n_ativos) dos ativos que podem trocar
+            distancia_propria: Distância (float64) de cada ativo à sua base
+            limite: Limite de distância de cada ativo no grafo reduzido
+            tamanho_bloco: Posições (pares) por bloco
+        
+        Returns:
+            (ganho, a, b) da primeira melhor troca na ordem (a, b), ou None se nenhuma melhora
+        """
+        melhor = None
+        linhas_bloco = max(1, tamanho_bloco // max(1, len(base_ativo)))
+        for inicio in range(0, len(linhas), linhas_bloco):
+            bloco = linhas[inicio:inicio + linhas_bloco]
+            colunas = np.flatnonzero(trocaveis[bloco[0] + 1:]) + bloco[0] + 1
+            if len(colunas) == 0:
+                break
+            base_bloco, base_colunas = base_ativo[bloco], base_ativo[colunas]
+            
+            # d[a, base_b] e d[b, base_a], lidos direto do bloco de pares (sem subconjuntos de linhas)
+            ida = np.asarray(distancias[bloco[:, None], base_colunas[None, :]], dtype=np.float64)
+            volta = np.asarray(distancias[colunas[None, :], base_bloco[:, None]], dtype=np.float64)
+            ganho = ida + volta - distancia_propria[bloco][:, None] - distancia_propria[colunas][None, :]
+            
+            # Pares b > a em bases diferentes, cada ativo permitido na base do outro
+            validos = ((colunas[None, :] > bloco[:, None]) & (base_colunas[None, :] != base_bloco[:, None]) &
+                       (ida <= limite[bloco][:, None]) & (volta <= limite[colunas][None, :]))
+            ganho = np.where(validos, ganho, np.inf)
+            
+            p = int(np.argmin(ganho))
+            linha, coluna = divmod(p, len(colunas))
+            if ganho[linha, coluna] < 0 and (melhor is None or ganho[linha, coluna] < melhor[0]):
+                melhor = (float(ganho[linha, coluna]), int(bloco[linha]), int(colunas[coluna]))
+        return melhor
+    
+    @staticmethod
+    def _parcelas_equipes(carga: np.ndarray, base_equipe: np.ndarray, minimo_ativos: float) -> np.ndarray:
+        """Violação de cada equipe: base sem ativos ou ativos sem base, e mínimo de ativos."""
+        alocada = base_equipe >= 0
+        return (np.where(alocada & (carga == 0), 1.0, 0.0) + np.where(~alocada & (carga > 0), 1.0, 0.0) +
+                np.where((carga > 0) & (carga < minimo_ativos), (minimo_ativos - carga)**2, 0.0))
+
+# Laços dos núcleos compilados. Escritos em Python simples para o Numba; as somas seguem
+# a mesma ordem das versões NumPy, então os resultados são idênticos bit a bit.
+
+def _f1_laco(distancias, equipe_ativo, base_equipe):
+    total = 0.0
+    for i in range(equipe_ativo.shape[0]):
+        k = equipe_ativo[i]
+        if k >= 0:
+            j = base_equipe[k]
+            if j >= 0:
+                total += distancias[i, j]
+    return total
+
+def _violacao_laco(carga, base_equipe, minimo_ativos):
+    total = 0.0
+    for k in range(carga.shape[0]):
+        c = carga[k]
+        alocada = base_equipe[k] >= 0
+        parcela = 0.0
+        if alocada and c == 0:
+            parcela += 1.0
+        if not alocada and c > 0:
+            parcela += 1.0
+        if c > 0 and c < minimo_ativos:
+            parcela += (minimo_ativos - c)**2
+        total += parcela
+    return total
+
+def _lote_laco(distancias, equipe_ativo, base_equipe, minimo_ativos):
+    n_lote, n_ativos = equipe_ativo.shape
+    s_equipes = base_equipe.shape[1]
+    f1 = np.zeros(n_lote)
+    f2 = np.zeros(n_lote)
+    violacao = np.zeros(n_lote)
+    carga = np.zeros(s_equipes, dtype=np.int64)
+    for b in range(n_lote):
+        carga[:] = 0
+        total = 0.0
+        for i in range(n_ativos):
+            k = equipe_ativo[b, i]
+            if k >= 0:
+                carga[k] += 1
+                j = base_equipe[b, k]
+                if j >= 0:
+                    total += distancias[i, j]
+        f1[b] = total
+        
+        # Mesma acumulação de _violacao_laco
+        usadas = 0
+        total = 0.0
+        for k in range(s_equipes):
+            c = carga[k]
+            alocada = base_equipe[b, k] >= 0
+            parcela = 0.0
+            if alocada and c == 0:
+                parcela += 1.0
+            if not alocada and c > 0:
+                parcela += 1.0
+            if c > 0 and c < minimo_ativos:
+                parcela += (minimo_ativos - c)**2
+            total += parcela
+            if c > 0:
+                usadas += 1
+        f2[b] = usadas
+        violacao[b] = total
+    return f1, f2, violacao
+
+def _melhor_troca_laco(distancias, base_ativo, linhas, trocaveis, distancia_propria, limite):
+    # Pares na ordem (a, b) e troca só com ganho estritamente menor: a primeira melhor troca
+    melhor, melhor_a, melhor_b = 0.0, -1, -1
+    n_ativos = base_ativo.shape[0]
+    for t in range(linhas.shape[0]):
+        a = linhas[t]
+        base_a = base_ativo[a]
+        for b in range(a + 1, n_ativos):
+            if not trocaveis[b]:
+                continue
+            base_b = base_ativo[b]
+            if base_b == base_a:
+                continue
+            ida = float(distancias[a, base_b])
+            volta = float(distancias[b, base_a])
+            if ida > limite[a] or volta > limite[b]:
+                continue
+            ganho = ida + volta - distancia_propria[a] - distancia_propria[b]
+            if ganho < melhor:
+                melhor, melhor_a, melhor_b = ganho, a, b
+    return melhor, melhor_a, melhor_b
+
+class NucleosNumba(NucleosNumpy):
+    # Classe com os núcleos compilados pelo Numba (mesmos resultados de NucleosNumpy)
+    
+    nome = 'numba'
+    
+    def __init__(self, compilar=None):
+        """
+        Args:
+            compilar: Decorador de compilação (padrão: numba.njit(cache=True))
+        """
+        if compilar is None:
+            if numba is None:
+                raise ImportError("backend 'numba' requer o pacote numba")
+            compilar = numba.njit(cache=True)
+        # Compilação acontece na primeira chamada de cada núcleo
+        self._f1 = compilar(_f1_laco)
+        self._violacao = compilar(_violacao_laco)
+        self._lote = compilar(_lote_laco)
+        self._melhor_troca = compilar(_melhor_troca_laco)
+    
+    def f1(self, distancias, equipe_ativo, base_equipe) -> float:
+        # Distâncias sob demanda (MatrizHaversine) ficam com a versão NumPy
+        if not isinstance(distancias, np.ndarray):
+            return super().f1(distancias, equipe_ativo, base_equipe)
+        return float(self._f1(np.asarray(distancias), equipe_ativo, base_equipe))
+    
+    def violacao_equipes(self, carga, base_equipe, minimo_ativos) -> float:
+        return float(self._violacao(carga, base_equipe, float(minimo_ativos)))
+    
+    def avaliar_lote(self, distancias, equipe_ativo, base_equipe, minimo_ativos):
+        if not isinstance(distancias, np.ndarray):
+            return super().avaliar_lote(distancias, equipe_ativo, base_equipe, minimo_ativos)
+        return self._lote(np.asarray(distancias), np.ascontiguousarray(equipe_ativo),
+                          np.ascontiguousarray(base_equipe), float(minimo_ativos))
+    
+    def melhor_troca(self, distancias, base_ativo, linhas, trocaveis, distancia_propria, limite,
+                     tamanho_bloco: int = 1 << 20):
+        # Laço sobre os pares, sem blocos: tamanho_bloco só vale para a versão NumPy
+        if not isinstance(distancias, np.ndarray):
+            return super().melhor_troca(distancias, base_ativo, linhas, trocaveis, distancia_propria,
+                                        limite, tamanho_bloco)
+        ganho, a, b = self._melhor_troca(np.asarray(distancias), base_ativo, linhas, trocaveis,
+                                         distancia_propria, np.asarray(limite, dtype=np.float64))
+        return None if a < 0 else (float(ganho), int(a), int(b))
+
+def numba_disponivel() -> bool:
+    """True se o Numba está instalado."""
+    return numba is not None
+
+def criar_nucleos(nome: Optional[str] = None):
+    """
+    Cria o backend de núcleos pedido.
+    
+    Args:
+        nome: 'auto', 'numpy' ou 'numba' (padrão: variável de ambiente MONITORAMENTO_NUCLEOS,
+            ou 'auto'). Sem Numba instalado, 'numba' e 'auto' usam NumPy.
+    
+    Returns:
+        NucleosNumpy ou NucleosNumba
+    """
+    if nome is None:
+        nome = os.environ.get(VARIAVEL_BACKEND, 'auto')
+    if nome not in BACKENDS:
+        raise ValueError(f"backend de núcleos deve ser um de {BACKENDS}, recebido {nome!r}")
+    
+    if nome == 'numpy':
+        return NucleosNumpy()
+    if numba is None:
+        if nome == 'numba':
+            print("Aviso: numba não está instalado; usando os núcleos NumPy")
+        return NucleosNumpy()
+    return NucleosNumba()
+
+def comparar_nucleos(nucleos, referencia, distancias, s_equipes: int, minimo_ativos: float,
+                     amostras: int = 8, semente: int = 0) -> Dict[str, bool]:
+    """
+    Compara dois backends em soluções sorteadas (inclusive inválidas) sobre os dados do problema.
+    
+    Returns:
+        Dicionário núcleo -> True se os resultados são idênticos
+    """
+    rng = np.random.default_rng(semente)
+    n_ativos, m_bases = distancias.shape
+    equipe_ativo = rng.integers(-1, s_equipes, size=(amostras, n_ativos)).astype(np.int32)
+    base_equipe = rng.integers(-1, m_bases, size=(amostras, s_equipes)).astype(np.int32)
+    
+    iguais = {'f1': True, 'violacao_equipes': True, 'avaliar_lote': True, 'melhor_troca': True}
+    for b in range(amostras):
+        iguais['f1'] &= (nucleos.f1(distancias, equipe_ativo[b], base_equipe[b]) ==
+                         referencia.f1(distancias, equipe_ativo[b], base_equipe[b]))
+        carga = np.bincount(equipe_ativo[b][equipe_ativo[b] >= 0], minlength=s_equipes).astype(np.int64)
+        iguais['violacao_equipes'] &= (nucleos.violacao_equipes(carga, base_equipe[b], minimo_ativos) ==
+                                       referencia.violacao_equipes(carga, base_equipe[b], minimo_ativos))
+        
+        # SWAP com metade dos ativos trocáveis, limite finito em parte deles e até 64 linhas
+        # (a varredura é quadrática no número de ativos)
+        base_ativo = rng.integers(0, m_bases, size=n_ativos)
+        trocaveis = rng.random(n_ativos) < 0.5
+        linhas = np.flatnonzero(trocaveis)
+        linhas = np.sort(rng.choice(linhas, min(64, len(linhas)), replace=False))
+        distancia_propria = np.asarray(distancias[np.arange(n_ativos), base_ativo], dtype=np.float64)
+        limite = np.where(rng.random(n_ativos) < 0.5, np.inf, 2 * distancia_propria)
+        iguais['melhor_troca'] &= (nucleos.melhor_troca(distancias, base_ativo, linhas, trocaveis,
+                                                        distancia_propria, limite) ==
+                                   referencia.melhor_troca(distancias, base_ativo, linhas, trocaveis,
+                                                           distancia_propria, limite))
+    
+    lote = nucleos.avaliar_lote(distancias, equipe_ativo, base_equipe, minimo_ativos)
+    lote_ref = referencia.avaliar_lote(distancias, equipe_ativo, base_equipe, minimo_ativos)
+    iguais['avaliar_lote'] = all(np.array_equal(v, w) for v, w in zip(lote, lote_ref))
+    
+    return {nucleo: bool(igual) for nucleo, igual in iguais.items()}
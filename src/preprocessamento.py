@@ -0,0 +1,139 @@
+import numpy as np
+from typing import Dict, Optional
+
+class PreProcessamento:
+    # Classe que poda pares (ativo, base) e bases irrelevantes antes da busca (criterios para f1)
+    
+    def __init__(self, monitoramento):
+        # Pega os dados do problema da classe principal
+        self.monitoramento = monitoramento
+        self.n_ativos = monitoramento.n_ativos
+        self.m_bases = monitoramento.m_bases
+        self.distancias = monitoramento.distancias
+        self.candidatos = monitoramento.candidatos
+    
+    def podar(self, modo: str = 'seguro', r: int = 3, limite_superior: Optional[float] = None,
+              verbose: bool = True) -> Dict:
+        """
+        Calcula o grafo reduzido (ativo, base) e o aplica ao índice de candidatos.
+        
+        Modo 'seguro' só remove o que não pode estar em nenhuma solução ótima de f1:
+        bases estritamente dominadas (outra base é mais próxima de todos os ativos) e
+        pares cujo limite inferior d_ij + soma dos mínimos dos demais ativos excede
+        limite_superior (f1 de uma solução viável conhecida).
+        
+        Modo 'heuristico' mantém só as r bases mais próximas de cada ativo e remove
+        bases dominadas (com empate) ou que não ficaram com nenhum par.
+        
+        Os limites de pares só são seguros para f1: as vizinhanças os aplicam apenas
+        quando o objetivo é f1 (TASK MOVE e CONSOLIDATE em f2 os ignoram). As bases
+        removidas valem para os dois objetivos, já que f2 não depende de onde ficam
+        as equipes.
+        
+        Args:
+            modo: 'seguro' ou 'heuristico'
+            r: Bases mantidas por ativo no modo heurístico
+            limite_superior: f1 de uma solução viável; no modo seguro, se None, usa a
+                solução construtiva quando ela for viável
+            verbose: Se True, mostra o resumo da poda
+        
+        Returns:
+            Dicionário com o relatório da poda
+        """
+        if modo not in ('seguro', 'heuristico'):
+            raise ValueError(f"modo deve ser 'seguro' ou 'heuristico', recebido {modo!r}")
+        
+        # Bases dominadas
+        bases_ativas = ~self._bases_dominadas(estrita=(modo == 'seguro'))
+        
+        # Limite de distância por ativo: par (i, j) permitido se d_ij <= limite[i]
+        minimos = np.asarray(self.distancias.min(axis=1), dtype=float)
+        limite = np.full(self.n_ativos, np.inf)
+        
+        if modo == 'seguro':
+            if limite_superior is None:
+                limite_superior = self._limite_superior_construtivo()
+            if limite_superior is not None:
+                # Qualquer solução com i em j tem f1 >= d_ij + (soma dos mínimos - mínimo de i)
+                folga = limite_superior - np.sum(minimos)
+                limite = minimos + folga
+        else:
+            # Distância da r-ésima base mais próxima de cada ativo
+            r = min(r, self.m_bases)
+            if r <= self.candidatos.k:
+                limite = np.asarray(self.candidatos.distancias_ordenadas[:, r - 1], dtype=float)
+            else:
+                limite = np.partition(np.asarray(self.distancias), r - 1, axis=1)[:, r - 1]
+        
+        # Contagem de pares permitidos por base (em blocos de linhas)
+        pares_por_base = np.zeros(self.m_bases, dtype=np.int64)
+        tamanho_bloco = 4096
+        for inicio in range(0, self.n_ativos, tamanho_bloco):
+            bloco = np.asarray(self.distancias[inicio:inicio + tamanho_bloco])
+            pares_por_base += np.sum(bloco <= limite[inicio:inicio + tamanho_bloco, None], axis=0)
+        
+        if modo == 'heuristico':
+            # Base sem nenhum par permitido nunca recebe ativos pelas vizinhanças
+            bases_ativas &= pares_por_base > 0
+        
+        pares_total = self.n_ativos * self.m_bases
+        pares_restantes = int(np.sum(pares_por_base[bases_ativas]))
+        
+        self.candidatos.aplicar_poda(limite, bases_ativas)
+        
+        relatorio = {
+            'modo': modo,
+            'limite_superior': limite_superior,
+            'pares_total': pares_total,
+            'pares_podados': pares_total - pares_restantes,
+            'fracao_podada': (pares_total - pares_restantes) / pares_total if pares_total > 0 else 0.0,
+            'bases_podadas': [int(j) + 1 for j in np.flatnonzero(~bases_ativas)]
+        }
+        
+        if verbose:
+            print(f"Poda ({modo}): {relatorio['pares_podados']}/{pares_total} pares removidos "
+                  f"({100 * relatorio['fracao_podada']:.1f}%), bases removidas: {relatorio['bases_podadas']}")
+        
+        return relatorio
+    
+    def _bases_dominadas(self, estrita: bool) -> np.ndarray:
+        """
+        Marca bases dominadas: j é dominada por j' se d[i, j'] < d[i, j] para todo ativo i
+        (estrita) ou d[i, j'] <= d[i, j] (não estrita, com empate total resolvido pelo menor índice).
+        """
+        # domina[a, b] = True enquanto a base a domina a base b em todos os ativos vistos
+        domina = ~np.eye(self.m_bases, dtype=bool)
+        tamanho_bloco = max(1, (1 << 24) // max(1, self.m_bases * self.m_bases))
+        iguais = np.ones((self.m_bases, self.m_bases), dtype=bool)
+        
+        for inicio in range(0, self.n_ativos, tamanho_bloco):
+            bloco = np.asarray(self.distancias[inicio:inicio + tamanho_bloco])
+            a = bloco[:, :, None]
+            b = bloco[:, None, :]
+            if estrita:
+                domina &= np.all(a < b, axis=0)
+            else:
+                domina &= np.all(a <= b, axis=0)
+                iguais &= np.all(a == b, axis=0)
+            if not np.any(domina):
+                break
+        
+        if not estrita:
+            # Colunas idênticas: só a de menor índice sobrevive
+            domina &= ~iguais | np.triu(np.ones_like(iguais), k=1)
+        
+        return np.any(domina, axis=0)
+    
+    def _limite_superior_construtivo(self) -> Optional[float]:
+        """f1 da solução construtiva, se ela for viável (senão não há limite)."""
+        estado = np.random.get_state()
+        try:
+            x_ij, y_jk, h_ik = self.monitoramento.gerador_solucoes.gerar_solucao_inicial()
+        finally:
+            # Não altera a sequência aleatória de quem chamou
+            np.random.set_state(estado)
+        
+        funcoes_objetivo = self.monitoramento.funcoes_objetivo
+        if not funcoes_objetivo.verificar_restricoes(x_ij, y_jk, h_ik):
+            return None
+        return funcoes_objetivo.calcular_f1(x_ij, h_ik, y_jk)
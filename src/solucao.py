@@ -0,0 +1,371 @@
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Impressão digital (Zobrist): XOR de uma chave de 64 bits por atribuição (ativo, base),
+# (ativo, equipe) e (equipe, base). As chaves vêm de um misturador (splitmix64) aplicado ao
+# par, sem tabela: atualizar a impressão num movimento custa O(atribuições alteradas).
+# No modelo agregado, o par (base, número de equipes) usa o tipo EQUIPES_BASE
+MASCARA_64 = (1 << 64) - 1
+ATIVO_BASE, ATIVO_EQUIPE, EQUIPE_BASE, EQUIPES_BASE = 0, 1, 2, 3
+
+def _chave(tipo: int, a: int, b: int) -> int:
+    """Chave de 64 bits da atribuição (a, b) do tipo dado (b = -1 também tem chave)."""
+    x = (((tipo << 62) | (int(a) << 31) | (int(b) + 1)) + 0x9E3779B97F4A7C15) & MASCARA_64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASCARA_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASCARA_64
+    return x ^ (x >> 31)
+
+def _chaves_xor(tipo: int, a: np.ndarray, b: np.ndarray) -> int:
+    """XOR das chaves de vários pares (a, b), vetorizado (mesmo resultado de _chave)."""
+    if len(a) == 0:
+        return 0
+    x = ((np.uint64(tipo) << np.uint64(62)) | (np.asarray(a, dtype=np.uint64) << np.uint64(31)) |
+         (np.asarray(b, dtype=np.int64) + 1).astype(np.uint64))
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return int(np.bitwise_xor.reduce(x ^ (x >> np.uint64(31))))
+
+class Solucao:
+    # Classe com a solução em vetores de índices: base e equipe de cada ativo, base de cada equipe
+    
+    __slots__ = ('base_ativo', 'equipe_ativo', 'base_equipe', 'carga_equipe', 'carga_base',
+                 'minimo_ativos', 'f1', 'impressao')
+    
+    def __init__(self, base_ativo: np.ndarray, equipe_ativo: np.ndarray, base_equipe: np.ndarray,
+                 minimo_ativos: float, f1: Optional[float] = None, m_bases: Optional[int] = None):
+        """
+        Args:
+            base_ativo: Base de cada ativo (n_ativos), -1 se nenhuma
+            equipe_ativo: Equipe de cada ativo (n_ativos), -1 se nenhuma
+            base_equipe: Base de cada equipe (s_equipes), -1 se a equipe não está alocada
+            minimo_ativos: Mínimo eta*n/s de ativos por equipe usada (consultas de viabilidade;
+                obrigatório para que pode_perder/pode_ganhar/equipes_viaveis nunca o ignorem)
+            f1: Valor de f1 já conhecido (None se não calculado)
+            m_bases: Número de bases (padrão: maior base usada + 1)
+        """
+        self.base_ativo = np.asarray(base_ativo, dtype=np.int32)
+        self.equipe_ativo = np.asarray(equipe_ativo, dtype=np.int32)
+        self.base_equipe = np.asarray(base_equipe, dtype=np.int32)
+        if m_bases is None:
+            m_bases = int(max(np.max(self.base_ativo, initial=-1), np.max(self.base_equipe, initial=-1))) + 1
+        # Número de ativos de cada equipe e de cada base, mantidos pelos movimentos
+        self.carga_equipe = np.bincount(self.equipe_ativo[self.equipe_ativo >= 0],
+                                        minlength=len(self.base_equipe)).astype(np.int64)
+        self.carga_base = np.bincount(self.base_ativo[self.base_ativo >= 0], minlength=m_bases).astype(np.int64)
+        self.minimo_ativos = minimo_ativos
+        self.f1 = f1
+        # Impressão digital das atribuições, mantida pelos movimentos
+        self.impressao = self._calcular_impressao()
+    
+    def _calcular_impressao(self) -> int:
+        """Impressão digital calculada do zero (O(n_ativos))."""
+        ativos = np.arange(len(self.base_ativo))
+        return (_chaves_xor(ATIVO_BASE, ativos, self.base_ativo) ^
+                _chaves_xor(ATIVO_EQUIPE, ativos, self.equipe_ativo) ^
+                _chaves_xor(EQUIPE_BASE, np.arange(len(self.base_equipe)), self.base_equipe))
+    
+    @classmethod
+    def de_matrizes(cls, x_ij: np.ndarray, y_jk: np.ndarray, h_ik: np.ndarray,
+                    minimo_ativos: float, f1: Optional[float] = None) -> 'Solucao':
+        """Converte as matrizes one-hot (primeira posição com 1 de cada linha/coluna)."""
+        return cls(cls._primeiro_indice(x_ij == 1, axis=1),
+                   cls._primeiro_indice(h_ik == 1, axis=1),
+                   cls._primeiro_indice(y_jk == 1, axis=0), minimo_ativos, f1, x_ij.shape[1])
+    
+    @staticmethod
+    def _primeiro_indice(mascara: np.ndarray, axis: int) -> np.ndarray:
+        """Índice do primeiro True ao longo de axis, -1 se não houver."""
+        return np.where(np.any(mascara, axis=axis), np.argmax(mascara, axis=axis), -1)
+    
+    def para_matrizes(self, m_bases: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Matrizes one-hot equivalentes (formato usado pelo Visualizador e pelo GeradorRelatorios).
+        
+        Returns:
+            x_ij, y_jk, h_ik
+        """
+        n_ativos, s_equipes = len(self.base_ativo), len(self.base_equipe)
+        x_ij = np.zeros((n_ativos, m_bases), dtype=int)
+        y_jk = np.zeros((m_bases, s_equipes), dtype=int)
+        h_ik = np.zeros((n_ativos, s_equipes), dtype=int)
+        
+        ativos = np.flatnonzero(self.base_ativo >= 0)
+        x_ij[ativos, self.base_ativo[ativos]] = 1
+        equipes = np.flatnonzero(self.base_equipe >= 0)
+        y_jk[self.base_equipe[equipes], equipes] = 1
+        ativos = np.flatnonzero(self.equipe_ativo >= 0)
+        h_ik[ativos, self.equipe_ativo[ativos]] = 1
+        return x_ij, y_jk, h_ik
+    
+    def copiar(self) -> 'Solucao':
+        """Cópia independente (só os vetores, sem recalcular as cargas)."""
+        copia = Solucao.__new__(Solucao)
+        copia.base_ativo = self.base_ativo.copy()
+        copia.equipe_ativo = self.equipe_ativo.copy()
+        copia.base_equipe = self.base_equipe.copy()
+        copia.carga_equipe = self.carga_equipe.copy()
+        copia.carga_base = self.carga_base.copy()
+        copia.minimo_ativos = self.minimo_ativos
+        copia.f1 = self.f1
+        copia.impressao = self.impressao
+        return copia
+    
+    def _equipe_viavel(self, carga: int, alocada: bool) -> bool:
+        """Equipe sem violação: alocada com pelo menos max(1, minimo_ativos) ativos, ou livre e vazia."""
+        if alocada:
+            return carga >= 1 and carga >= self.minimo_ativos
+        return carga == 0
+    
+    def pode_perder(self, k: int) -> bool:
+        """True se a equipe k continua sem violação depois de perder um ativo. O(1)."""
+        return self._equipe_viavel(int(self.carga_equipe[k]) - 1, self.base_equipe[k] >= 0)
+    
+    def pode_ganhar(self, k: int) -> bool:
+        """True se a equipe k fica sem violação depois de ganhar um ativo. O(1)."""
+        return self._equipe_viavel(int(self.carga_equipe[k]) + 1, self.base_equipe[k] >= 0)
+    
+    def equipes_viaveis(self, variacao: int = 0) -> np.ndarray:
+        """
+        Máscara (s_equipes) das equipes sem violação (restrições 1 e 6), ou das que ficariam
+        sem violação com `variacao` ativos a mais (-1: ao perder um ativo; 1: ao ganhar um).
+        """
+        carga = self.carga_equipe + variacao
+        return np.where(self.base_equipe >= 0, (carga >= 1) & (carga >= self.minimo_ativos), carga == 0)
+    
+    def canonizar(self) -> 'Solucao':
+        """
+        Renumera as equipes na forma canônica, em ordem de (base, menor ativo) e com as equipes
+        sem base no fim. Equipes são intercambiáveis: soluções que só diferem na numeração
+        ficam iguais (mesma impressão digital). Altera a própria solução e a retorna.
+        """
+        n_ativos, s_equipes = len(self.equipe_ativo), len(self.base_equipe)
+        com_equipe = np.flatnonzero(self.equipe_ativo >= 0)
+        menor_ativo = np.full(s_equipes, n_ativos, dtype=np.int64)
+        np.minimum.at(menor_ativo, self.equipe_ativo[com_equipe], com_equipe)
+        base = np.where(self.base_equipe >= 0, self.base_equipe, np.iinfo(np.int32).max)
+        
+        # Ordenação estável: empates (equipes vazias na mesma base) mantêm a ordem atual
+        ordem = np.lexsort((menor_ativo, base))
+        if np.array_equal(ordem, np.arange(s_equipes)):
+            return self
+        
+        nova_equipe = np.empty(s_equipes, dtype=np.int32)
+        nova_equipe[ordem] = np.arange(s_equipes)
+        self.equipe_ativo[com_equipe] = nova_equipe[self.equipe_ativo[com_equipe]]
+        self.base_equipe = self.base_equipe[ordem]
+        self.carga_equipe = self.carga_equipe[ordem]
+        self.impressao = self._calcular_impressao()
+        return self
+    
+    def _atualizar_f1(self, delta_f1: Optional[float]):
+        """Soma delta_f1 ao f1 guardado; sem delta o valor guardado deixa de valer."""
+        if delta_f1 is None:
+            self.f1 = None
+        elif self.f1 is not None:
+            self.f1 += delta_f1
+    
+    def mover_ativo(self, i: int, k: int, delta_f1: Optional[float] = None):
+        """Passa o ativo i para a equipe k (o ativo vai para a base da equipe)."""
+        k_antiga = self.equipe_ativo[i]
+        self.impressao ^= (_chave(ATIVO_BASE, i, self.base_ativo[i]) ^ _chave(ATIVO_BASE, i, self.base_equipe[k]) ^
+                           _chave(ATIVO_EQUIPE, i, k_antiga) ^ _chave(ATIVO_EQUIPE, i, k))
+        if k_antiga >= 0:
+            self.carga_equipe[k_antiga] -= 1
+        if self.base_ativo[i] >= 0:
+            self.carga_base[self.base_ativo[i]] -= 1
+        self.equipe_ativo[i] = k
+        self.base_ativo[i] = self.base_equipe[k]
+        self.carga_equipe[k] += 1
+        if self.base_ativo[i] >= 0:
+            self.carga_base[self.base_ativo[i]] += 1
+        self._atualizar_f1(delta_f1)
+    
+    def _mover_cargas_base(self, ativos: np.ndarray, j: int):
+        """Atualiza carga_base para os ativos indo para a base j. O(ativos)."""
+        antigas = self.base_ativo[ativos]
+        np.subtract.at(self.carga_base, antigas[antigas >= 0], 1)
+        if j >= 0:
+            self.carga_base[j] += len(ativos)
+    
+    def realocar_equipe(self, k: int, j: int, ativos: Optional[np.ndarray] = None,
+                         delta_f1: Optional[float] = None):
+        """Leva a equipe k, com todos os seus ativos, para a base j."""
+        if ativos is None:
+            ativos = np.flatnonzero(self.equipe_ativo == k)
+        self.impressao ^= (_chaves_xor(ATIVO_BASE, ativos, self.base_ativo[ativos]) ^
+                           _chaves_xor(ATIVO_BASE, ativos, np.full(len(ativos), j)) ^
+                           _chave(EQUIPE_BASE, k, self.base_equipe[k]) ^ _chave(EQUIPE_BASE, k, j))
+        self._mover_cargas_base(ativos, j)
+        self.base_equipe[k] = j
+        self.base_ativo[ativos] = j
+        self._atualizar_f1(delta_f1)
+
+class SolucaoAgregada:
+    # Classe com a solução do modelo agregado por base: base de cada ativo e número de equipes
+    # de cada base. A divisão dos ativos entre as equipes de uma base só pesa na restrição do
+    # mínimo eta*n/s e é feita de forma balanceada ao exportar (para_solucao)
+    
+    __slots__ = ('base_ativo', 'equipes_base', 'carga_base', 'f1', 'impressao')
+    
+    def __init__(self, base_ativo: np.ndarray, equipes_base: np.ndarray, f1: Optional[float] = None):
+        """
+        Args:
+            base_ativo: Base de cada ativo (n_ativos), -1 se nenhuma
+            equipes_base: Número de equipes de cada base (m_bases)
+            f1: Valor de f1 já conhecido (None se não calculado)
+        """
+        self.base_ativo = np.asarray(base_ativo, dtype=np.int32)
+        self.equipes_base = np.asarray(equipes_base, dtype=np.int32)
+        # Número de ativos de cada base
+        self.carga_base = np.bincount(self.base_ativo[self.base_ativo >= 0],
+                                      minlength=len(self.equipes_base)).astype(np.int64)
+        self.f1 = f1
+        self.impressao = self._calcular_impressao()
+    
+    def _calcular_impressao(self) -> int:
+        """Impressão digital calculada do zero (O(n_ativos))."""
+        return (_chaves_xor(ATIVO_BASE, np.arange(len(self.base_ativo)), self.base_ativo) ^
+                _chaves_xor(EQUIPES_BASE, np.arange(len(self.equipes_base)), self.equipes_base))
+    
+    @classmethod
+    def de_solucao(cls, solucao: Solucao, m_bases: int) -> 'SolucaoAgregada':
+        """Agrega uma Solucao (conta as equipes alocadas em cada base)."""
+        alocadas = solucao.base_equipe[solucao.base_equipe >= 0]
+        return cls(solucao.base_ativo.copy(), np.bincount(alocadas, minlength=m_bases), solucao.f1)
+    
+    def equipes(self, s_equipes: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Equipes da divisão balanceada, numeradas base a base: numa base com L ativos e c equipes,
+        as L % c primeiras equipes recebem L // c + 1 ativos e as demais L // c.
+        
+        Returns:
+            base_equipe e carga_equipe (s_equipes), base -1 nas equipes não alocadas
+        """
+        m_bases = len(self.equipes_base)
+        total = int(np.sum(self.equipes_base))
+        base_equipe = np.full(max(s_equipes, total), -1, dtype=np.int32)
+        base_equipe[:total] = np.repeat(np.arange(m_bases), self.equipes_base)
+        
+        carga_equipe = np.zeros(len(base_equipe), dtype=np.int64)
+        bases = base_equipe[:total]
+        primeira = np.cumsum(self.equipes_base) - self.equipes_base
+        posicao = np.arange(total) - primeira[bases]
+        c = self.equipes_base[bases]
+        carga_equipe[:total] = self.carga_base[bases] // c + (posicao < self.carga_base[bases] % c)
+        return base_equipe, carga_equipe
+    
+    def para_solucao(self, s_equipes: int, minimo_ativos: float) -> Solucao:
+        """
+        Solucao equivalente com a divisão balanceada (ver equipes): os ativos de cada base, em
+        ordem de índice, vão em blocos consecutivos para as equipes da base (forma canônica).
+        """
+        base_equipe, carga_equipe = self.equipes(s_equipes)
+        primeira = np.cumsum(self.equipes_base) - self.equipes_base
+        
+        equipe_ativo = np.full(len(self.base_ativo), -1, dtype=np.int32)
+        ativos = np.flatnonzero(self.base_ativo >= 0)
+        ativos = ativos[np.argsort(self.base_ativo[ativos], kind='stable')]
+        bases = self.base_ativo[ativos]
+        com_equipe = self.equipes_base[bases] > 0
+        ativos, bases = ativos[com_equipe], bases[com_equipe]
+        
+        # Posição de cada ativo entre os da sua base e equipe correspondente na divisão balanceada
+        carga = np.where(self.equipes_base > 0, self.carga_base, 0)
+        posicao = np.arange(len(ativos)) - (np.cumsum(carga) - carga)[bases]
+        c = self.equipes_base[bases].astype(np.int64)
+        q = self.carga_base[bases] // c
+        r = self.carga_base[bases] % c
+        maiores = r * (q + 1)
+        deslocamento = np.where(posicao < maiores, posicao // (q + 1),
+                                r + (posicao - maiores) // np.maximum(q, 1))
+        equipe_ativo[ativos] = primeira[bases] + deslocamento
+        return Solucao(self.base_ativo.copy(), equipe_ativo, base_equipe[:s_equipes], minimo_ativos,
+                       self.f1, len(self.equipes_base))
+    
+    def copiar(self) -> 'SolucaoAgregada':
+        """Cópia independente."""
+        copia = SolucaoAgregada.__new__(SolucaoAgregada)
+        copia.base_ativo = self.base_ativo.copy()
+        copia.equipes_base = self.equipes_base.copy()
+        copia.carga_base = self.carga_base.copy()
+        copia.f1 = self.f1
+        copia.impressao = self.impressao
+        return copia
+    
+    def canonizar(self) -> 'SolucaoAgregada':
+        """Já é canônica (as equipes de uma base não têm rótulo)."""
+        return self
+    
+    def mover_ativo(self, i: int, j: int):
+        """Passa o ativo i para a base j."""
+        j_antiga = self.base_ativo[i]
+        self.impressao ^= _chave(ATIVO_BASE, i, j_antiga) ^ _chave(ATIVO_BASE, i, j)
+        if j_antiga >= 0:
+            self.carga_base[j_antiga] -= 1
+        self.base_ativo[i] = j
+        self.carga_base[j] += 1
+        self.f1 = None
+    
+    def mover_ativos(self, ativos: np.ndarray, j: int):
+        """Passa vários ativos para a base j."""
+        self.impressao ^= (_chaves_xor(ATIVO_BASE, ativos, self.base_ativo[ativos]) ^
+                           _chaves_xor(ATIVO_BASE, ativos, np.full(len(ativos), j)))
+        antigas = self.base_ativo[ativos]
+        self.carga_base -= np.bincount(antigas[antigas >= 0], minlength=len(self.carga_base))
+        self.base_ativo[ativos] = j
+        self.carga_base[j] += len(ativos)
+        self.f1 = None
+    
+    def alterar_equipes(self, j: int, equipes: int):
+        """Passa a base j a ter `equipes` equipes."""
+        self.impressao ^= _chave(EQUIPES_BASE, j, self.equipes_base[j]) ^ _chave(EQUIPES_BASE, j, equipes)
+        self.equipes_base[j] = equipes
+
+class CacheAvaliacoes:
+    # Classe com um cache LRU limitado: impressão digital da solução -> (f1, f2, violação)
+    
+    def __init__(self, capacidade: int = 4096):
+        """
+        Args:
+            capacidade: Número máximo de soluções guardadas (as menos usadas saem primeiro)
+        """
+        self.capacidade = capacidade
+        self._valores = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+    
+    def buscar(self, impressao: int) -> Optional[Tuple[float, float, float]]:
+        """(f1, f2, violação) guardados para a impressão, ou None (conta acerto/falha)."""
+        valores = self._valores.get(impressao)
+        if valores is None:
+            self.falhas += 1
+            return None
+        self._valores.move_to_end(impressao)
+        self.acertos += 1
+        return valores
+    
+    def guardar(self, impressao: int, valores: Tuple[float, float, float]):
+        """Guarda os valores de uma solução, descartando a menos usada se o cache está cheio."""
+        self._valores[impressao] = valores
+        self._valores.move_to_end(impressao)
+        if len(self._valores) > self.capacidade:
+            self._valores.popitem(last=False)
+    
+    def limpar(self):
+        """Esvazia o cache e zera os contadores."""
+        self._valores.clear()
+        self.acertos = 0
+        self.falhas = 0
+    
+    def estatisticas(self) -> Dict:
+        """Acertos, falhas, taxa de acerto e ocupação do cache."""
+        consultas = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': self.acertos / consultas if consultas > 0 else 0.0,
+            'tamanho': len(self._valores),
+            'capacidade': self.capacidade
+        }
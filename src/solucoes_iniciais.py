@@ -12,6 +12,7 @@ class GeradorSolucoes:
         self.s_equipes = monitoramento.s_equipes
         self.eta = monitoramento.eta
         self.distancias = monitoramento.distancias
+        self.candidatos = monitoramento.candidatos
     
     def gerar_solucao_inicial(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
@@ -42,15 +43,12 @@ class GeradorSolucoes:
             y_jk[base_escolhida, k] = 1
         
         # Passo 2: Atribui ativos as bases MAIS PROXIMAS (para minimizar f1)
-        for i in range(self.n_ativos):
-            # Encontra bases com equipes
-            bases_com_equipes = np.where(np.sum(y_jk, axis=1) > 0)[0]
-            
-            if len(bases_com_equipes) > 0:
-                # SEMPRE escolhe a base mais proxima para minimizar f1
-                distancias_validas = self.distancias[i, bases_com_equipes]
-                base_mais_proxima = bases_com_equipes[np.argmin(distancias_validas)]
-                x_ij[i, base_mais_proxima] = 1
+        bases_com_equipes = np.sum(y_jk, axis=1) > 0
+        
+        # SEMPRE escolhe a base mais proxima para minimizar f1 (consulta ao indice de candidatos)
+        base_mais_proxima = self.candidatos.base_aberta_mais_proxima(bases_com_equipes)
+        ativos = np.flatnonzero(base_mais_proxima >= 0)
+        x_ij[ativos, base_mais_proxima[ativos]] = 1
         
         # Passo 3: Atribui ativos às equipes (com balanceamento melhorado)
         h_ik = self._balancear_atribuicao_equipes(x_ij, y_jk)
@@ -58,9 +56,9 @@ class GeradorSolucoes:
         return x_ij, y_jk, h_ik
     
     def _ordenar_bases_por_centralidade(self) -> List[int]:
-        """Ordena bases por centralidade (menor distância média aos ativos)."""
+        """Ordena bases por centralidade (menor distância média aos ativos), sem as bases podadas."""
         distancias_medias = []
-        for j in range(self.m_bases):
+        for j in np.flatnonzero(self.candidatos.bases_ativas):
             dist_media = np.mean(self.distancias[:, j])
             distancias_medias.append((j, dist_media))
         
@@ -70,6 +68,8 @@ class GeradorSolucoes:
     def _balancear_atribuicao_equipes(self, x_ij: np.ndarray, y_jk: np.ndarray) -> np.ndarray:
         """Balanceia atribuição de ativos às equipes."""
         h_ik = np.zeros((self.n_ativos, self.s_equipes), dtype=int)
+        # Ativos por equipe, atualizado a cada atribuição (em vez de somar h_ik por ativo)
+        ativos_por_equipe = np.zeros(self.s_equipes, dtype=np.int64)
         
         # Para cada ativo, encontra a equipe da base onde está alocado
         for i in range(self.n_ativos):
@@ -79,9 +79,9 @@ class GeradorSolucoes:
                 equipes_base = np.where(y_jk[base_id, :] == 1)[0]
                 if len(equipes_base) > 0:
                     # Escolhe a equipe com menos ativos
-                    ativos_por_equipe = np.sum(h_ik, axis=0)
                     equipe_escolhida = equipes_base[np.argmin(ativos_por_equipe[equipes_base])]
                     h_ik[i, equipe_escolhida] = 1
+                    ativos_por_equipe[equipe_escolhida] += 1
         
         return h_ik
     
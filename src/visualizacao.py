@@ -32,7 +32,7 @@ class Visualizador:
         self.eta = monitoramento.eta
         self.distancias = monitoramento.distancias
         self.bases_coords = monitoramento.bases_coords
-        self.dados = monitoramento.dados
+        self.ativos_coords = monitoramento.ativos_coords
         self.funcoes_objetivo = monitoramento.funcoes_objetivo
     
     def plotar_curvas_convergencia(self, resultados: Dict):
@@ -110,8 +110,7 @@ class Visualizador:
         for i in range(self.n_ativos):
             base_ativo = np.where(x_ij[i, :] == 1)[0][0]
             if base_ativo in bases_ativas:
-                lat = self.dados.iloc[i]['lat_ativo']
-                lon = self.dados.iloc[i]['lon_ativo']
+                lat, lon = self.ativos_coords[i]
                 G.add_node(f'Ativo_{i}', pos=(lon, lat), tipo='ativo', base=base_ativo)
         
         # Adiciona arestas
@@ -406,9 +405,7 @@ class Visualizador:
             base_ativo = np.where(x_ij[i, :] == 1)[0]
             if len(base_ativo) > 0 and base_ativo[0] in bases_ativas:
                 # Encontra coordenadas do ativo
-                ativo_data = self.dados.iloc[i]
-                lat_ativo = ativo_data['lat_ativo']
-                lon_ativo = ativo_data['lon_ativo']
+                lat_ativo, lon_ativo = self.ativos_coords[i]
                 
                 # Cor baseada na base
                 cores = plt.cm.Set3(np.linspace(0, 1, len(bases_ativas)))
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Raiz do repositório no path para importar o pacote src
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from src.monitoramento_ativos_base import MonitoramentoAtivosCompleto
+from src.gerador_instancias import GeradorInstancias
+from src.solucao import Solucao
+
+CAMINHO_DADOS = os.path.join(RAIZ, 'data', 'probdata.csv')
+
+@pytest.fixture(scope='session')
+def arquivo_pequeno(tmp_path_factory):
+    """Instância sintética pequena (60 ativos, 8 bases, 6 equipes) para comparar com força bruta."""
+    arquivo = str(tmp_path_factory.mktemp('instancia') / 'pequena.csv')
+    GeradorInstancias(semente=3).gerar(arquivo, 60, 8, 6, gravar_cache=False)
+    return arquivo
+
+@pytest.fixture
+def monitoramento_pequeno(arquivo_pequeno):
+    """Problema carregado da instância pequena (novo a cada teste: a poda altera o índice)."""
+    return MonitoramentoAtivosCompleto(arquivo_pequeno, usar_cache=False,
+                                       **GeradorInstancias.carregar_opcoes(arquivo_pequeno))
+
+def matrizes_aleatorias(monitoramento, rng, perturbar: bool = True):
+    """
+    Matrizes x_ij, y_jk, h_ik sorteadas: cada equipe numa base, cada ativo numa equipe e na
+    base dela; com perturbar, bits invertidos nas três matrizes (violam as restrições).
+    """
+    n, m, s = monitoramento.n_ativos, monitoramento.m_bases, monitoramento.s_equipes
+    base_equipe = rng.integers(0, m, size=s)
+    equipe_ativo = rng.integers(0, s, size=n)
+    x_ij = np.zeros((n, m), dtype=int)
+    y_jk = np.zeros((m, s), dtype=int)
+    h_ik = np.zeros((n, s), dtype=int)
+    x_ij[np.arange(n), base_equipe[equipe_ativo]] = 1
+    y_jk[base_equipe, np.arange(s)] = 1
+    h_ik[np.arange(n), equipe_ativo] = 1
+    if perturbar:
+        for matriz in (x_ij, y_jk, h_ik):
+            posicoes = rng.random(matriz.shape) < 0.05
+            matriz[posicoes] = 1 - matriz[posicoes]
+    return x_ij, y_jk, h_ik
+
+def solucao_aleatoria(monitoramento, rng):
+    """
+    Solucao sorteada, inclusive inviável: equipes sem base e ativos sem equipe aparecem
+    (cada ativo fica na base da sua equipe, como nos vetores de índices).
+    """
+    n, m, s = monitoramento.n_ativos, monitoramento.m_bases, monitoramento.s_equipes
+    base_equipe = rng.integers(-1, m, size=s)
+    equipe_ativo = rng.integers(-1, s, size=n)
+    base_ativo = np.where(equipe_ativo >= 0, base_equipe[equipe_ativo], -1)
+    return Solucao(base_ativo, equipe_ativo, base_equipe,
+                   monitoramento.eta * n / s, m_bases=m)
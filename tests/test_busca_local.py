@@ -0,0 +1,185 @@
+import numpy as np
+import pytest
+
+from src.solucao import Solucao, SolucaoAgregada
+from src.nucleos import numba_disponivel
+
+def solucao_inicial(monitoramento, semente: int = 0) -> Solucao:
+    """Solução da heurística construtiva, na forma canônica."""
+    np.random.seed(semente)
+    minimo = monitoramento.eta * monitoramento.n_ativos / monitoramento.s_equipes
+    return Solucao.de_matrizes(*monitoramento.gerador_solucoes.gerar_solucao_inicial(),
+                               minimo_ativos=minimo).canonizar()
+
+def solucoes_perturbadas(monitoramento, rng, quantidade: int = 10):
+    """Soluções construtivas com alguns ativos movidos ao acaso (viáveis ou não)."""
+    n, s = monitoramento.n_ativos, monitoramento.s_equipes
+    for semente in range(quantidade):
+        solucao = solucao_inicial(monitoramento, semente)
+        for _ in range(semente % 4):
+            solucao.mover_ativo(int(rng.integers(n)), int(rng.integers(s)))
+        yield solucao
+
+@pytest.mark.parametrize('modelo', ['completo', 'agregado'])
+@pytest.mark.parametrize('funcao_objetivo', ['f1', 'f2'])
+def test_shake_devolve_o_melhor_candidato(monitoramento_pequeno, modelo, funcao_objetivo):
+    """O shake devolve, entre as perturbações sorteadas, a de menor (violação, valor objetivo)."""
+    solucao = solucao_inicial(monitoramento_pequeno)
+    busca = monitoramento_pequeno.busca_local
+    if modelo == 'agregado':
+        busca = monitoramento_pequeno.busca_agregada
+        solucao = SolucaoAgregada.de_solucao(solucao, monitoramento_pequeno.m_bases)
+    
+    for semente in range(5):
+        np.random.seed(semente)
+        escolhida = busca.shake_adaptativo(solucao, 0.8, funcao_objetivo)
+        np.random.seed(semente)
+        candidatos = [busca._perturbar(solucao, 0.8) for _ in range(busca.candidatos_shake)]
+        
+        avaliacoes = [busca._calcular_valores(candidato) for candidato in candidatos]
+        chaves = [(v, f1 if funcao_objetivo == 'f1' else f2) for f1, f2, v in avaliacoes]
+        assert escolhida.impressao == candidatos[chaves.index(min(chaves))].impressao
+        assert escolhida.f1 == busca._calcular_valores(candidatos[chaves.index(min(chaves))])[0]
+
+def test_delta_previsto_igual_ao_valor_aceito(monitoramento_pequeno):
+    """
+    O (delta_f1, delta_f2) de _avaliar_movimento somado ao valor atual dá o valor da solução
+    aceita por _aceitar_movimento, e o vizinho previsto viável não viola restrições.
+    """
+    busca = monitoramento_pequeno.busca_local
+    funcoes_objetivo = monitoramento_pequeno.funcoes_objetivo
+    n, s = monitoramento_pequeno.n_ativos, monitoramento_pequeno.s_equipes
+    rng = np.random.default_rng(9)
+    solucao = solucao_inicial(monitoramento_pequeno)
+    avaliados = 0
+    for _ in range(30):
+        # Movimentos das vizinhanças e movimentos sorteados de cada tipo
+        movimentos = list(busca._movimentos_shift(solucao))
+        for funcao_objetivo in ('f1', 'f2'):
+            movimentos += busca._melhores_task_move(solucao, funcao_objetivo, 3)
+        movimentos += busca._melhores_two_opt(solucao, 3)
+        for _ in range(30):
+            i, j = rng.choice(n, 2, replace=False)
+            k_i, k_j = rng.integers(s, size=2)
+            movimentos += [('ativo', int(i), int(k_i)), ('troca', int(i), int(k_i), int(j), int(k_j))]
+        
+        viaveis = solucao.equipes_viaveis()
+        inviaveis = int(np.count_nonzero(~viaveis))
+        f1, f2 = busca._valor(solucao, 'f1'), busca._valor(solucao, 'f2')
+        aceitos = []
+        for movimento in movimentos:
+            deltas = busca._avaliar_movimento(solucao, movimento, viaveis, inviaveis)
+            if deltas is None:
+                continue
+            vizinho, valor_f1, _ = busca._aceitar_movimento(solucao, movimento, 'f1')
+            assert np.isclose(f1 + deltas[0], valor_f1, atol=1e-9)
+            assert np.isclose(f1 + deltas[0], funcoes_objetivo.calcular_f1_solucao(vizinho), atol=1e-9)
+            assert f2 + deltas[1] == busca._valor(vizinho, 'f2')
+            assert funcoes_objetivo.violacao_solucao(vizinho) == 0
+            aceitos.append(vizinho)
+        avaliados += len(aceitos)
+        
+        # Passeio aleatório pelos vizinhos viáveis
+        solucao = aceitos[rng.integers(len(aceitos))]
+    assert avaliados > 0
+
+@pytest.mark.parametrize('poda', [False, True])
+@pytest.mark.parametrize('funcao_objetivo', ['f1', 'f2'])
+def test_melhor_task_move_igual_a_forca_bruta(monitoramento_pequeno, poda, funcao_objetivo):
+    """O melhor TASK MOVE da matriz de deltas tem o ganho do melhor movimento por força bruta."""
+    if poda:
+        monitoramento_pequeno.podar_instancia('heuristico', r=2)
+    busca = monitoramento_pequeno.busca_local
+    distancias = np.asarray(monitoramento_pequeno.distancias, dtype=np.float64)
+    limite = busca.candidatos.limite if funcao_objetivo == 'f1' else np.full(busca.n_ativos, np.inf)
+    objetivo = 0 if funcao_objetivo == 'f1' else 1
+    rng = np.random.default_rng(10)
+    for solucao in solucoes_perturbadas(monitoramento_pequeno, rng):
+        viaveis = solucao.equipes_viaveis()
+        inviaveis = int(np.count_nonzero(~viaveis))
+        abertas = [j for j in range(busca.m_bases)
+                   if np.any(solucao.base_equipe == j) and busca.candidatos.bases_ativas[j]]
+        
+        # Cada ativo vai para a equipe menos carregada (menor índice no empate) de outra base aberta
+        melhor = 0.0
+        for i in np.flatnonzero(solucao.equipe_ativo >= 0):
+            for j in abertas:
+                if j == solucao.base_ativo[i] or distancias[i, j] > limite[i] or len(abertas) < 2:
+                    continue
+                equipes = np.flatnonzero(solucao.base_equipe == j)
+                k = int(equipes[np.argmin(solucao.carga_equipe[equipes])])
+                deltas = busca._avaliar_movimento(solucao, ('ativo', int(i), k), viaveis, inviaveis)
+                if deltas is not None:
+                    melhor = min(melhor, deltas[objetivo])
+        
+        movimentos = busca._melhores_task_move(solucao, funcao_objetivo, 1)
+        if melhor < 0:
+            assert len(movimentos) == 1
+            deltas = busca._avaliar_movimento(solucao, movimentos[0], viaveis, inviaveis)
+            assert deltas is not None and np.isclose(deltas[objetivo], melhor, atol=1e-9)
+        else:
+            assert movimentos == []
+
+@pytest.mark.parametrize('poda', [False, True])
+@pytest.mark.parametrize('backend', ['numpy', pytest.param('numba', marks=pytest.mark.skipif(
+    not numba_disponivel(), reason='numba não está instalado'))])
+def test_melhor_troca_igual_a_forca_bruta(monitoramento_pequeno, poda, backend):
+    """A varredura do SWAP, nos dois backends, acha a primeira melhor troca do laço sobre os pares."""
+    if poda:
+        monitoramento_pequeno.podar_instancia('heuristico', r=2)
+    monitoramento_pequeno.funcoes_objetivo.usar_nucleos(backend)
+    busca = monitoramento_pequeno.busca_local
+    distancias = np.asarray(monitoramento_pequeno.distancias, dtype=np.float64)
+    limite = busca.candidatos.limite
+    rng = np.random.default_rng(11)
+    for solucao in solucoes_perturbadas(monitoramento_pequeno, rng):
+        base = solucao.base_ativo
+        abertas = busca._bases_com_equipes(solucao) & busca.candidatos.bases_ativas
+        trocaveis = [i for i in range(busca.n_ativos) if base[i] >= 0 and abertas[base[i]]]
+        linhas = np.sort(rng.choice(busca.n_ativos, busca.n_ativos // 2, replace=False))
+        
+        for ativos in (None, linhas):
+            melhor = None
+            for a in (trocaveis if ativos is None else [a for a in trocaveis if a in ativos]):
+                for b in trocaveis:
+                    if b <= a or base[a] == base[b]:
+                        continue
+                    if distancias[a, base[b]] > limite[a] or distancias[b, base[a]] > limite[b]:
+                        continue
+                    ganho = (distancias[a, base[b]] + distancias[b, base[a]] -
+                             distancias[a, base[a]] - distancias[b, base[b]])
+                    if ganho < (0.0 if melhor is None else melhor[0]):
+                        melhor = (ganho, a, b)
+            assert busca._melhor_troca(solucao, ativos) == melhor
+
+@pytest.mark.parametrize('tamanho_lote', [1 << 20, 20])
+def test_somas_distancias_equipes_iguais_a_forca_bruta(monitoramento_pequeno, monkeypatch, tamanho_lote):
+    """Somas de distâncias (equipe, base) e contagem de pares podados iguais às do laço, em blocos."""
+    monkeypatch.setattr('src.busca_local.TAMANHO_LOTE_AVALIACAO', tamanho_lote)
+    monitoramento_pequeno.podar_instancia('heuristico', r=2)
+    busca = monitoramento_pequeno.busca_local
+    distancias = np.asarray(monitoramento_pequeno.distancias, dtype=np.float64)
+    limite = busca.candidatos.limite
+    rng = np.random.default_rng(12)
+    for solucao in solucoes_perturbadas(monitoramento_pequeno, rng):
+        somas = np.zeros((busca.s_equipes, busca.m_bases))
+        podados = np.zeros((busca.s_equipes, busca.m_bases))
+        for i in np.flatnonzero(solucao.equipe_ativo >= 0):
+            for j in range(busca.m_bases):
+                somas[solucao.equipe_ativo[i], j] += distancias[i, j]
+                podados[solucao.equipe_ativo[i], j] += distancias[i, j] > limite[i]
+        
+        somas_busca, podados_busca = busca._somas_distancias_equipes(solucao)
+        assert np.allclose(somas_busca, somas, atol=1e-9)
+        assert np.array_equal(podados_busca, podados)
+        assert podados.any()
+
+def test_movimento_desconhecido_gera_erro(monitoramento_pequeno):
+    """Descritores fora de 'ativo', 'troca' e 'equipe' não são avaliados nem aplicados."""
+    busca = monitoramento_pequeno.busca_local
+    solucao = solucao_inicial(monitoramento_pequeno)
+    viaveis = solucao.equipes_viaveis()
+    with pytest.raises(ValueError):
+        busca._avaliar_movimento(solucao, ('fechar', 0, 1, None), viaveis, 0)
+    with pytest.raises(ValueError):
+        busca._aplicar_movimento(solucao, ('fechar', 0, 1, None))
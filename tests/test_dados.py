@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from src.dados import DadosProcessor, haversine
+from conftest import CAMINHO_DADOS
+
+def copiar_dados(tmp_path):
+    """Cópia do probdata.csv numa pasta temporária (o cache fica em tmp_path/cache)."""
+    arquivo = os.path.join(tmp_path, 'probdata.csv')
+    shutil.copyfile(CAMINHO_DADOS, arquivo)
+    return arquivo
+
+def test_partida_a_quente_nao_rele_o_csv(tmp_path):
+    """Com tamanho e mtime iguais, o hash do conteúdo vem do índice guardado junto do cache."""
+    arquivo = copiar_dados(tmp_path)
+    fria = DadosProcessor(arquivo)
+    caminho_indice = os.path.join(tmp_path, 'cache', 'probdata_conteudo.json')
+    with open(caminho_indice, 'r', encoding='utf-8') as f:
+        indice = json.load(f)
+    
+    # Hash trocado no índice: se o CSV fosse relido, a chave seria a mesma da partida fria
+    indice['hash'] = '0' * 32
+    with open(caminho_indice, 'w', encoding='utf-8') as f:
+        json.dump(indice, f)
+    assert DadosProcessor(arquivo).caminho_cache != fria.caminho_cache
+
+def test_csv_alterado_invalida_o_cache(tmp_path):
+    """Mudou o arquivo (tamanho ou mtime): o conteúdo é hasheado de novo."""
+    arquivo = copiar_dados(tmp_path)
+    fria = DadosProcessor(arquivo)
+    with open(arquivo, 'a', encoding='utf-8') as f:
+        f.write('\n')
+    quente = DadosProcessor(arquivo)
+    assert quente.caminho_cache != fria.caminho_cache
+    assert np.array_equal(np.asarray(quente.distancias), np.asarray(fria.distancias))
+
+def test_distancia_vazia_vira_par_faltante(tmp_path):
+    """Célula de distância vazia no CSV: o par é tratado como ausente e calculado pela haversine."""
+    arquivo = copiar_dados(tmp_path)
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        linhas = f.readlines()
+    linhas[0] = linhas[0].rsplit(';', 1)[0] + ';\n'
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        f.writelines(linhas)
+    
+    dados = DadosProcessor(arquivo, usar_cache=False)
+    distancias = np.asarray(dados.distancias)
+    assert not np.isnan(distancias).any()
+    faltantes = dados.diagnostico_distancias['pares_faltantes']
+    assert len(faltantes) == 1
+    i, j = faltantes[0]
+    assert np.isclose(distancias[i, j], haversine(-20.42356922, -43.85662129, -19.98539183, -43.81394056))
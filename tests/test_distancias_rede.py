@@ -0,0 +1,43 @@
+import json
+import os
+
+import numpy as np
+
+from src.dados import haversine
+from src.distancias_rede import DistanciasRede
+
+def gravar_malha(tmp_path):
+    """Malha com dois trechos (o segundo sem comprimento)."""
+    arquivo = os.path.join(tmp_path, 'malha.csv')
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        f.write('-20,0;-43,0;-20,0;-43,1;12,5\n')
+        f.write('-20,0;-43,1;-20,1;-43,1;\n')
+    return arquivo
+
+def test_aresta_sem_comprimento_usa_haversine(tmp_path):
+    """Célula de comprimento vazia não leva NaN ao grafo: a aresta recebe a haversine."""
+    rede = DistanciasRede(gravar_malha(tmp_path), usar_cache=False)
+    
+    distancia = rede.calcular(np.array([[-20.0, -43.0]]), np.array([[-20.1, -43.1]]))
+    esperada = 12.5 + haversine(-20.0, -43.1, -20.1, -43.1)
+    assert np.all(np.isfinite(distancia))
+    assert np.isclose(distancia[0, 0], esperada)
+
+def test_partida_a_quente_nao_rele_o_grafo(tmp_path):
+    """Com tamanho e mtime iguais, o hash do grafo vem do índice guardado na pasta do cache."""
+    arquivo = gravar_malha(tmp_path)
+    fria = DistanciasRede(arquivo)
+    caminho_indice = os.path.join(tmp_path, 'cache', 'malha_conteudo.json')
+    with open(caminho_indice, 'r', encoding='utf-8') as f:
+        indice = json.load(f)
+    
+    # Hash trocado no índice: se o grafo fosse relido, a chave seria a mesma da partida fria
+    indice['hash'] = '0' * 32
+    with open(caminho_indice, 'w', encoding='utf-8') as f:
+        json.dump(indice, f)
+    assert DistanciasRede(arquivo).chave() != fria.chave()
+    
+    # Grafo alterado: o índice deixa de valer e o conteúdo é hasheado de novo
+    with open(arquivo, 'a', encoding='utf-8') as f:
+        f.write('\n')
+    assert DistanciasRede(arquivo).chave() != fria.chave()
@@ -0,0 +1,125 @@
+import numpy as np
+
+from conftest import matrizes_aleatorias, solucao_aleatoria
+
+def f1_referencia(funcoes_objetivo, x_ij, h_ik, y_jk) -> float:
+    """Laço original de calcular_f1: cada ativo soma a distância à primeira base da sua equipe."""
+    distancia_total = 0.0
+    for i in range(funcoes_objetivo.n_ativos):
+        for k in range(funcoes_objetivo.s_equipes):
+            if h_ik[i, k] == 1:
+                for j in range(funcoes_objetivo.m_bases):
+                    if y_jk[j, k] == 1:
+                        distancia_total += funcoes_objetivo.distancias[i, j]
+                        break
+    return distancia_total
+
+def test_calcular_f1_igual_ao_laco(monitoramento_pequeno):
+    """f1 vetorizado é igual bit a bit ao laço original, inclusive em soluções inválidas."""
+    funcoes_objetivo = monitoramento_pequeno.funcoes_objetivo
+    rng = np.random.default_rng(0)
+    for t in range(20):
+        x_ij, y_jk, h_ik = matrizes_aleatorias(monitoramento_pequeno, rng, perturbar=t % 2 == 1)
+        assert funcoes_objetivo.calcular_f1(x_ij, h_ik, y_jk) == f1_referencia(funcoes_objetivo, x_ij, h_ik, y_jk)
+
+def violacao_referencia(funcoes_objetivo, x_ij, y_jk, h_ik):
+    """Laços originais de calcular_violacao, com o total de cada restrição em separado."""
+    n_ativos, m_bases, s_equipes = funcoes_objetivo.n_ativos, funcoes_objetivo.m_bases, funcoes_objetivo.s_equipes
+    minimo_ativos = funcoes_objetivo.eta * n_ativos / s_equipes
+    restricoes = [0.0] * 6
+    
+    for k in range(s_equipes):
+        soma_equipe = np.sum(y_jk[:, k])
+        ativos_equipe = np.sum(h_ik[:, k])
+        if soma_equipe > 1:
+            restricoes[0] += (soma_equipe - 1)**2
+        if ativos_equipe > 0 and soma_equipe != 1:
+            restricoes[0] += (abs(soma_equipe - 1))**2
+        if soma_equipe == 1 and ativos_equipe == 0:
+            restricoes[0] += 1.0
+    for i in range(n_ativos):
+        soma_bases = np.sum(x_ij[i, :])
+        if soma_bases != 1:
+            restricoes[1] += (soma_bases - 1)**2
+    for i in range(n_ativos):
+        for j in range(m_bases):
+            if x_ij[i, j] == 1 and np.sum(y_jk[j, :]) == 0:
+                restricoes[2] += 1.0
+    for i in range(n_ativos):
+        soma_equipes = np.sum(h_ik[i, :])
+        if soma_equipes != 1:
+            restricoes[3] += (soma_equipes - 1)**2
+    for i in range(n_ativos):
+        for k in range(s_equipes):
+            if h_ik[i, k] == 1:
+                base_ativo = np.where(x_ij[i, :] == 1)[0]
+                if len(base_ativo) > 0 and y_jk[base_ativo[0], k] != 1:
+                    restricoes[4] += 1.0
+    for k in range(s_equipes):
+        ativos_equipe = np.sum(h_ik[:, k])
+        if 0 < ativos_equipe < minimo_ativos:
+            restricoes[5] += (minimo_ativos - ativos_equipe)**2
+    return restricoes
+
+def test_violacao_igual_ao_laco(monitoramento_pequeno):
+    """Parcelas vetorizadas, total e detalhamento por restrição batem com os laços originais."""
+    funcoes_objetivo = monitoramento_pequeno.funcoes_objetivo
+    rng = np.random.default_rng(1)
+    for t in range(20):
+        x_ij, y_jk, h_ik = matrizes_aleatorias(monitoramento_pequeno, rng, perturbar=t % 2 == 1)
+        restricoes = violacao_referencia(funcoes_objetivo, x_ij, y_jk, h_ik)
+        
+        parcelas = funcoes_objetivo._parcelas_violacao(x_ij, y_jk, h_ik)
+        assert np.allclose([np.sum(p) for p in parcelas], restricoes)
+        
+        detalhes = funcoes_objetivo.calcular_violacao_detalhada(x_ij, y_jk, h_ik)
+        assert np.allclose([detalhes[f'restricao_{r}'] for r in range(1, 7)], restricoes)
+        assert detalhes['total'] == funcoes_objetivo.calcular_violacao(x_ij, y_jk, h_ik)
+        assert np.isclose(detalhes['total'], sum(restricoes))
+        assert funcoes_objetivo.verificar_restricoes(x_ij, y_jk, h_ik) == (sum(restricoes) == 0.0)
+
+def valores_solucao(funcoes_objetivo, solucao):
+    """(f1, f2, violação) recalculados do zero."""
+    return np.array([funcoes_objetivo.calcular_f1_solucao(solucao), funcoes_objetivo.calcular_f2_solucao(solucao),
+                     funcoes_objetivo.violacao_solucao(solucao)])
+
+def test_delta_mover_ativo_igual_ao_recalculo(monitoramento_pequeno):
+    """Delta de passar um ativo para outra equipe (alocada ou não) = diferença dos valores recalculados."""
+    funcoes_objetivo = monitoramento_pequeno.funcoes_objetivo
+    rng = np.random.default_rng(2)
+    for _ in range(300):
+        solucao = solucao_aleatoria(monitoramento_pequeno, rng)
+        i = int(rng.integers(monitoramento_pequeno.n_ativos))
+        k = int(rng.integers(monitoramento_pequeno.s_equipes))
+        delta = funcoes_objetivo.delta_mover_ativo(solucao, i, k)
+        
+        vizinho = solucao.copiar()
+        vizinho.mover_ativo(i, k)
+        esperado = valores_solucao(funcoes_objetivo, vizinho) - valores_solucao(funcoes_objetivo, solucao)
+        assert np.allclose(delta, esperado, rtol=0, atol=1e-9)
+
+def test_delta_realocar_equipe_igual_ao_recalculo(monitoramento_pequeno):
+    """Delta de levar uma equipe, com seus ativos, para outra base (ou tirá-la da base)."""
+    funcoes_objetivo = monitoramento_pequeno.funcoes_objetivo
+    rng = np.random.default_rng(3)
+    for _ in range(300):
+        solucao = solucao_aleatoria(monitoramento_pequeno, rng)
+        k = int(rng.integers(monitoramento_pequeno.s_equipes))
+        j = int(rng.integers(-1, monitoramento_pequeno.m_bases))
+        delta = funcoes_objetivo.delta_realocar_equipe(solucao, k, j)
+        
+        vizinho = solucao.copiar()
+        vizinho.realocar_equipe(k, j)
+        esperado = valores_solucao(funcoes_objetivo, vizinho) - valores_solucao(funcoes_objetivo, solucao)
+        assert np.allclose(delta, esperado, rtol=0, atol=1e-9)
+
+def test_avaliar_lote_igual_as_avaliacoes_individuais(monitoramento_pequeno):
+    """Cada linha do lote tem exatamente os valores dos avaliadores de uma solução."""
+    funcoes_objetivo = monitoramento_pequeno.funcoes_objetivo
+    rng = np.random.default_rng(7)
+    solucoes = [solucao_aleatoria(monitoramento_pequeno, rng) for _ in range(16)]
+    f1, f2, violacao = funcoes_objetivo.avaliar_solucoes(solucoes)
+    for b, solucao in enumerate(solucoes):
+        assert f1[b] == funcoes_objetivo.calcular_f1_solucao(solucao)
+        assert f2[b] == funcoes_objetivo.calcular_f2_solucao(solucao)
+        assert violacao[b] == funcoes_objetivo.violacao_solucao(solucao)
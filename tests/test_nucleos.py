@@ -0,0 +1,14 @@
+import pytest
+
+from src.monitoramento_ativos_base import MonitoramentoAtivosCompleto
+from src.nucleos import NucleosNumpy, NucleosNumba, comparar_nucleos, numba_disponivel
+from conftest import CAMINHO_DADOS
+
+@pytest.mark.skipif(not numba_disponivel(), reason='numba não está instalado')
+def test_nucleos_numba_iguais_ao_numpy():
+    """Os núcleos compilados dão resultados idênticos aos NumPy nos dados do problema."""
+    monitoramento = MonitoramentoAtivosCompleto(CAMINHO_DADOS)
+    iguais = comparar_nucleos(NucleosNumba(), NucleosNumpy(), monitoramento.distancias,
+                              monitoramento.s_equipes,
+                              monitoramento.eta * monitoramento.n_ativos / monitoramento.s_equipes)
+    assert all(iguais.values()), iguais
@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+from src.monitoramento_ativos_base import MonitoramentoAtivosCompleto
+from conftest import CAMINHO_DADOS
+
+@pytest.mark.parametrize('r', [3, 2])
+@pytest.mark.parametrize('modelo', ['completo', 'agregado'])
+def test_vns_apos_poda_heuristica(r, modelo):
+    """O shake não pode falhar quando a poda deixa um ativo sem base próxima aberta."""
+    np.random.seed(0)
+    monitoramento = MonitoramentoAtivosCompleto(CAMINHO_DADOS)
+    monitoramento.podar_instancia('heuristico', r=r)
+    resultado = monitoramento.algoritmo_vns.vns('f1', max_iter=5, max_iter_sem_melhoria=3, modelo=modelo)
+    
+    h_ik = resultado['h_ik']
+    assert np.all(h_ik.sum(axis=1) == 1)
@@ -0,0 +1,96 @@
+import numpy as np
+
+from src.solucao import Solucao, SolucaoAgregada, CacheAvaliacoes
+from conftest import matrizes_aleatorias, solucao_aleatoria
+
+def test_vetores_de_indices_equivalentes_as_matrizes(monitoramento_pequeno):
+    """de_matrizes/para_matrizes ida e volta, e f1, f2 e violação iguais aos das matrizes."""
+    funcoes_objetivo = monitoramento_pequeno.funcoes_objetivo
+    minimo = monitoramento_pequeno.eta * monitoramento_pequeno.n_ativos / monitoramento_pequeno.s_equipes
+    rng = np.random.default_rng(4)
+    for _ in range(20):
+        x_ij, y_jk, h_ik = matrizes_aleatorias(monitoramento_pequeno, rng, perturbar=False)
+        solucao = Solucao.de_matrizes(x_ij, y_jk, h_ik, minimo_ativos=minimo)
+        
+        for original, convertida in zip((x_ij, y_jk, h_ik), solucao.para_matrizes(monitoramento_pequeno.m_bases)):
+            assert np.array_equal(original, convertida)
+        assert funcoes_objetivo.calcular_f1_solucao(solucao) == funcoes_objetivo.calcular_f1(x_ij, h_ik, y_jk)
+        assert funcoes_objetivo.calcular_f2_solucao(solucao) == funcoes_objetivo.calcular_f2(h_ik, y_jk)
+        assert np.isclose(funcoes_objetivo.violacao_solucao(solucao),
+                          funcoes_objetivo.calcular_violacao(x_ij, y_jk, h_ik))
+
+def test_impressao_incremental_igual_a_calculada(monitoramento_pequeno):
+    """Os movimentos atualizam a impressão digital com o mesmo valor do cálculo do zero."""
+    rng = np.random.default_rng(5)
+    n, m, s = monitoramento_pequeno.n_ativos, monitoramento_pequeno.m_bases, monitoramento_pequeno.s_equipes
+    solucao = solucao_aleatoria(monitoramento_pequeno, rng)
+    agregada = SolucaoAgregada.de_solucao(solucao, m)
+    for _ in range(200):
+        solucao.mover_ativo(int(rng.integers(n)), int(rng.integers(s)))
+        solucao.realocar_equipe(int(rng.integers(s)), int(rng.integers(-1, m)))
+        assert solucao.impressao == solucao._calcular_impressao()
+        
+        agregada.mover_ativo(int(rng.integers(n)), int(rng.integers(m)))
+        agregada.mover_ativos(rng.choice(n, 3, replace=False), int(rng.integers(m)))
+        agregada.alterar_equipes(int(rng.integers(m)), int(rng.integers(3)))
+        assert agregada.impressao == agregada._calcular_impressao()
+    assert solucao.copiar().impressao == solucao.impressao
+
+def test_canonizar_invariante_a_permutacao_das_equipes(monitoramento_pequeno):
+    """Soluções que só diferem na numeração das equipes ficam com os mesmos vetores e impressão."""
+    rng = np.random.default_rng(7)
+    s = monitoramento_pequeno.s_equipes
+    for _ in range(50):
+        solucao = solucao_aleatoria(monitoramento_pequeno, rng)
+        permutacao = rng.permutation(s)
+        equipe_ativo = np.where(solucao.equipe_ativo >= 0, permutacao[solucao.equipe_ativo], -1)
+        permutada = Solucao(solucao.base_ativo, equipe_ativo, solucao.base_equipe[np.argsort(permutacao)],
+                            solucao.minimo_ativos, m_bases=monitoramento_pequeno.m_bases)
+        
+        solucao.canonizar()
+        permutada.canonizar()
+        for campo in ('base_ativo', 'equipe_ativo', 'base_equipe', 'carga_equipe', 'carga_base'):
+            assert np.array_equal(getattr(solucao, campo), getattr(permutada, campo))
+        assert permutada.impressao == solucao.impressao == solucao._calcular_impressao()
+
+def test_para_solucao_preserva_objetivos(monitoramento_pequeno):
+    """A Solucao exportada por para_solucao tem o f1 e o f2 da SolucaoAgregada (e a violação,
+    quando todo ativo está numa base com equipe)."""
+    funcoes_objetivo = monitoramento_pequeno.funcoes_objetivo
+    n, m, s = monitoramento_pequeno.n_ativos, monitoramento_pequeno.m_bases, monitoramento_pequeno.s_equipes
+    minimo = monitoramento_pequeno.eta * n / s
+    rng = np.random.default_rng(8)
+    for _ in range(100):
+        equipes_base = np.bincount(rng.integers(0, m, size=rng.integers(1, s + 1)), minlength=m)
+        for base_ativo in (rng.integers(-1, m, size=n), rng.choice(np.flatnonzero(equipes_base), size=n)):
+            agregada = SolucaoAgregada(base_ativo, equipes_base)
+            solucao = agregada.para_solucao(s, minimo)
+            assert funcoes_objetivo.calcular_f1_solucao(solucao) == funcoes_objetivo.calcular_f1_agregada(agregada)
+            assert funcoes_objetivo.calcular_f2_solucao(solucao) == funcoes_objetivo.calcular_f2_agregada(agregada)
+        assert np.isclose(funcoes_objetivo.violacao_solucao(solucao), funcoes_objetivo.violacao_agregada(agregada))
+
+def test_cache_avaliacoes_lru():
+    """O cache descarta a impressão menos usada e conta acertos e falhas."""
+    cache = CacheAvaliacoes(capacidade=2)
+    cache.guardar(1, (1.0, 1.0, 0.0))
+    cache.guardar(2, (2.0, 1.0, 0.0))
+    assert cache.buscar(1) == (1.0, 1.0, 0.0)
+    cache.guardar(3, (3.0, 1.0, 0.0))
+    assert cache.buscar(2) is None
+    assert cache.buscar(3) == (3.0, 1.0, 0.0)
+    estatisticas = cache.estatisticas()
+    assert (estatisticas['acertos'], estatisticas['falhas'], estatisticas['tamanho']) == (2, 1, 2)
+
+def test_avaliacao_pelo_cache_igual_a_direta(monitoramento_pequeno):
+    """Valores vindos do cache do tournament_selection são os mesmos da avaliação direta."""
+    busca_local = monitoramento_pequeno.busca_local
+    funcoes_objetivo = monitoramento_pequeno.funcoes_objetivo
+    rng = np.random.default_rng(6)
+    solucoes = [solucao_aleatoria(monitoramento_pequeno, rng) for _ in range(10)]
+    for _ in range(2):
+        for solucao in solucoes:
+            for funcao_objetivo in ('f1', 'f2'):
+                valor, violacao = busca_local._avaliar(solucao.copiar(), funcao_objetivo)
+                assert valor == funcoes_objetivo.valor_solucao(solucao.copiar(), funcao_objetivo)
+                assert violacao == funcoes_objetivo.violacao_solucao(solucao)
+    assert busca_local.cache_avaliacoes.acertos > 0